@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from config import settings
-from routers import auth, job, assessment, quiz, roadmap, reports
+from routers import auth, job, assessment, quiz, roadmap, reports, system
+from database.connection import SessionLocal
+from services import (
+    openai_service, vector_service, index_queue, roadmap_template_service, employee_summary_service
+)
+from services.llm_guard import LLMUnavailableError
+from services.usage_tracker import begin_usage_context
 
 # Create FastAPI app
 app = FastAPI(
@@ -17,6 +24,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -26,6 +34,66 @@ app.include_router(assessment.router, prefix="/api")
 app.include_router(quiz.router, prefix="/api")
 app.include_router(roadmap.router, prefix="/api")
 app.include_router(reports.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
+
+
+@app.middleware("http")
+async def attribute_llm_usage(request: Request, call_next):
+    """Attribute LLM calls made while handling a request to its endpoint and user"""
+    begin_usage_context(request.scope)
+    return await call_next(request)
+
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    """AI features are throttled or the circuit breaker is open"""
+    headers = {"Retry-After": str(max(1, int(exc.retry_after)))} if exc.retry_after else None
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI service temporarily unavailable, please retry later"},
+        headers=headers
+    )
+
+
+@app.on_event("startup")
+def start_background_tasks():
+    """Start the skill index queue and periodic index maintenance"""
+    index_queue.start()
+    vector_service.start_background_refit()
+
+
+@app.on_event("startup")
+def backfill_employee_summary():
+    """Create the employee_summary rows of employees that have none"""
+    db = SessionLocal()
+    try:
+        created = employee_summary_service.backfill_missing(db)
+        if created:
+            print(f"Backfilled the summary of {created} employees")
+    except Exception as e:
+        print(f"Error backfilling employee summary: {str(e)}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+async def warm_roadmap_templates():
+    """Generate missing roadmap templates in the background, if enabled"""
+    if settings.ROADMAP_TEMPLATE_WARM_ON_STARTUP:
+        roadmap_template_service.start_warm()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    """Flush queued index updates and stop background threads"""
+    index_queue.stop()
+    vector_service.stop_background_refit()
+
+
+@app.on_event("shutdown")
+async def close_openai_client():
+    """Close the shared OpenAI connection pool"""
+    await openai_service.close()
 
 
 @app.get("/")
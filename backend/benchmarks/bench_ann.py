@@ -0,0 +1,98 @@
+"""
+Benchmark the skill index search backends.
+
+Reports recall@k against exact search and p50/p99 single-query latency for
+each backend at several index sizes, on synthetic TF-IDF-like skill vectors
+with the same dimensionality as the production vectorizer.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ann --sizes 10000 100000 1000000 --k 5
+"""
+import os
+import time
+import argparse
+import numpy as np
+from scipy import sparse
+
+# Settings are read at import time; the benchmark does not talk to OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from services.ann_index import ExactIndex, LSHIndex, IVFIndex, top_k  # noqa: E402
+
+
+def synthetic_vectors(rows: int, dims: int, rng: np.random.Generator) -> sparse.csr_matrix:
+    """Short skill texts: 2-6 Zipf-distributed terms per row, L2-normalized"""
+    terms_per_row = rng.integers(2, 7, size=rows)
+    indptr = np.concatenate([[0], np.cumsum(terms_per_row)])
+    term_weights = 1.0 / np.arange(1, dims + 1)
+    indices = rng.choice(dims, size=indptr[-1], p=term_weights / term_weights.sum())
+    data = rng.uniform(0.5, 1.5, size=indptr[-1])
+    vectors = sparse.csr_matrix((data, indices, indptr), shape=(rows, dims))
+    vectors.sum_duplicates()
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)).ravel())
+    return sparse.diags(1.0 / np.where(norms == 0, 1, norms)) @ vectors
+
+
+def search(index, vectors: sparse.csr_matrix, query: sparse.csr_matrix, k: int) -> np.ndarray:
+    rows = index.candidates(query)[0]
+    if rows is None:
+        scores = (vectors @ query.T).toarray().ravel()
+        return scores[top_k(scores, k)]
+    scores = (vectors[rows] @ query.T).toarray().ravel()
+    return scores[top_k(scores, k)]
+
+
+def run(size: int, dims: int, n_queries: int, k: int, seed: int):
+    rng = np.random.default_rng(seed)
+    vectors = synthetic_vectors(size, dims, rng)
+    queries = synthetic_vectors(n_queries, dims, rng)
+
+    exact = ExactIndex(vectors)
+    truth = [search(exact, vectors, queries[i], k) for i in range(n_queries)]
+
+    # Backends use the configured VECTOR_ANN_* trade-off settings
+    backends = [
+        ("exact", lambda: exact),
+        ("lsh", lambda: LSHIndex(vectors, settings.VECTOR_ANN_LSH_TABLES, settings.VECTOR_ANN_LSH_BITS)),
+        ("ivf", lambda: IVFIndex(vectors, settings.VECTOR_ANN_IVF_LISTS, settings.VECTOR_ANN_IVF_PROBES))
+    ]
+
+    for name, build in backends:
+        started = time.perf_counter()
+        index = build()
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        recalls = []
+        for i in range(n_queries):
+            started = time.perf_counter()
+            found = search(index, vectors, queries[i], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            # Tie-aware: a hit is any result scoring at least the exact k-th score
+            threshold = truth[i][-1] - 1e-9 if len(truth[i]) else np.inf
+            recalls.append(min(int((found >= threshold).sum()), k) / max(len(truth[i]), 1))
+
+        print(
+            f"{size:>9} {name:<6} build={build_seconds:7.2f}s "
+            f"recall@{k}={np.mean(recalls):.3f} "
+            f"p50={np.percentile(latencies, 50):7.2f}ms p99={np.percentile(latencies, 99):7.2f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dims", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.dims, args.queries, args.k, args.seed)
+
+
+if __name__ == "__main__":
+    main()
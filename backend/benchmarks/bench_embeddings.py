@@ -0,0 +1,149 @@
+"""
+Benchmark the skill embedding backends.
+
+Builds a skill corpus from surface variants of known skills ("React",
+"React.js", "ReactJS", ...) enriched the way the index enriches submissions,
+then reports for each backend:
+
+    encode      texts/sec for a cold batched encode of the corpus
+    cached      texts/sec for the same texts served from the embedding cache
+    query       p50/p99 ms to encode one query and score it against the index
+    quality     precision@k and MRR of retrieving the query's own skill
+
+The local backend is included when --model-path points at a model file.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embeddings --rows 20000 --k 5 --model-path models/skills.npz
+"""
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+
+# Settings are read at import time; the benchmark does not talk to OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from services.ann_index import top_k  # noqa: E402
+from services.embedding_backends import TfidfBackend, HashingBackend, LocalModelBackend  # noqa: E402
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+
+SKILL_VARIANTS = [
+    ["Python", "Python 3", "Python programming"],
+    ["JavaScript", "Javascript ES6", "JS"],
+    ["TypeScript", "Typescript", "TS"],
+    ["React", "React.js", "ReactJS"],
+    ["Node.js", "NodeJS", "Node"],
+    ["Java", "Java SE", "Core Java"],
+    ["Spring Boot", "Spring", "Spring Framework"],
+    ["SQL", "SQL queries", "Structured Query Language"],
+    ["PostgreSQL", "Postgres", "PostgreSQL database"],
+    ["MySQL", "MySQL database", "MariaDB"],
+    ["Docker", "Docker containers", "Containerization"],
+    ["Kubernetes", "K8s", "Kubernetes orchestration"],
+    ["Amazon Web Services", "AWS", "AWS cloud"],
+    ["Microsoft Azure", "Azure", "Azure cloud"],
+    ["Machine Learning", "ML", "Machine learning models"],
+    ["Deep Learning", "Neural networks", "Deep neural networks"],
+    ["Data Analysis", "Data analytics", "Analyzing data"],
+    ["Project Management", "Managing projects", "PMP"],
+    ["Agile", "Scrum", "Agile methodologies"],
+    ["Communication", "Communication skills", "Verbal communication"],
+    ["Leadership", "Team leadership", "Leading teams"],
+    ["Git", "Version control", "GitHub"],
+    ["CI/CD", "Continuous integration", "Continuous delivery"],
+    ["Testing", "Unit testing", "Test automation"],
+    ["HTML", "HTML5", "HTML markup"],
+    ["CSS", "CSS3", "Cascading Style Sheets"],
+    ["C#", ".NET", "C# .NET"],
+    ["Go", "Golang", "Go programming"],
+    ["Linux", "Linux administration", "Unix"],
+    ["Excel", "Microsoft Excel", "Spreadsheets"]
+]
+PROFICIENCIES = ["beginner", "intermediate", "advanced", "expert"]
+
+
+def skill_corpus(rows: int, rng: np.random.Generator):
+    """Enriched skill texts and the skill family of each row"""
+    families = rng.integers(0, len(SKILL_VARIANTS), size=rows)
+    texts = []
+    for family in families:
+        variant = SKILL_VARIANTS[family][rng.integers(0, len(SKILL_VARIANTS[family]))]
+        proficiency = PROFICIENCIES[rng.integers(0, len(PROFICIENCIES))]
+        experience = float(rng.integers(0, 21)) / 2
+        # Same enrichment as VectorService.create_skill_embedding
+        texts.append(f"{variant} {proficiency} {experience}years")
+    return texts, families
+
+
+def run(name: str, backend, texts, families, n_queries: int, k: int, rng: np.random.Generator):
+    backend.fit(texts)
+
+    started = time.perf_counter()
+    vectors = backend.encode(texts)
+    encode_seconds = time.perf_counter() - started
+
+    # Cached path: distinct texts read back from a fresh cache file
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(os.path.join(tmp, "cache.sqlite3"), settings.VECTOR_EMBEDDING_CACHE_SIZE)
+        unique_texts = list(dict.fromkeys(texts))
+        cache.put_many(backend.fingerprint(), unique_texts, backend.encode(unique_texts))
+        cache.memory.clear()
+        started = time.perf_counter()
+        cache.get_many(backend.fingerprint(), unique_texts)
+        cached_seconds = time.perf_counter() - started
+        cache.db.close()
+
+    latencies = []
+    precisions = []
+    reciprocal_ranks = []
+    for _ in range(n_queries):
+        family = rng.integers(0, len(SKILL_VARIANTS))
+        query = SKILL_VARIANTS[family][rng.integers(0, len(SKILL_VARIANTS[family]))]
+
+        started = time.perf_counter()
+        scores = (vectors @ backend.encode([query]).T).toarray().ravel()
+        rows = top_k(scores, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        hits = families[rows] == family
+        precisions.append(hits.mean() if len(rows) else 0.0)
+        first_hit = np.flatnonzero(hits)
+        reciprocal_ranks.append(1.0 / (first_hit[0] + 1) if first_hit.size else 0.0)
+
+    print(
+        f"{name:<8} dims={backend.dims:<5} "
+        f"encode={len(texts) / encode_seconds:10.0f} texts/s "
+        f"cached={len(unique_texts) / cached_seconds:10.0f} texts/s "
+        f"query p50={np.percentile(latencies, 50):6.2f}ms p99={np.percentile(latencies, 99):6.2f}ms "
+        f"P@{k}={np.mean(precisions):.3f} MRR={np.mean(reciprocal_ranks):.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--model-path", default=settings.VECTOR_EMBEDDING_MODEL_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    texts, families = skill_corpus(args.rows, rng)
+    batch_size = settings.VECTOR_EMBEDDING_BATCH_SIZE
+
+    backends = [
+        ("tfidf", TfidfBackend(max_features=300, ngram_range=(1, 2), batch_size=batch_size)),
+        ("hashing", HashingBackend(settings.VECTOR_EMBEDDING_HASH_FEATURES, (1, 2), batch_size))
+    ]
+    if args.model_path:
+        backends.append(("local", LocalModelBackend(args.model_path, batch_size)))
+
+    for name, backend in backends:
+        run(name, backend, texts, families, args.queries, args.k, np.random.default_rng(args.seed + 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark the LLM-backed OpenAIService operations offline.
+
+Drives quiz generation, skill gap analysis, learning roadmaps (plain and
+streamed) and career progression through the real OpenAIService (rate
+limiter, retries, circuit breaker, single flight) against the bundled
+OpenAI stub, and reports for each operation:
+
+    throughput  calls/sec at the given concurrency
+    latency     p50/p95/p99 ms per call (first streamed item for roadmap_stream)
+    failures    calls that raised, and the guard's retries and rejections
+
+The stub runs in-process unless --base-url points at a running one
+(python -m benchmarks.openai_stub); stub options such as --latency-ms and
+--rate-limit-rate apply to the in-process stub. Each call uses distinct
+inputs and the response cache is off unless --cache is given.
+
+Usage (from backend/):
+    python -m benchmarks.bench_llm --calls 500 --concurrency 50 --latency-ms 800 --latency-dist lognormal
+"""
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+
+# Settings are read at import time; never talk to the real API
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite3"))
+
+import httpx  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+from services.openai_service import openai_service  # noqa: E402
+from services.llm_guard import LLMGuard  # noqa: E402
+from benchmarks.openai_stub import create_app, add_stub_arguments, stub_config  # noqa: E402
+
+SKILLS = ["Python", "JavaScript", "React", "Node.js", "SQL", "Docker", "Kubernetes", "AWS", "Java", "Go"]
+
+
+def operations():
+    """name -> factory of the coroutine for call i"""
+    def skill(i):
+        return f"{SKILLS[i % len(SKILLS)]} {i}"
+
+    def quiz(i):
+        return openai_service.generate_quiz_questions(skill(i), "Software Engineer", 2, "intermediate", num_questions=5)
+
+    def gap(i):
+        employee = [{"skill_name": skill(i), "proficiency_level": "beginner", "years_of_experience": 1.0}]
+        return openai_service.analyze_skill_gap(employee, SKILLS[:5], "Software Engineer", 3, fallback=False)
+
+    def roadmap(i):
+        return openai_service.generate_learning_roadmap(skill(i), "beginner", "advanced", 60, "Software Engineer")
+
+    async def roadmap_stream(i):
+        # Latency of the first streamed item; the stream is still consumed to the end
+        first = None
+        async for _ in openai_service.stream_learning_roadmap(skill(i), "beginner", "advanced", 60, "Software Engineer"):
+            if first is None:
+                first = time.perf_counter()
+        return first
+
+    def career(i):
+        return openai_service.suggest_career_progression("Software Engineer", [skill(i)], 3, ["Senior Software Engineer"])
+
+    return {
+        "quiz": quiz,
+        "skill_gap": gap,
+        "roadmap": roadmap,
+        "roadmap_stream": roadmap_stream,
+        "career": career
+    }
+
+
+async def run(name: str, factory, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+    retries_before = openai_service.guard.retries
+    rejected_before = openai_service.guard.rejected
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await factory(i)
+            except Exception:
+                failures += 1
+                return
+            finished = result if name == "roadmap_stream" and result else time.perf_counter()
+            latencies.append((finished - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    else:
+        p50 = p95 = p99 = float("nan")
+    print(
+        f"{name:<15} {calls / elapsed:8.1f} calls/s "
+        f"p50={p50:8.1f}ms p95={p95:8.1f}ms p99={p99:8.1f}ms "
+        f"failed={failures} retries={openai_service.guard.retries - retries_before} "
+        f"rejected={openai_service.guard.rejected - rejected_before}"
+    )
+
+
+async def main_async(args: argparse.Namespace):
+    if args.base_url:
+        http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=args.concurrency))
+        base_url = args.base_url
+    else:
+        http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(stub_config(args))))
+        base_url = "http://stub/v1"
+    openai_service.client = AsyncOpenAI(api_key="benchmark", base_url=base_url, http_client=http_client, max_retries=0)
+    if args.rpm_limit or args.tpm_limit:
+        openai_service.guard = LLMGuard(
+            requests_per_minute=args.rpm_limit or 10 ** 9,
+            tokens_per_minute=args.tpm_limit or 10 ** 12,
+            max_retries=openai_service.guard.max_retries,
+            deadline_seconds=openai_service.guard.deadline_seconds,
+            backoff_base_seconds=openai_service.guard.backoff_base_seconds,
+            backoff_max_seconds=openai_service.guard.backoff_max_seconds,
+            breaker_failure_threshold=openai_service.guard.breaker.failure_threshold,
+            breaker_reset_seconds=openai_service.guard.breaker.reset_seconds
+        )
+    if not args.cache:
+        openai_service.cache_ttls = {operation: 0 for operation in openai_service.cache_ttls}
+
+    available = operations()
+    for name in args.operations or list(available):
+        await run(name, available[name], args.calls, args.concurrency)
+    print(f"guard: {openai_service.guard.stats()}")
+    await http_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--operations", nargs="+", choices=list(operations()))
+    parser.add_argument("--base-url", default="")
+    parser.add_argument("--cache", action="store_true")
+    # Override the configured client-side quota (0 keeps the settings)
+    parser.add_argument("--rpm-limit", type=int, default=0)
+    parser.add_argument("--tpm-limit", type=int, default=0)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Deterministic OpenAI-compatible chat completions server for offline load tests.
+
+Answers POST /v1/chat/completions (streamed or not) with schema-valid JSON
+for each prompt OpenAIService sends: quiz questions, skill gap analysis,
+learning roadmap and career progression. Content is derived from a hash of
+the request and the values parsed out of the prompt, so the same request
+always gets the same answer. Latency, server errors and throttling are
+injected from a seeded generator, so a run is reproducible too.
+
+    latency     --latency-dist fixed|uniform|normal|lognormal around
+                --latency-ms (spread: --latency-spread, a fraction of the
+                mean, or sigma for lognormal); streamed responses send
+                --stream-chunk-chars characters every --chunk-delay-ms
+    errors      --error-rate of requests fail with a 500
+    throttling  --rate-limit-rate of requests get a 429 with Retry-After;
+                --rpm additionally enforces a requests/minute quota
+
+Usage (from backend/):
+    python -m benchmarks.openai_stub --port 8100 --latency-ms 800 --latency-dist lognormal --rate-limit-rate 0.02
+    OPENAI_BASE_URL=http://localhost:8100/v1 uvicorn app:app
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0
+    latency_dist: str = "fixed"
+    latency_spread: float = 0.25
+    error_rate: float = 0
+    rate_limit_rate: float = 0
+    retry_after_seconds: float = 1
+    rpm: int = 0
+    stream_chunk_chars: int = 24
+    chunk_delay_ms: float = 5
+    seed: int = 0
+
+
+COURSE_PLATFORMS = ["YouTube", "Udemy", "Coursera", "Pluralsight", "edX"]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+
+def _split_list(text: str) -> List[str]:
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def _match(pattern: str, text: str, default: str = "") -> str:
+    found = re.search(pattern, text, re.S)
+    return found.group(1).strip() if found else default
+
+
+def quiz_questions(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    count = int(_match(r"Generate (\d+) multiple-choice", prompt, "5"))
+    skill = _match(r"assess (.+?) skills for", prompt, "the skill")
+    job_title = _match(r"skills for a (.+?) position", prompt, "developer")
+    questions = []
+    for i in range(count):
+        answer = rng.choice("ABCD")
+        questions.append({
+            "question_text": f"Question {i + 1}: which practice best applies {skill} in a typical {job_title} task?",
+            "options": {letter: f"{skill} option {letter}{i + 1}" for letter in "ABCD"},
+            "correct_answer": answer,
+            "explanation": f"Option {answer} follows established {skill} practice."
+        })
+    return {"questions": questions}
+
+
+def skill_gap(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    employee = _match(r"Employee's Current Skills:\n(.*?)\n\n", prompt)
+    required = _split_list(_match(r"Required Skills for .+?:\n(.*?)\n\n", prompt))
+    # "React (intermediate, 2.0y), Python (beginner, 1.0y)"
+    levels = {
+        name.strip().lower(): level
+        for name, level in re.findall(r"([^,(]+)\((\w+),", employee)
+    }
+    missing = [s for s in required if s.lower() not in levels]
+    to_improve = [s for s in required if levels.get(s.lower()) == "beginner"]
+    gap = round(100 * len(missing) / len(required), 1) if required else 0
+    return {
+        "missing_skills": missing,
+        "skills_to_improve": to_improve,
+        "gap_percentage": gap,
+        "priority_areas": (missing + to_improve)[:3],
+        "estimated_time_to_bridge": 4 * len(missing) + 2 * len(to_improve) + rng.randint(0, 3)
+    }
+
+
+def learning_roadmap(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    skill = _match(r"improving (.+?) skills", prompt, "the skill")
+    target = _match(r"Target Level: (\w+)", prompt, "advanced")
+    weeks = rng.randint(6, 16)
+    return {
+        "milestones": [
+            {"week": w, "goal": f"{skill}: milestone {i + 1} towards {target}"}
+            for i, w in enumerate(range(2, weeks + 1, max(weeks // 4, 1)))
+        ],
+        "course_recommendations": [
+            {
+                "platform": rng.choice(COURSE_PLATFORMS),
+                "title": f"{skill} course {i + 1}",
+                "url": f"https://example.com/courses/{hashlib.md5(f'{skill}{i}'.encode()).hexdigest()[:10]}",
+                "duration": rng.randint(4, 40),
+                "difficulty": DIFFICULTIES[min(i, 2)]
+            }
+            for i in range(3)
+        ],
+        "practice_tasks": [
+            {"title": f"{skill} project {i + 1}", "description": f"Build a small project using {skill}"}
+            for i in range(3)
+        ],
+        "estimated_completion_weeks": weeks,
+        "daily_time_commitment": rng.choice([1, 1.5, 2])
+    }
+
+
+def career_progression(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    roles = _split_list(_match(r"Available Next Level Roles:\n(.*?)\n\n", prompt))
+    skills = _split_list(_match(r"Current Skills: (.*?)\n", prompt))
+    readiness = rng.randint(30, 90)
+    return {
+        "recommended_role": roles[0] if roles else "",
+        "readiness_percentage": readiness,
+        "reasons": [f"Experience with {s}" for s in skills[:3]],
+        "skills_needed": ["System design", "Mentoring"][: rng.randint(1, 2)],
+        "timeline": max(1, (100 - readiness) // 10)
+    }
+
+
+# (marker in the user prompt, generator), checked in order
+PROMPT_TYPES = [
+    ("multiple-choice quiz questions", quiz_questions),
+    ("Analyze the skill gap", skill_gap),
+    ("learning roadmap", learning_roadmap),
+    ("career progression", career_progression)
+]
+
+
+def completion_content(messages: List[Dict[str, Any]], request_hash: str) -> str:
+    """The JSON answer for a request, deterministic in its messages"""
+    prompt = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "user")
+    rng = random.Random(request_hash)
+    for marker, generate in PROMPT_TYPES:
+        if marker in prompt:
+            return json.dumps(generate(prompt, rng))
+    return json.dumps({"result": "ok"})
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="OpenAI stub")
+    faults = random.Random(config.seed)
+    latency = random.Random(config.seed + 1)
+    recent = deque()
+    stats = {"requests": 0, "errors": 0, "throttled": 0}
+
+    def delay_seconds() -> float:
+        mean = config.latency_ms / 1000
+        if config.latency_dist == "uniform":
+            value = latency.uniform(mean * (1 - config.latency_spread), mean * (1 + config.latency_spread))
+        elif config.latency_dist == "normal":
+            value = latency.gauss(mean, mean * config.latency_spread)
+        elif config.latency_dist == "lognormal":
+            # Median at the configured latency, long right tail
+            value = mean * latency.lognormvariate(0, config.latency_spread) if mean else 0
+        else:
+            value = mean
+        return max(value, 0)
+
+    def error(status: int, message: str, error_type: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "type": error_type, "code": None}},
+            headers=headers
+        )
+
+    def over_quota() -> bool:
+        if not config.rpm:
+            return False
+        now = time.monotonic()
+        while recent and recent[0] <= now - 60:
+            recent.popleft()
+        if len(recent) >= config.rpm:
+            return True
+        recent.append(now)
+        return False
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        if over_quota() or faults.random() < config.rate_limit_rate:
+            stats["throttled"] += 1
+            return error(
+                429, "Rate limit reached for requests", "requests",
+                headers={"retry-after": str(config.retry_after_seconds)}
+            )
+        if faults.random() < config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(delay_seconds())
+            return error(500, "The server had an error while processing your request", "server_error")
+
+        messages = body.get("messages", [])
+        request_hash = hashlib.sha256(
+            json.dumps({"model": body.get("model"), "messages": messages}, sort_keys=True).encode()
+        ).hexdigest()
+        content = completion_content(messages, request_hash)
+        completion_id = f"chatcmpl-{request_hash[:24]}"
+        model = body.get("model", "gpt-4")
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion_tokens = len(content) // 4
+
+        await asyncio.sleep(delay_seconds())
+
+        if body.get("stream"):
+            async def chunks():
+                def event(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                    }
+                    return f"data: {json.dumps(chunk)}\n\n"
+
+                yield event({"role": "assistant", "content": ""})
+                for start in range(0, len(content), config.stream_chunk_chars):
+                    yield event({"content": content[start:start + config.stream_chunk_chars]})
+                    await asyncio.sleep(config.chunk_delay_ms / 1000)
+                yield event({}, "stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    yield "data: " + json.dumps({
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": model,
+                        "choices": [],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens
+                        }
+                    }) + "\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        """Requests served and faults injected so far"""
+        return stats
+
+    return app
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    defaults = StubConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal"], default=defaults.latency_dist)
+    parser.add_argument("--latency-spread", type=float, default=defaults.latency_spread)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--retry-after-seconds", type=float, default=defaults.retry_after_seconds)
+    parser.add_argument("--rpm", type=int, default=defaults.rpm)
+    parser.add_argument("--stream-chunk-chars", type=int, default=defaults.stream_chunk_chars)
+    parser.add_argument("--chunk-delay-ms", type=float, default=defaults.chunk_delay_ms)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def stub_config(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_spread=args.latency_spread,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after_seconds,
+        rpm=args.rpm,
+        stream_chunk_chars=args.stream_chunk_chars,
+        chunk_delay_ms=args.chunk_delay_ms,
+        seed=args.seed
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(stub_config(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
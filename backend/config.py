@@ -18,9 +18,68 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OPENAI_MAX_CONNECTIONS: int = 200
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    OPENAI_TIMEOUT_SECONDS: float = 120
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5
+    # Client-side protection: quota per worker, retries within a deadline, circuit breaker
+    OPENAI_RATE_LIMIT_RPM: int = 500
+    OPENAI_RATE_LIMIT_TPM: int = 80000
+    OPENAI_COMPLETION_TOKENS_ESTIMATE: int = 1000
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_DEADLINE_SECONDS: float = 60
+    OPENAI_BACKOFF_BASE_SECONDS: float = 0.5
+    OPENAI_BACKOFF_MAX_SECONDS: float = 8
+    OPENAI_BREAKER_FAILURE_THRESHOLD: int = 5
+    OPENAI_BREAKER_RESET_SECONDS: float = 30
+    OPENAI_CACHE_PATH: str = "./vector_store/llm_cache.sqlite3"
+    OPENAI_CACHE_MEMORY_SIZE: int = 1000
+    OPENAI_CACHE_MAX_ENTRIES: int = 100000
+    OPENAI_CACHE_EVICT_EVERY_PUTS: int = 100
+    OPENAI_CACHE_EVICT_INTERVAL_SECONDS: int = 60
+    # Per-operation response TTLs; 0 disables caching for the operation
+    OPENAI_CACHE_TTL_QUIZ_SECONDS: int = 0
+    OPENAI_CACHE_TTL_SKILL_GAP_SECONDS: int = 86400
+    OPENAI_CACHE_TTL_ROADMAP_SECONDS: int = 604800
+    OPENAI_CACHE_TTL_CAREER_SECONDS: int = 86400
+    # Per-call usage accounting
+    OPENAI_USAGE_PATH: str = "./vector_store/llm_usage.sqlite3"
+    OPENAI_USAGE_RETENTION_DAYS: int = 90
+    # Approximate token budget for prompts built from variable-length lists
+    # (employee skills); longer lists are cut to the most relevant. 0 = no limit
+    OPENAI_PROMPT_BUDGET_TOKENS: int = 0
+    
+    # Bulk quiz generation
+    QUIZ_BULK_CONCURRENCY: int = 4
+    QUIZ_BULK_INSERT_BATCH_SIZE: int = 50
+    
+    # Roadmap templates
+    ROADMAP_TEMPLATE_WARM_ON_STARTUP: bool = False
+    ROADMAP_TEMPLATE_WARM_CONCURRENCY: int = 4
+    REPORT_EXPORT_GAP_CONCURRENCY: int = 4  # gap analyses computed at once by an export with gap_analysis=compute
     
     # Vector DB
     VECTOR_DB_PATH: str = "./vector_store"
+    VECTOR_REFIT_INTERVAL_SECONDS: int = 300
+    VECTOR_COMPACT_DEAD_RATIO: float = 0.3
+    VECTOR_FOLD_APPENDED_ROWS: int = 5000  # appended rows folded into a new snapshot by the refit loop
+    VECTOR_FOLD_APPENDED_BLOCKS: int = 64
+    VECTOR_ANN_BACKEND: str = "exact"  # exact, lsh or ivf
+    VECTOR_ANN_MIN_ROWS: int = 20000
+    VECTOR_ANN_LSH_TABLES: int = 16
+    VECTOR_ANN_LSH_BITS: int = 10
+    VECTOR_ANN_IVF_LISTS: int = 0  # 0 = sqrt(rows)
+    VECTOR_ANN_IVF_PROBES: int = 8
+    VECTOR_EMBEDDING_BACKEND: str = "tfidf"  # tfidf, hashing or local
+    VECTOR_EMBEDDING_MODEL_PATH: str = ""  # .npz with "vocab" and "embeddings" for the local backend
+    VECTOR_EMBEDDING_HASH_FEATURES: int = 4096
+    VECTOR_EMBEDDING_BATCH_SIZE: int = 1024
+    VECTOR_EMBEDDING_CACHE_SIZE: int = 50000
+    VECTOR_EMBEDDING_CACHE_MAX_ENTRIES: int = 500000  # rows kept in the on-disk embedding cache
+    VECTOR_REQUIREMENT_CACHE_SIZE: int = 1000  # job descriptions' required-skill vectors kept per worker
+    VECTOR_INDEX_QUEUE_SIZE: int = 1000
+    VECTOR_INDEX_COALESCE_MS: int = 200
     
     # App
     APP_HOST: str = "0.0.0.0"
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from models.user import User, UserRole
 from database.connection import get_db
 from config import settings
+from services.usage_tracker import set_usage_user
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -101,6 +102,7 @@ async def get_current_user(
             )
         
         print(f"[AUTH SUCCESS] User {user.email} authenticated")
+        set_usage_user(user)
         return user
     except Exception as e:
         print(f"[AUTH ERROR] Exception: {type(e).__name__}: {str(e)}")
@@ -1,8 +1,10 @@
 from models.user import User, UserRole
 from models.job import JobTitle, JobDescription
 from models.skill import EmployeeSkill, ProficiencyLevel
-from models.quiz import QuizQuestion, AssessmentResult
-from models.roadmap import LearningRoadmap, RoadmapStatus
+from models.quiz import QuizQuestion, AssessmentResult, QuizGenerationJob, QuizJobStatus
+from models.roadmap import LearningRoadmap, RoadmapStatus, RoadmapTemplate
+from models.gap_analysis import GapAnalysisResult
+from models.employee_summary import EmployeeSummary
 
 __all__ = [
     "User",
@@ -13,7 +15,12 @@ __all__ = [
     "ProficiencyLevel",
     "QuizQuestion",
     "AssessmentResult",
+    "QuizGenerationJob",
+    "QuizJobStatus",
     "LearningRoadmap",
-    "RoadmapStatus"
+    "RoadmapStatus",
+    "RoadmapTemplate",
+    "GapAnalysisResult",
+    "EmployeeSummary"
 ]
 
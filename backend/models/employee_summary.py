@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from database.connection import Base
+
+
+class EmployeeSummary(Base):
+    """Dashboard totals per employee, kept up to date by the writes that change them"""
+    __tablename__ = "employee_summary"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_skills = Column(Integer, nullable=False, default=0)
+    total_assessments = Column(Integer, nullable=False, default=0)
+    total_points = Column(Integer, nullable=False, default=0)
+    active_roadmaps = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, JSON, Boolean, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+from database.connection import Base
+
+
+class GapAnalysisResult(Base):
+    __tablename__ = "gap_analysis_results"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
+    job_title_id = Column(Integer, ForeignKey("job_titles.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_description_id = Column(Integer, ForeignKey("job_descriptions.id", ondelete="CASCADE"), nullable=False, index=True)
+    fingerprint = Column(String(64), nullable=False)
+    result = Column(JSON, nullable=False)
+    is_stale = Column(Boolean, default=False, nullable=False)
+    computed_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -3,6 +3,15 @@ from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database.connection import Base
 from models.skill import ProficiencyLevel
+import enum
+
+
+class QuizJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    COMPLETED_WITH_ERRORS = "completed_with_errors"
+    FAILED = "failed"
 
 
 class QuizQuestion(Base):
@@ -45,3 +54,23 @@ class AssessmentResult(Base):
     user = relationship("User", back_populates="assessment_results")
     quiz_question = relationship("QuizQuestion", back_populates="assessment_results")
 
+
+class QuizGenerationJob(Base):
+    __tablename__ = "quiz_generation_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_title_id = Column(Integer, ForeignKey("job_titles.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_description_id = Column(Integer, ForeignKey("job_descriptions.id", ondelete="SET NULL"))
+    status = Column(Enum(QuizJobStatus), nullable=False, default=QuizJobStatus.PENDING)
+    difficulty_levels = Column(JSON, nullable=False)
+    num_questions = Column(Integer, nullable=False)
+    total_tasks = Column(Integer, nullable=False, default=0)
+    completed_tasks = Column(Integer, nullable=False, default=0)
+    failed_tasks = Column(Integer, nullable=False, default=0)
+    questions_created = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum, JSON, DECIMAL, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, JSON, DECIMAL, TIMESTAMP, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database.connection import Base
@@ -27,6 +27,7 @@ class LearningRoadmap(Base):
     course_recommendations = Column(JSON)
     practice_tasks = Column(JSON)
     estimated_completion_weeks = Column(Integer)
+    template_id = Column(Integer, ForeignKey("roadmap_templates.id", ondelete="SET NULL"), nullable=True)
     status = Column(Enum(RoadmapStatus), default=RoadmapStatus.NOT_STARTED)
     progress_percentage = Column(DECIMAL(5, 2), default=0)
     started_at = Column(TIMESTAMP, nullable=True)
@@ -38,3 +39,24 @@ class LearningRoadmap(Base):
     user = relationship("User", back_populates="roadmaps")
     job_title = relationship("JobTitle", back_populates="roadmaps")
 
+
+class RoadmapTemplate(Base):
+    """Generated roadmap shared by every employee making the same level transition"""
+    __tablename__ = "roadmap_templates"
+    __table_args__ = (
+        UniqueConstraint("job_title_id", "skill_key", "current_level", "target_level", name="unique_transition"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_title_id = Column(Integer, ForeignKey("job_titles.id", ondelete="CASCADE"), nullable=False)
+    skill_name = Column(String(255), nullable=False)
+    skill_key = Column(String(255), nullable=False)
+    current_level = Column(Enum(ProficiencyLevel), nullable=False)
+    target_level = Column(Enum(ProficiencyLevel), nullable=False)
+    milestones = Column(JSON, nullable=False)
+    course_recommendations = Column(JSON)
+    practice_tasks = Column(JSON)
+    estimated_completion_weeks = Column(Integer)
+    daily_time_commitment = Column(DECIMAL(4, 1))
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from routers import auth, job, assessment, quiz, roadmap, reports
+from routers import auth, job, assessment, quiz, roadmap, reports, system
 
-__all__ = ["auth", "job", "assessment", "quiz", "roadmap", "reports"]
+__all__ = ["auth", "job", "assessment", "quiz", "roadmap", "reports", "system"]
 
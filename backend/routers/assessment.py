@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from database.connection import get_db
@@ -10,7 +11,7 @@ from schemas import (
     SkillsSubmitRequest, EmployeeSkillResponse,
     GapAnalysisResponse
 )
-from services import openai_service, vector_service
+from services import index_queue, gap_analysis_service, employee_summary_service
 
 router = APIRouter(prefix="/assessment", tags=["Assessment"])
 
@@ -27,23 +28,16 @@ def submit_skills(
     # Delete existing skills for this user
     db.query(EmployeeSkill).filter(EmployeeSkill.user_id == current_user.id).delete()
     
-    # Add new skills
-    new_skills = []
-    for skill_data in request.skills:
-        skill = EmployeeSkill(
-            user_id=current_user.id,
-            **skill_data.dict()
-        )
-        db.add(skill)
-        new_skills.append(skill)
-    
-    db.commit()
-    
-    # Refresh all skills
-    for skill in new_skills:
-        db.refresh(skill)
+    # Add new skills; flushing assigns ids without reloading each row
+    new_skills = [
+        EmployeeSkill(user_id=current_user.id, **skill_data.dict())
+        for skill_data in request.skills
+    ]
+    db.add_all(new_skills)
+    db.flush()
     
-    # Add to vector database
+    # Build the response and index payload before commit expires the rows
+    response = [EmployeeSkillResponse.model_validate(s) for s in new_skills]
     skills_for_vector = [
         {
             "skill_name": s.skill_name,
@@ -56,9 +50,17 @@ def submit_skills(
         }
         for s in new_skills
     ]
-    vector_service.add_skills_to_index(skills_for_vector)
     
-    return new_skills
+    # The stored gap analysis no longer matches the skills
+    gap_analysis_service.invalidate_users(db, [current_user.id])
+    employee_summary_service.set_skill_count(db, current_user.id, len(new_skills))
+    
+    db.commit()
+    
+    # Re-index in the background; the response does not wait for vectorization
+    index_queue.submit(current_user.id, skills_for_vector)
+    
+    return response
 
 
 @router.get("/my-skills", response_model=List[EmployeeSkillResponse])
@@ -74,7 +76,7 @@ def get_my_skills(
 
 
 @router.get("/gap-analysis", response_model=GapAnalysisResponse)
-def get_gap_analysis(
+async def get_gap_analysis(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_employee)
 ):
@@ -85,56 +87,20 @@ def get_gap_analysis(
     if not current_user.job_title_id:
         raise HTTPException(status_code=400, detail="No job title assigned to user")
     
-    # Get job description for user's job title
-    jd = db.query(JobDescription).filter(
-        JobDescription.job_title_id == current_user.job_title_id
-    ).first()
-    
-    if not jd:
-        raise HTTPException(status_code=404, detail="Job description not found for your job title")
-    
-    # Get employee's skills
-    employee_skills = db.query(EmployeeSkill).filter(
-        EmployeeSkill.user_id == current_user.id
-    ).all()
-    
-    if not employee_skills:
-        raise HTTPException(status_code=400, detail="Please submit your skills first")
+    # Stored result unless the skills, job description or job title changed
+    gap_analysis = await gap_analysis_service.get_gap_analysis(db, current_user)
+    if gap_analysis is not None:
+        return gap_analysis
     
-    # Prepare data for analysis
-    employee_skills_data = [
-        {
-            "skill_name": s.skill_name,
-            "proficiency_level": s.proficiency_level.value,
-            "years_of_experience": float(s.years_of_experience)
-        }
-        for s in employee_skills
-    ]
-    
-    required_skills = jd.required_skills
-    
-    # Vector-based comparison
-    vector_comparison = vector_service.compare_skill_sets(
-        employee_skills_data,
-        required_skills
+    # Nothing to analyze: report what is missing
+    jd = await run_in_threadpool(
+        lambda: db.query(JobDescription).filter(
+            JobDescription.job_title_id == current_user.job_title_id
+        ).first()
     )
     
-    # AI-based gap analysis
-    ai_analysis = openai_service.analyze_skill_gap(
-        employee_skills_data,
-        required_skills,
-        current_user.job_title.title,
-        float(jd.required_years_of_experience)
-    )
+    if not jd:
+        raise HTTPException(status_code=404, detail="Job description not found for your job title")
     
-    # Combine results
-    return {
-        "missing_skills": ai_analysis.get("missing_skills", vector_comparison["missing_skills"]),
-        "matched_skills": vector_comparison["matched_skills"],
-        "skills_to_improve": ai_analysis.get("skills_to_improve", []),
-        "gap_percentage": ai_analysis.get("gap_percentage", vector_comparison["gap_percentage"]),
-        "priority_areas": ai_analysis.get("priority_areas", []),
-        "estimated_time_to_bridge": ai_analysis.get("estimated_time_to_bridge", 0),
-        "similarity_scores": vector_comparison["similarity_scores"]
-    }
+    raise HTTPException(status_code=400, detail="Please submit your skills first")
 
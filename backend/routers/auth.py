@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database.connection import get_db
 from middleware import authenticate_user, create_access_token, get_password_hash
-from models.user import User
+from models.user import User, UserRole
 from schemas import LoginRequest, RegisterRequest, TokenResponse
+from services import employee_summary_service
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -61,6 +62,9 @@ def register(request: RegisterRequest, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
+    db.flush()
+    if new_user.role == UserRole.EMPLOYEE:
+        employee_summary_service.add_employee(db, new_user.id)
     db.commit()
     db.refresh(new_user)
     
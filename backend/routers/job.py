@@ -9,6 +9,7 @@ from schemas import (
     JobTitleCreate, JobTitleUpdate, JobTitleResponse,
     JobDescriptionCreate, JobDescriptionUpdate, JobDescriptionResponse
 )
+from services import vector_service, gap_analysis_service, career_graph_service
 
 router = APIRouter(prefix="/job", tags=["Job Management"])
 
@@ -39,6 +40,7 @@ def create_job_title(
     db.add(job_title)
     db.commit()
     db.refresh(job_title)
+    career_graph_service.invalidate()
     return job_title
 
 
@@ -59,8 +61,12 @@ def update_job_title(
     for key, value in request.dict(exclude_unset=True).items():
         setattr(job_title, key, value)
     
+    # The title is part of every stored gap analysis for it
+    gap_analysis_service.invalidate_job_title(db, job_title.id)
+    
     db.commit()
     db.refresh(job_title)
+    career_graph_service.invalidate()
     return job_title
 
 
@@ -97,8 +103,11 @@ def create_job_description(
     
     jd = JobDescription(**request.dict())
     db.add(jd)
+    gap_analysis_service.invalidate_job_title(db, jd.job_title_id)
     db.commit()
     db.refresh(jd)
+    # Career paths accumulate the required skills of job descriptions
+    career_graph_service.invalidate()
     return jd
 
 
@@ -116,11 +125,25 @@ def update_job_description(
     if not jd:
         raise HTTPException(status_code=404, detail="Job description not found")
     
-    for key, value in request.dict(exclude_unset=True).items():
+    old_job_title_id = jd.job_title_id
+    updates = request.dict(exclude_unset=True)
+    for key, value in updates.items():
         setattr(jd, key, value)
     
+    # Stored gap analyses against this job description are out of date,
+    # under the job title it had and the one it moved to
+    gap_analysis_service.invalidate_job_title(db, old_job_title_id)
+    if jd.job_title_id != old_job_title_id:
+        gap_analysis_service.invalidate_job_title(db, jd.job_title_id)
+    
     db.commit()
     db.refresh(jd)
+    
+    # Cached requirement vectors are stale once the required skills change
+    if "required_skills" in updates:
+        vector_service.invalidate_job_description(jd.id)
+    career_graph_service.invalidate()
+    
     return jd
 
 
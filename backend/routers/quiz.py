@@ -1,47 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from database.connection import get_db
 from middleware import get_current_user, get_current_od_manager, get_current_employee
 from models.user import User
-from models.quiz import QuizQuestion, AssessmentResult
-from models.job import JobTitle
+from models.quiz import QuizQuestion, AssessmentResult, QuizGenerationJob
+from models.job import JobTitle, JobDescription
 from schemas import (
     QuizQuestionGenerate, QuizQuestionResponse,
-    QuizSubmitRequest, AssessmentResultResponse
+    QuizSubmitRequest, AssessmentResultResponse,
+    QuizBulkGenerateRequest, QuizGenerationJobResponse
 )
-from services import openai_service
+from services import openai_service, quiz_generation_service, employee_summary_service
 
 router = APIRouter(prefix="/quiz", tags=["Quiz & Assessment"])
 
 
-@router.post("/generate")
-def generate_quiz(
-    request: QuizQuestionGenerate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_od_manager)
-):
-    """
-    Generate quiz questions using OpenAI (OD Manager only)
-    """
-    # Get job title
-    job_title = db.query(JobTitle).filter(JobTitle.id == request.job_title_id).first()
+def _get_job_title(db: Session, job_title_id: int) -> JobTitle:
+    job_title = db.query(JobTitle).filter(JobTitle.id == job_title_id).first()
     if not job_title:
         raise HTTPException(status_code=404, detail="Job title not found")
-    
-    # Generate questions using OpenAI
-    generated_questions = openai_service.generate_quiz_questions(
-        skill_name=request.skill_name,
-        job_title=job_title.title,
-        experience_level_years=request.experience_level_years,
-        difficulty_level=request.difficulty_level.value,
-        num_questions=request.num_questions
-    )
-    
-    if not generated_questions:
-        raise HTTPException(status_code=500, detail="Failed to generate quiz questions")
-    
-    # Save questions to database
+    return job_title
+
+
+def _save_questions(
+    db: Session,
+    request: QuizQuestionGenerate,
+    generated_questions: List[dict],
+    created_by: int
+) -> List[QuizQuestion]:
     saved_questions = []
     for q in generated_questions:
         quiz_question = QuizQuestion(
@@ -53,7 +41,7 @@ def generate_quiz(
             difficulty_level=request.difficulty_level,
             experience_level_years=request.experience_level_years,
             explanation=q.get("explanation", ""),
-            created_by=current_user.id,
+            created_by=created_by,
             is_active=True
         )
         db.add(quiz_question)
@@ -65,6 +53,45 @@ def generate_quiz(
     for q in saved_questions:
         db.refresh(q)
     
+    return saved_questions
+
+
+def _bulk_inputs(db: Session, job_title_id: int):
+    """Job title and job description of a bulk generation"""
+    job_title = _get_job_title(db, job_title_id)
+    jd = db.query(JobDescription).filter(JobDescription.job_title_id == job_title.id).first()
+    if not jd:
+        raise HTTPException(status_code=404, detail="Job description not found")
+    return job_title, jd
+
+
+@router.post("/generate")
+async def generate_quiz(
+    request: QuizQuestionGenerate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Generate quiz questions using OpenAI (OD Manager only)
+    """
+    # Get job title (database work runs in the threadpool, off the event loop)
+    job_title = await run_in_threadpool(_get_job_title, db, request.job_title_id)
+    
+    # Generate questions using OpenAI
+    generated_questions = await openai_service.generate_quiz_questions(
+        skill_name=request.skill_name,
+        job_title=job_title.title,
+        experience_level_years=request.experience_level_years,
+        difficulty_level=request.difficulty_level.value,
+        num_questions=request.num_questions
+    )
+    
+    if not generated_questions:
+        raise HTTPException(status_code=500, detail="Failed to generate quiz questions")
+    
+    # Save questions to database
+    saved_questions = await run_in_threadpool(_save_questions, db, request, generated_questions, current_user.id)
+    
     return {
         "message": f"Successfully generated {len(saved_questions)} quiz questions",
         "questions": [
@@ -80,6 +107,52 @@ def generate_quiz(
     }
 
 
+@router.post("/generate-bulk", response_model=QuizGenerationJobResponse, status_code=202)
+async def generate_quiz_bulk(
+    request: QuizBulkGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Start generating questions for every required skill of a job title's
+    job description at each requested difficulty (OD Manager only).
+    Returns the job; poll /quiz/generate-bulk/{job_id} for progress.
+    """
+    job_title, jd = await run_in_threadpool(_bulk_inputs, db, request.job_title_id)
+    
+    if not jd.required_skills or not request.difficulty_levels:
+        raise HTTPException(status_code=400, detail="Nothing to generate")
+    
+    experience_level_years = request.experience_level_years
+    if experience_level_years is None:
+        experience_level_years = float(jd.required_years_of_experience)
+    
+    return await quiz_generation_service.start_job(
+        db,
+        job_title,
+        jd,
+        request.difficulty_levels,
+        request.num_questions,
+        experience_level_years,
+        current_user.id
+    )
+
+
+@router.get("/generate-bulk/{job_id}", response_model=QuizGenerationJobResponse)
+def get_quiz_generation_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Progress of a bulk quiz generation job (OD Manager only)
+    """
+    job = db.query(QuizGenerationJob).filter(QuizGenerationJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Quiz generation job not found")
+    return job
+
+
 @router.get("/questions", response_model=List[QuizQuestionResponse])
 def get_quiz_questions(
     job_title_id: int = None,
@@ -166,6 +239,7 @@ def submit_quiz(
         total_score += points_earned
         total_points += question.points
     
+    employee_summary_service.record_assessments(db, current_user.id, len(results), total_score)
     db.commit()
     
     # Calculate percentage
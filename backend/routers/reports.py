@@ -1,78 +1,251 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+import json
+import base64
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, or_, and_
+from typing import List, Literal, Optional
 from database.connection import get_db
 from middleware import get_current_od_manager
 from models.user import User, UserRole
 from models.skill import EmployeeSkill
 from models.roadmap import LearningRoadmap
-from models.quiz import AssessmentResult
+from models.employee_summary import EmployeeSummary
 from models.job import JobDescription, JobTitle
-from schemas import EmployeeReportResponse, CareerProgressionResponse
-from services import openai_service
+from schemas import EmployeeReportResponse, CareerProgressionResponse, CareerPathResponse
+from services import (
+    openai_service, vector_service, gap_analysis_service,
+    employee_summary_service, skill_heatmap_service, report_export_service,
+    career_graph_service
+)
+from services.skill_heatmap_service import DIMENSIONS
+from services.report_export_service import EXPORT_FORMATS, GAP_ANALYSIS_MODES
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
+# Sort keys of the employee list
+EMPLOYEE_SORTS = ("name", "id", "job_title", "years_of_experience", "total_skills",
+                  "total_assessments", "average_score", "active_roadmaps")
+
+
+def _encode_cursor(value, employee_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, employee_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        value, employee_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(employee_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/employees", response_model=List[dict])
 def list_employees(
+    response: Response,
+    job_title_id: Optional[int] = None,
+    department: Optional[str] = None,
+    sort_by: Literal[EMPLOYEE_SORTS] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    List employees with basic info (OD Manager only).
+    Filter by job title or department and sort by any listed column. With
+    `limit` the list is paged: pass the X-Next-Cursor response header back
+    as `cursor` for the next page (no header on the last page).
+    Totals come from the employee_summary read model.
+    """
+    columns = {
+        "id": User.id,
+        "name": User.name,
+        "job_title": func.coalesce(JobTitle.title, ""),
+        "years_of_experience": func.coalesce(User.years_of_experience, 0),
+        "total_skills": func.coalesce(EmployeeSummary.total_skills, 0),
+        "total_assessments": func.coalesce(EmployeeSummary.total_assessments, 0),
+        "average_score": func.coalesce(
+            EmployeeSummary.total_points * 1.0 / func.nullif(EmployeeSummary.total_assessments, 0), 0
+        ),
+        "active_roadmaps": func.coalesce(EmployeeSummary.active_roadmaps, 0)
+    }
+    sort_column = columns[sort_by]
+
+    query = db.query(
+        User.id,
+        User.name,
+        User.email,
+        User.job_title_id,
+        JobTitle.title.label("job_title"),
+        User.years_of_experience,
+        columns["total_skills"].label("total_skills"),
+        columns["total_assessments"].label("total_assessments"),
+        columns["average_score"].label("average_score"),
+        columns["active_roadmaps"].label("active_roadmaps"),
+        sort_column.label("sort_value")
+    ).outerjoin(
+        JobTitle, User.job_title_id == JobTitle.id
+    ).outerjoin(
+        EmployeeSummary, EmployeeSummary.user_id == User.id
+    ).filter(User.role == UserRole.EMPLOYEE)
+
+    if job_title_id is not None:
+        query = query.filter(User.job_title_id == job_title_id)
+    if department is not None:
+        query = query.filter(JobTitle.department == department)
+
+    # Keyset pagination on (sort value, id), which is unique
+    if cursor:
+        after_value, after_id = _decode_cursor(cursor)
+        if order == "asc":
+            query = query.filter(or_(sort_column > after_value, and_(sort_column == after_value, User.id > after_id)))
+        else:
+            query = query.filter(or_(sort_column < after_value, and_(sort_column == after_value, User.id < after_id)))
+    if order == "asc":
+        query = query.order_by(sort_column.asc(), User.id.asc())
+    else:
+        query = query.order_by(sort_column.desc(), User.id.desc())
+    if limit:
+        query = query.limit(limit + 1)
+
+    rows = query.all()
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last_value = rows[-1].sort_value
+        if isinstance(last_value, Decimal):
+            last_value = float(last_value)
+        response.headers["X-Next-Cursor"] = _encode_cursor(last_value, rows[-1].id)
+
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "email": row.email,
+            "job_title_id": row.job_title_id,
+            "job_title": row.job_title,
+            "years_of_experience": float(row.years_of_experience) if row.years_of_experience else 0,
+            "total_skills": row.total_skills,
+            "total_assessments": row.total_assessments,
+            "average_score": float(row.average_score),
+            "active_roadmaps": row.active_roadmaps
+        }
+        for row in rows
+    ]
+
+
+@router.get("/gap-matrix", response_model=List[dict])
+def get_gap_matrix(
+    job_title_id: int = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_od_manager)
 ):
     """
-    List all employees with basic info (OD Manager only)
+    Skill gap of every employee against their job description (OD Manager only)
     """
-    employees = db.query(User).filter(User.role == UserRole.EMPLOYEE).all()
+    employee_query = db.query(User).filter(
+        User.role == UserRole.EMPLOYEE,
+        User.job_title_id.isnot(None)
+    )
+    if job_title_id:
+        employee_query = employee_query.filter(User.job_title_id == job_title_id)
+    employees = employee_query.options(joinedload(User.job_title)).order_by(User.id).all()
+    
+    # First job description per job title, as used by the per-employee gap analysis
+    job_descriptions = {}
+    for jd in db.query(JobDescription).order_by(JobDescription.id).all():
+        job_descriptions.setdefault(jd.job_title_id, jd)
+    
+    # Load every employee's skills in one query
+    skills_by_user = {}
+    skill_rows = db.query(
+        EmployeeSkill.user_id,
+        EmployeeSkill.skill_name,
+        EmployeeSkill.proficiency_level,
+        EmployeeSkill.years_of_experience
+    ).filter(
+        EmployeeSkill.user_id.in_(employee_query.with_entities(User.id))
+    ).all()
+    for row in skill_rows:
+        skills_by_user.setdefault(row.user_id, []).append({
+            "skill_name": row.skill_name,
+            "proficiency_level": row.proficiency_level.value,
+            "years_of_experience": float(row.years_of_experience)
+        })
     
-    result = []
+    # Group employees by job description and compare each group in one pass
+    employees_by_jd = {}
     for emp in employees:
-        # Get total assessments
-        total_assessments = db.query(func.count(AssessmentResult.id)).filter(
-            AssessmentResult.user_id == emp.id
-        ).scalar()
-        
-        # Get average score
-        avg_score = db.query(func.avg(AssessmentResult.points_earned)).filter(
-            AssessmentResult.user_id == emp.id
-        ).scalar() or 0
-        
-        # Get skill count
-        skill_count = db.query(func.count(EmployeeSkill.id)).filter(
-            EmployeeSkill.user_id == emp.id
-        ).scalar()
-        
-        # Get active roadmaps
-        active_roadmaps = db.query(func.count(LearningRoadmap.id)).filter(
-            LearningRoadmap.user_id == emp.id,
-            LearningRoadmap.status.in_(["not_started", "in_progress"])
-        ).scalar()
-        
-        result.append({
-            "id": emp.id,
+        jd = job_descriptions.get(emp.job_title_id)
+        if jd:
+            employees_by_jd.setdefault(jd.id, []).append(emp)
+    
+    jds_by_id = {jd.id: jd for jd in job_descriptions.values()}
+    gaps = {}
+    for jd_id, group in employees_by_jd.items():
+        gaps.update(vector_service.compare_skill_sets_batch(
+            {emp.id: skills_by_user.get(emp.id, []) for emp in group},
+            jds_by_id[jd_id].required_skills,
+            job_description_id=jd_id
+        ))
+    
+    return [
+        {
+            "user_id": emp.id,
             "name": emp.name,
-            "email": emp.email,
             "job_title_id": emp.job_title_id,
             "job_title": emp.job_title.title if emp.job_title else None,
-            "years_of_experience": float(emp.years_of_experience) if emp.years_of_experience else 0,
-            "total_skills": skill_count,
-            "total_assessments": total_assessments,
-            "average_score": float(avg_score),
-            "active_roadmaps": active_roadmaps
-        })
-    
-    return result
+            "job_description_id": job_descriptions[emp.job_title_id].id,
+            **gaps[emp.id]
+        }
+        for emp in employees
+        if emp.id in gaps
+    ]
 
 
-@router.get("/employee/{employee_id}", response_model=dict)
-def get_employee_report(
-    employee_id: int,
+@router.get("/skill-heatmap", response_model=dict)
+def get_skill_heatmap(
+    dimension: Literal[DIMENSIONS] = "department",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_od_manager)
 ):
     """
-    Get detailed report for a specific employee (OD Manager only)
+    Skill coverage, mean proficiency, verified ratio and gap against the
+    expected proficiency levels per department or job title (OD Manager only)
+    """
+    return skill_heatmap_service.get_heatmap(db, dimension)
+
+
+@router.get("/export")
+def export_employees(
+    format: Literal[EXPORT_FORMATS] = "csv",
+    job_title_id: Optional[int] = None,
+    department: Optional[str] = None,
+    gap_analysis: Literal[GAP_ANALYSIS_MODES] = "none",
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Export every employee's report as CSV or NDJSON, streamed (OD Manager only).
+    Gap analysis is left out by default; "stored" adds up-to-date stored
+    analyses without calling the AI, "compute" also computes missing ones.
     """
+    reports = report_export_service.rows(job_title_id, department, gap_analysis)
+    if format == "csv":
+        body, media_type = report_export_service.csv_lines(reports, gap_analysis), "text/csv"
+    else:
+        body, media_type = report_export_service.ndjson_lines(reports), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="employees.{format}"'}
+    )
+
+
+def _get_employee(db: Session, employee_id: int) -> User:
     employee = db.query(User).filter(
         User.id == employee_id,
         User.role == UserRole.EMPLOYEE
@@ -80,50 +253,22 @@ def get_employee_report(
     
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    
-    # Get skills
-    skills = db.query(EmployeeSkill).filter(EmployeeSkill.user_id == employee_id).all()
-    
+    return employee
+
+
+def _employee_report(db: Session, employee: User, skills: List[EmployeeSkill], gap_analysis) -> dict:
+    """Report of an employee around their gap analysis"""
     # Get roadmaps
-    roadmaps = db.query(LearningRoadmap).filter(LearningRoadmap.user_id == employee_id).all()
+    roadmaps = db.query(LearningRoadmap).filter(LearningRoadmap.user_id == employee.id).all()
     
-    # Get assessment results
-    assessments = db.query(AssessmentResult).filter(AssessmentResult.user_id == employee_id).all()
-    
-    # Calculate assessment score
-    if assessments:
-        total_points = sum(a.points_earned for a in assessments)
-        total_assessments = len(assessments)
-        avg_score = total_points / total_assessments if total_assessments > 0 else 0
+    # Assessment totals from the summary (raw tables until it has been built)
+    summary = db.query(EmployeeSummary).filter(EmployeeSummary.user_id == employee.id).first()
+    if summary is not None:
+        total_points, total_assessments = summary.total_points, summary.total_assessments
     else:
-        avg_score = 0
-        total_assessments = 0
-    
-    # Get gap analysis if job title exists
-    gap_analysis = None
-    if employee.job_title_id:
-        jd = db.query(JobDescription).filter(
-            JobDescription.job_title_id == employee.job_title_id
-        ).first()
-        
-        if jd and skills:
-            employee_skills_data = [
-                {
-                    "skill_name": s.skill_name,
-                    "proficiency_level": s.proficiency_level.value,
-                    "years_of_experience": float(s.years_of_experience)
-                }
-                for s in skills
-            ]
-            
-            ai_analysis = openai_service.analyze_skill_gap(
-                employee_skills_data,
-                jd.required_skills,
-                employee.job_title.title,
-                float(jd.required_years_of_experience)
-            )
-            
-            gap_analysis = ai_analysis
+        totals = employee_summary_service.compute(db, [employee.id])[employee.id]
+        total_points, total_assessments = totals["total_points"], totals["total_assessments"]
+    avg_score = total_points / total_assessments if total_assessments > 0 else 0
     
     return {
         "user": {
@@ -163,43 +308,68 @@ def get_employee_report(
     }
 
 
-@router.get("/career-progression/{employee_id}", response_model=CareerProgressionResponse)
-def get_career_progression(
+@router.get("/employee/{employee_id}", response_model=dict)
+async def get_employee_report(
     employee_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_od_manager)
 ):
     """
-    Get career progression suggestions for an employee (OD Manager only)
+    Get detailed report for a specific employee (OD Manager only)
     """
-    employee = db.query(User).filter(
-        User.id == employee_id,
-        User.role == UserRole.EMPLOYEE
-    ).first()
+    # Database work runs in the threadpool, off the event loop
+    employee = await run_in_threadpool(_get_employee, db, employee_id)
     
-    if not employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
+    # Get skills
+    skills = await run_in_threadpool(
+        lambda: db.query(EmployeeSkill).filter(EmployeeSkill.user_id == employee_id).all()
+    )
+    
+    # Get gap analysis if job title exists (stored, recomputed only when its inputs changed)
+    gap_analysis = await gap_analysis_service.get_gap_analysis(db, employee, skills=skills)
+    
+    return await run_in_threadpool(_employee_report, db, employee, skills, gap_analysis)
+
+
+def _progression_inputs(db: Session, employee_id: int):
+    """Current job title, next job titles, skills and experience of an employee"""
+    employee = _get_employee(db, employee_id)
     
     if not employee.job_title_id:
         raise HTTPException(status_code=400, detail="Employee has no job title assigned")
     
-    # Get current job title
-    current_job = db.query(JobTitle).filter(JobTitle.id == employee.job_title_id).first()
-    
-    # Get next level jobs
-    next_jobs = []
-    if current_job.next_level_job_id:
-        next_job = db.query(JobTitle).filter(JobTitle.id == current_job.next_level_job_id).first()
-        if next_job:
-            next_jobs.append(next_job.title)
+    # Current and next job titles from the career graph
+    graph = career_graph_service.get_graph(db)
+    current_job = graph.jobs.get(employee.job_title_id)
+    if current_job is None:
+        raise HTTPException(status_code=404, detail="Job title not found")
+    next_jobs = [job["title"] for job in graph.next_jobs(employee.job_title_id)]
     
     # Get employee skills
-    skills = db.query(EmployeeSkill).filter(EmployeeSkill.user_id == employee_id).all()
-    current_skills = [s.skill_name for s in skills]
+    current_skills = [
+        skill_name for (skill_name,) in
+        db.query(EmployeeSkill.skill_name).filter(EmployeeSkill.user_id == employee_id)
+    ]
+    
+    return current_job["title"], next_jobs, current_skills, float(employee.years_of_experience)
+
+
+@router.get("/career-progression/{employee_id}", response_model=CareerProgressionResponse)
+async def get_career_progression(
+    employee_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Get career progression suggestions for an employee (OD Manager only)
+    """
+    current_job_title, next_jobs, current_skills, years_of_experience = await run_in_threadpool(
+        _progression_inputs, db, employee_id
+    )
     
     if not next_jobs:
         return {
-            "current_job_title": current_job.title,
+            "current_job_title": current_job_title,
             "recommended_next_role": None,
             "readiness_percentage": 100.0,
             "reasons": ["Already at highest level"],
@@ -208,15 +378,15 @@ def get_career_progression(
         }
     
     # Use OpenAI to suggest career progression
-    progression = openai_service.suggest_career_progression(
-        current_job_title=current_job.title,
+    progression = await openai_service.suggest_career_progression(
+        current_job_title=current_job_title,
         current_skills=current_skills,
-        years_of_experience=float(employee.years_of_experience),
+        years_of_experience=years_of_experience,
         available_next_roles=next_jobs
     )
     
     return {
-        "current_job_title": current_job.title,
+        "current_job_title": current_job_title,
         "recommended_next_role": progression.get("recommended_role"),
         "readiness_percentage": progression.get("readiness_percentage", 0),
         "reasons": progression.get("reasons", []),
@@ -224,3 +394,31 @@ def get_career_progression(
         "estimated_timeline_months": progression.get("timeline", 0)
     }
 
+
+@router.get("/career-paths/{employee_id}", response_model=CareerPathResponse)
+def get_career_paths(
+    employee_id: int,
+    steps: int = Query(3, ge=1, le=20),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Next `steps` job titles on an employee's career path, each with the
+    cumulative skills required to get there, the employee's gaps and
+    readiness (OD Manager only)
+    """
+    employee = db.query(User).filter(
+        User.id == employee_id,
+        User.role == UserRole.EMPLOYEE
+    ).first()
+    
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    if not employee.job_title_id:
+        raise HTTPException(status_code=400, detail="Employee has no job title assigned")
+    
+    paths = career_graph_service.career_paths(db, employee.job_title_id, employee.id, steps)
+    if paths is None:
+        raise HTTPException(status_code=404, detail="Job title not found")
+    return paths
@@ -1,27 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+import copy
+import json
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from database.connection import get_db
-from middleware import get_current_user, get_current_employee
+from typing import List, Optional
+from database.connection import get_db, SessionLocal
+from middleware import get_current_user, get_current_employee, get_current_od_manager
 from models.user import User
 from models.skill import EmployeeSkill
-from models.roadmap import LearningRoadmap, RoadmapStatus
+from models.roadmap import LearningRoadmap, RoadmapStatus, RoadmapTemplate
 from models.job import JobDescription
-from schemas import RoadmapGenerateRequest, LearningRoadmapResponse
-from services import openai_service
+from schemas import RoadmapGenerateRequest, LearningRoadmapResponse, RoadmapTemplateResponse
+from services import openai_service, roadmap_template_service, employee_summary_service
+from services.openai_service import ROADMAP_STREAM_KEYS
+from services.roadmap_template_service import transition_gap, completion_weeks
 
 router = APIRouter(prefix="/roadmap", tags=["Learning Roadmap"])
 
+# SSE event name for each streamed roadmap array
+STREAM_EVENTS = {
+    "milestones": "milestone",
+    "course_recommendations": "course",
+    "practice_tasks": "task"
+}
 
-@router.post("/generate", response_model=LearningRoadmapResponse)
-def generate_roadmap(
-    request: RoadmapGenerateRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_employee)
-):
-    """
-    Generate personalized learning roadmap for a skill
-    """
+
+def _roadmap_inputs(db: Session, current_user: User, request: RoadmapGenerateRequest):
+    """Current level of the skill, its gap to the target level and the user's job title"""
     # Check if user has job title
     if not current_user.job_title_id:
         raise HTTPException(status_code=400, detail="No job title assigned")
@@ -41,25 +47,30 @@ def generate_roadmap(
     ).first()
     
     current_level = current_skill.proficiency_level if current_skill else "beginner"
+    current_level = current_level.value if hasattr(current_level, 'value') else current_level
     
     # Calculate gap percentage
-    proficiency_map = {"beginner": 1, "intermediate": 2, "advanced": 3, "expert": 4}
-    current_val = proficiency_map.get(current_level.value if hasattr(current_level, 'value') else current_level, 1)
-    target_val = proficiency_map.get(request.target_level.value, 4)
-    gap_percentage = ((target_val - current_val) / target_val) * 100 if target_val > current_val else 0
-    
-    # Generate roadmap using OpenAI
-    roadmap_data = openai_service.generate_learning_roadmap(
-        skill_name=request.skill_name,
-        current_level=current_level.value if hasattr(current_level, 'value') else current_level,
-        target_level=request.target_level.value,
-        gap_percentage=gap_percentage,
-        job_title=current_user.job_title.title
-    )
+    gap_percentage = transition_gap(current_level, request.target_level.value)
     
+    return current_level, gap_percentage, current_user.job_title
+
+
+def _save_roadmap(
+    db: Session,
+    user_id: int,
+    job_title_id: int,
+    request: RoadmapGenerateRequest,
+    current_level: str,
+    gap_percentage: float,
+    roadmap_data: dict,
+    template_id: int = None
+) -> LearningRoadmap:
+    """Update the user's open roadmap for the skill, or create one (a copy of the template's content)"""
+    # Employees' roadmaps never share JSON objects with the template or each other
+    roadmap_data = copy.deepcopy(roadmap_data)
     # Check if roadmap already exists
     existing_roadmap = db.query(LearningRoadmap).filter(
-        LearningRoadmap.user_id == current_user.id,
+        LearningRoadmap.user_id == user_id,
         LearningRoadmap.skill_name == request.skill_name,
         LearningRoadmap.status != RoadmapStatus.COMPLETED
     ).first()
@@ -71,13 +82,14 @@ def generate_roadmap(
         existing_roadmap.milestones = roadmap_data.get("milestones", [])
         existing_roadmap.course_recommendations = roadmap_data.get("course_recommendations", [])
         existing_roadmap.practice_tasks = roadmap_data.get("practice_tasks", [])
-        existing_roadmap.estimated_completion_weeks = roadmap_data.get("estimated_completion_weeks", 0)
+        existing_roadmap.estimated_completion_weeks = completion_weeks(roadmap_data.get("estimated_completion_weeks", 0))
+        existing_roadmap.template_id = template_id
         roadmap = existing_roadmap
     else:
         # Create new roadmap
         roadmap = LearningRoadmap(
-            user_id=current_user.id,
-            job_title_id=current_user.job_title_id,
+            user_id=user_id,
+            job_title_id=job_title_id,
             skill_name=request.skill_name,
             current_level=current_level,
             target_level=request.target_level,
@@ -85,10 +97,12 @@ def generate_roadmap(
             milestones=roadmap_data.get("milestones", []),
             course_recommendations=roadmap_data.get("course_recommendations", []),
             practice_tasks=roadmap_data.get("practice_tasks", []),
-            estimated_completion_weeks=roadmap_data.get("estimated_completion_weeks", 0),
+            estimated_completion_weeks=completion_weeks(roadmap_data.get("estimated_completion_weeks", 0)),
+            template_id=template_id,
             status=RoadmapStatus.NOT_STARTED
         )
         db.add(roadmap)
+        employee_summary_service.record_roadmap_change(db, user_id, was_active=False, is_active=True)
     
     db.commit()
     db.refresh(roadmap)
@@ -96,6 +110,148 @@ def generate_roadmap(
     return roadmap
 
 
+def _template_data(db: Session, job_title_id: int, skill_name: str, current_level: str, target_level: str):
+    """Id and content of the transition's template, or (None, None)"""
+    template = roadmap_template_service.find(db, job_title_id, skill_name, current_level, target_level)
+    if template is None:
+        return None, None
+    return template.id, roadmap_template_service.content(template)
+
+
+def _store_streamed_roadmap(
+    user_id: int,
+    job_title_id: int,
+    request: RoadmapGenerateRequest,
+    current_level: str,
+    gap_percentage: float,
+    roadmap_data: dict,
+    template_id: Optional[int]
+) -> dict:
+    """
+    Save a streamed roadmap (and its template when new); the request's
+    session is not used because it may be closed while the body streams
+    """
+    session = SessionLocal()
+    try:
+        if template_id is None:
+            new_template = roadmap_template_service.store(
+                session, job_title_id, request.skill_name, current_level, request.target_level.value, roadmap_data
+            )
+            template_id = new_template.id if new_template else None
+        roadmap = _save_roadmap(
+            session, user_id, job_title_id, request,
+            current_level, gap_percentage, roadmap_data,
+            template_id=template_id
+        )
+        return LearningRoadmapResponse.model_validate(roadmap).model_dump(mode="json")
+    finally:
+        session.close()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate", response_model=LearningRoadmapResponse)
+async def generate_roadmap(
+    request: RoadmapGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_employee)
+):
+    """
+    Generate personalized learning roadmap for a skill
+    """
+    # Database work runs in the threadpool, off the event loop
+    current_level, gap_percentage, job_title = await run_in_threadpool(_roadmap_inputs, db, current_user, request)
+    
+    # Copy the shared template for the transition; generated (using OpenAI) only the first time
+    roadmap_data, template = await roadmap_template_service.get_roadmap(
+        db,
+        job_title,
+        request.skill_name,
+        current_level,
+        request.target_level.value
+    )
+    
+    return await run_in_threadpool(
+        _save_roadmap,
+        db, current_user.id, current_user.job_title_id, request,
+        current_level, gap_percentage, roadmap_data,
+        template_id=template.id if template else None
+    )
+
+
+@router.post("/generate/stream")
+async def generate_roadmap_stream(
+    request: RoadmapGenerateRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_employee)
+):
+    """
+    Generate personalized learning roadmap for a skill, streamed as Server-Sent Events:
+    "meta" first, then "milestone", "course" and "task" events as each item
+    is generated (all at once when the transition's template exists), and
+    finally "roadmap" with the saved roadmap (or "error")
+    """
+    current_level, gap_percentage, job_title = await run_in_threadpool(_roadmap_inputs, db, current_user, request)
+    user_id = current_user.id
+    job_title_id = current_user.job_title_id
+    job_title = job_title.title
+    target_level = request.target_level.value
+    template_id, template_data = await run_in_threadpool(
+        _template_data, db, job_title_id, request.skill_name, current_level, target_level
+    )
+    
+    async def events():
+        yield _sse("meta", {
+            "skill_name": request.skill_name,
+            "current_level": current_level,
+            "target_level": target_level,
+            "gap_percentage": gap_percentage
+        })
+        
+        roadmap_data = template_data
+        if roadmap_data is not None:
+            for name in ROADMAP_STREAM_KEYS:
+                for item in roadmap_data.get(name) or []:
+                    yield _sse(STREAM_EVENTS[name], item)
+        else:
+            try:
+                async for name, item in openai_service.stream_learning_roadmap(
+                    skill_name=request.skill_name,
+                    current_level=current_level,
+                    target_level=target_level,
+                    gap_percentage=gap_percentage,
+                    job_title=job_title
+                ):
+                    if name == "roadmap":
+                        roadmap_data = item
+                    else:
+                        yield _sse(STREAM_EVENTS[name], item)
+            except Exception as e:
+                print(f"Error streaming learning roadmap: {str(e)}")
+                yield _sse("error", {"detail": "Failed to generate roadmap"})
+                return
+        
+        # Persist once the whole roadmap has arrived
+        try:
+            roadmap = await run_in_threadpool(
+                _store_streamed_roadmap,
+                user_id, job_title_id, request, current_level, gap_percentage, roadmap_data, template_id
+            )
+        except Exception as e:
+            print(f"Error saving streamed learning roadmap: {str(e)}")
+            yield _sse("error", {"detail": "Failed to save roadmap"})
+            return
+        yield _sse("roadmap", roadmap)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/my-roadmaps", response_model=List[LearningRoadmapResponse])
 def get_my_roadmaps(
     db: Session = Depends(get_db),
@@ -129,6 +285,7 @@ def update_roadmap_progress(
     if not roadmap:
         raise HTTPException(status_code=404, detail="Roadmap not found")
     
+    was_active = employee_summary_service.is_active(roadmap.status)
     roadmap.progress_percentage = progress_percentage
     
     # Update status based on progress
@@ -144,6 +301,9 @@ def update_roadmap_progress(
             from datetime import datetime
             roadmap.started_at = datetime.utcnow()
     
+    employee_summary_service.record_roadmap_change(
+        db, current_user.id, was_active, employee_summary_service.is_active(roadmap.status)
+    )
     db.commit()
     db.refresh(roadmap)
     
@@ -169,3 +329,57 @@ def get_roadmap_detail(
     
     return roadmap
 
+
+@router.get("/templates", response_model=List[RoadmapTemplateResponse])
+def get_roadmap_templates(
+    job_title_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    List the shared roadmap templates, optionally of one job title (OD Manager only)
+    """
+    query = db.query(RoadmapTemplate)
+    if job_title_id is not None:
+        query = query.filter(RoadmapTemplate.job_title_id == job_title_id)
+    return query.order_by(RoadmapTemplate.job_title_id, RoadmapTemplate.skill_key).all()
+
+
+@router.post("/templates/warm", status_code=status.HTTP_202_ACCEPTED)
+async def warm_roadmap_templates(
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Generate in the background the templates missing for every required skill
+    of every job description (OD Manager only)
+    """
+    started = roadmap_template_service.start_warm()
+    return {"started": started, **roadmap_template_service.warm_status}
+
+
+@router.get("/templates/warm")
+def get_roadmap_template_warm_status(
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Progress of the latest template warm-up (OD Manager only)
+    """
+    return roadmap_template_service.warm_status
+
+
+@router.delete("/templates/{template_id}")
+def delete_roadmap_template(
+    template_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Delete a template so its transition is generated again (OD Manager only);
+    roadmaps already copied from it are kept
+    """
+    template = db.query(RoadmapTemplate).filter(RoadmapTemplate.id == template_id).first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Roadmap template not found")
+    db.delete(template)
+    db.commit()
+    return {"message": "Roadmap template deleted"}
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+from middleware import get_current_od_manager
+from models.user import User
+from services import index_queue, vector_service, openai_service
+from services.usage_tracker import GROUP_COLUMNS
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get("/index-status", response_model=dict)
+def get_index_status(
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Skill index queue depth, indexing lag, index size and embedding cache (OD Manager only)
+    """
+    vector_service.sync()
+    return {
+        "queue": index_queue.status(),
+        "index": {
+            "generation": vector_service.generation,
+            "rows": len(vector_service.skill_rows),
+            "live_rows": vector_service.live_count,
+            "dead_ratio": round(vector_service.dead_ratio, 4)
+        },
+        "embedding": {
+            "backend": vector_service.backend.name,
+            "configured_backend": vector_service.embedding.name,
+            "stale": vector_service.embedding_stale,
+            "cache": vector_service.embedding_cache.stats()
+        }
+    }
+
+
+@router.get("/llm-cache", response_model=dict)
+def get_llm_cache_status(
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    LLM response cache entries, hit/miss/eviction counters and in-flight
+    request coalescing (OD Manager only)
+    """
+    return {
+        "ttl_seconds": openai_service.cache_ttls,
+        "cache": openai_service.cache.stats(),
+        "single_flight": openai_service.flight_stats()
+    }
+
+
+@router.get("/llm-guard", response_model=dict)
+def get_llm_guard_status(
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    OpenAI rate limiter capacity, retry counters and circuit breaker state (OD Manager only)
+    """
+    return openai_service.guard.stats()
+
+
+@router.delete("/llm-cache", response_model=dict)
+def clear_llm_cache(
+    operation: Optional[str] = None,
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    Drop cached LLM responses, optionally for one operation (OD Manager only)
+    """
+    return {"removed": openai_service.cache.clear(operation)}
+
+
+@router.get("/llm-usage", response_model=List[dict])
+def get_llm_usage(
+    group_by: List[str] = Query(["operation"]),
+    days: int = Query(30, ge=1),
+    operation: Optional[str] = None,
+    user_id: Optional[int] = None,
+    current_user: User = Depends(get_current_od_manager)
+):
+    """
+    LLM calls, tokens, latency and cache hits over the last `days` days,
+    grouped by any of operation, user, job_title, endpoint, model and day (OD Manager only)
+    """
+    unknown = [g for g in group_by if g not in GROUP_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot group by {', '.join(unknown)}; use {', '.join(GROUP_COLUMNS)}"
+        )
+    return openai_service.usage.aggregate(
+        group_by,
+        since=datetime.now(timezone.utc) - timedelta(days=days),
+        operation=operation,
+        user_id=user_id
+    )
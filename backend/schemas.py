@@ -4,6 +4,7 @@ from datetime import datetime
 from models.user import UserRole
 from models.skill import ProficiencyLevel
 from models.roadmap import RoadmapStatus
+from models.quiz import QuizJobStatus
 
 
 # Auth Schemas
@@ -135,6 +136,33 @@ class QuizQuestionGenerate(BaseModel):
     num_questions: int = 5
 
 
+class QuizBulkGenerateRequest(BaseModel):
+    job_title_id: int
+    difficulty_levels: List[ProficiencyLevel] = list(ProficiencyLevel)
+    num_questions: int = 5
+    experience_level_years: Optional[float] = None
+
+
+class QuizGenerationJobResponse(BaseModel):
+    id: int
+    job_title_id: int
+    job_description_id: Optional[int]
+    status: QuizJobStatus
+    difficulty_levels: List[ProficiencyLevel]
+    num_questions: int
+    total_tasks: int
+    completed_tasks: int
+    failed_tasks: int
+    questions_created: int
+    errors: Optional[List[Dict[str, Any]]]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class QuizQuestionResponse(BaseModel):
     id: int
     job_title_id: int
@@ -180,6 +208,8 @@ class GapAnalysisResponse(BaseModel):
     priority_areas: List[str]
     estimated_time_to_bridge: int
     similarity_scores: Dict[str, Any]
+    # True when the AI analysis was unavailable and only the vector comparison is returned
+    degraded: bool = False
 
 
 # Roadmap Schemas
@@ -198,6 +228,7 @@ class LearningRoadmapResponse(BaseModel):
     course_recommendations: Optional[List[Dict[str, Any]]]
     practice_tasks: Optional[List[Dict[str, Any]]]
     estimated_completion_weeks: Optional[int]
+    template_id: Optional[int] = None
     status: RoadmapStatus
     progress_percentage: float
     
@@ -205,6 +236,23 @@ class LearningRoadmapResponse(BaseModel):
         from_attributes = True
 
 
+class RoadmapTemplateResponse(BaseModel):
+    id: int
+    job_title_id: int
+    skill_name: str
+    current_level: ProficiencyLevel
+    target_level: ProficiencyLevel
+    milestones: List[Dict[str, Any]]
+    course_recommendations: Optional[List[Dict[str, Any]]]
+    practice_tasks: Optional[List[Dict[str, Any]]]
+    estimated_completion_weeks: Optional[int]
+    daily_time_commitment: Optional[float]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 # Report Schemas
 class EmployeeReportResponse(BaseModel):
     user: UserResponse
@@ -223,3 +271,26 @@ class CareerProgressionResponse(BaseModel):
     skills_needed: List[str]
     estimated_timeline_months: int
 
+
+class CareerSkillGap(BaseModel):
+    skill_name: str
+    current_level: Optional[ProficiencyLevel]
+    required_level: ProficiencyLevel
+
+
+class CareerPathStep(BaseModel):
+    step: int
+    job_title_id: int
+    job_title: str
+    level: int
+    required_skills: List[str]
+    skill_gaps: List[CareerSkillGap]
+    readiness_percentage: float
+
+
+class CareerPathResponse(BaseModel):
+    current_job_title_id: int
+    current_job_title: str
+    reachable_job_titles: int
+    steps: List[CareerPathStep]
+
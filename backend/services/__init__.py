@@ -1,5 +1,24 @@
 from services.openai_service import openai_service
 from services.vector_service import vector_service
+from services.index_queue import index_queue
+from services.gap_analysis_service import gap_analysis_service
+from services.quiz_generation_service import quiz_generation_service
+from services.roadmap_template_service import roadmap_template_service
+from services.employee_summary_service import employee_summary_service
+from services.skill_heatmap_service import skill_heatmap_service
+from services.report_export_service import report_export_service
+from services.career_graph_service import career_graph_service
 
-__all__ = ["openai_service", "vector_service"]
+__all__ = [
+    "openai_service",
+    "vector_service",
+    "index_queue",
+    "gap_analysis_service",
+    "quiz_generation_service",
+    "roadmap_template_service",
+    "employee_summary_service",
+    "skill_heatmap_service",
+    "report_export_service",
+    "career_graph_service"
+]
 
@@ -0,0 +1,167 @@
+import numpy as np
+from typing import List, Optional
+from scipy import sparse
+from config import settings
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (partial selection, not a full sort)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def top_k_batch(scores: np.ndarray, k: int) -> np.ndarray:
+    """Row-wise top_k for a (queries x rows) score matrix, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=1), axis=1)[:, ::-1]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+class ExactIndex:
+    """Brute-force search: every row is a candidate"""
+
+    name = "exact"
+
+    def __init__(self, vectors: sparse.csr_matrix):
+        self.rows = vectors.shape[0]
+
+    def candidates(self, queries: sparse.csr_matrix) -> List[Optional[np.ndarray]]:
+        # None means "score every row"
+        return [None] * queries.shape[0]
+
+
+class LSHIndex:
+    """
+    Random-projection LSH. Each of n_tables hashes a vector to the sign pattern
+    of n_bits random hyperplanes; rows sharing a bucket with the query in any
+    table are candidates. More tables raise recall, more bits cut candidates
+    (and latency).
+    """
+
+    name = "lsh"
+
+    def __init__(self, vectors: sparse.csr_matrix, n_tables: int = 8, n_bits: int = 12, seed: int = 0):
+        self.rows = vectors.shape[0]
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((vectors.shape[1], n_tables * n_bits)).astype(np.float32)
+        self.bit_weights = (1 << np.arange(n_bits, dtype=np.int64))
+
+        codes = self._codes(vectors)
+        # Rows sorted by bucket code per table; a bucket is a contiguous slice
+        self.order = np.argsort(codes, axis=0, kind="stable").T
+        self.sorted_codes = np.take_along_axis(codes, self.order.T, axis=0).T
+
+    def _codes(self, vectors: sparse.csr_matrix, chunk_size: int = 65536) -> np.ndarray:
+        codes = np.empty((vectors.shape[0], self.n_tables), dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            bits = np.asarray(chunk @ self.planes) > 0
+            bits = bits.reshape(chunk.shape[0], self.n_tables, self.n_bits)
+            codes[start:start + chunk.shape[0]] = bits @ self.bit_weights
+        return codes
+
+    def candidates(self, queries: sparse.csr_matrix) -> List[Optional[np.ndarray]]:
+        query_codes = self._codes(queries)
+        results = []
+        for codes in query_codes:
+            rows = []
+            for table, code in enumerate(codes):
+                left = np.searchsorted(self.sorted_codes[table], code, side="left")
+                right = np.searchsorted(self.sorted_codes[table], code, side="right")
+                rows.append(self.order[table, left:right])
+            results.append(np.unique(np.concatenate(rows)))
+        return results
+
+
+class IVFIndex:
+    """
+    Inverted-file index: rows are clustered with spherical k-means and only
+    the n_probes clusters closest to the query are scanned. More probes raise
+    recall at the cost of latency.
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        vectors: sparse.csr_matrix,
+        n_lists: int = 0,
+        n_probes: int = 8,
+        n_iter: int = 10,
+        sample_size: int = 50000,
+        seed: int = 0
+    ):
+        self.rows = vectors.shape[0]
+        self.n_lists = max(1, min(n_lists or int(np.sqrt(self.rows)), self.rows))
+        self.n_probes = min(n_probes, self.n_lists)
+        rng = np.random.default_rng(seed)
+
+        sample = vectors
+        if self.rows > sample_size:
+            sample = vectors[rng.choice(self.rows, sample_size, replace=False)]
+        self.centroids = self._kmeans(sample, n_iter, rng)
+
+        assignments = self._nearest_centroids(vectors, 1)[:, 0]
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=self.n_lists))])
+
+    def _kmeans(self, sample: sparse.csr_matrix, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+        centroids = sample[rng.choice(sample.shape[0], self.n_lists, replace=False)].toarray()
+        for _ in range(n_iter):
+            assignments = np.asarray((sample @ centroids.T).argmax(axis=1)).ravel()
+            counts = np.bincount(assignments, minlength=self.n_lists)
+            # Sum member vectors per cluster with one sparse product
+            membership = sparse.csr_matrix(
+                (np.ones(sample.shape[0]), (assignments, np.arange(sample.shape[0]))),
+                shape=(self.n_lists, sample.shape[0])
+            )
+            sums = np.asarray((membership @ sample).todense())
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))].toarray()
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+        return centroids.astype(np.float32)
+
+    def _nearest_centroids(self, vectors: sparse.csr_matrix, n: int, chunk_size: int = 65536) -> np.ndarray:
+        nearest = np.empty((vectors.shape[0], n), dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk_size):
+            scores = np.asarray(vectors[start:start + chunk_size] @ self.centroids.T)
+            if n < self.n_lists:
+                nearest[start:start + scores.shape[0]] = np.argpartition(scores, -n, axis=1)[:, -n:]
+            else:
+                nearest[start:start + scores.shape[0]] = np.arange(self.n_lists)
+        return nearest
+
+    def candidates(self, queries: sparse.csr_matrix) -> List[Optional[np.ndarray]]:
+        probes = self._nearest_centroids(queries, self.n_probes)
+        return [
+            np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+            for lists in probes
+        ]
+
+
+def build_ann_index(vectors: sparse.csr_matrix, backend: Optional[str] = None):
+    """Build the configured ANN backend over vectors (exact below VECTOR_ANN_MIN_ROWS)"""
+    backend = backend or settings.VECTOR_ANN_BACKEND
+    if backend == "exact" or vectors.shape[0] < settings.VECTOR_ANN_MIN_ROWS:
+        return ExactIndex(vectors)
+    if backend == "lsh":
+        return LSHIndex(vectors, settings.VECTOR_ANN_LSH_TABLES, settings.VECTOR_ANN_LSH_BITS)
+    if backend == "ivf":
+        return IVFIndex(vectors, settings.VECTOR_ANN_IVF_LISTS, settings.VECTOR_ANN_IVF_PROBES)
+    raise ValueError(f"Unknown vector ANN backend: {backend}")
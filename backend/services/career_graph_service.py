@@ -0,0 +1,165 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.job import JobTitle, JobDescription
+from models.skill import EmployeeSkill
+from services.skill_keys import LEVEL_RANK, skill_key
+
+LEVEL_NAMES = {rank: level for level, rank in LEVEL_RANK.items()}
+
+
+class CareerGraph:
+    """
+    Snapshot of the job_titles graph (one next_level_job_id edge per job).
+
+    For every job title, `closure` lists the job titles reachable from it in
+    order (step 1 is the next level), and `requirements` the cumulative
+    required skills of the path up to each of them: the union of the required
+    skills of every job on the way, each at the highest expected level (a
+    required skill without an expected level is met at any level).
+    """
+
+    def __init__(self, job_titles: List[JobTitle], job_descriptions: List[JobDescription]):
+        self.jobs = {
+            job.id: {
+                "id": job.id,
+                "title": job.title,
+                "level": job.level,
+                "department": job.department,
+                "next_level_job_id": job.next_level_job_id
+            }
+            for job in job_titles
+        }
+
+        # Skills of the first job description per job title: skill key -> (name, rank)
+        skills = {}
+        for jd in job_descriptions:
+            if jd.job_title_id in skills:
+                continue
+            expected = {skill_key(name): level for name, level in (jd.expected_proficiency_levels or {}).items()}
+            required = {}
+            for name in jd.required_skills or []:
+                level = str(expected.get(skill_key(name), "")).lower()
+                required[skill_key(name)] = (name, LEVEL_RANK.get(level, 1))
+            skills[jd.job_title_id] = required
+        self.skills = skills
+
+        self.closure = {}
+        self.requirements = {}
+        for job_id in self.jobs:
+            path, cumulative, requirements = [], {}, []
+            seen = {job_id}
+            next_id = self.jobs[job_id]["next_level_job_id"]
+            # A cycle in the data ends the path at the first repeated job
+            while next_id in self.jobs and next_id not in seen:
+                seen.add(next_id)
+                path.append(next_id)
+                for key, (name, rank) in skills.get(next_id, {}).items():
+                    if key not in cumulative or cumulative[key][1] < rank:
+                        cumulative[key] = (name, rank)
+                requirements.append(dict(cumulative))
+                next_id = self.jobs[next_id]["next_level_job_id"]
+            self.closure[job_id] = path
+            self.requirements[job_id] = requirements
+
+    def next_jobs(self, job_id: int) -> List[Dict[str, Any]]:
+        return [self.jobs[next_id] for next_id in self.closure.get(job_id, [])[:1]]
+
+    def paths(self, job_id: int, employee_skills: Dict[str, int], steps: int) -> List[Dict[str, Any]]:
+        """
+        The next `steps` jobs on the path from job_id, each with the cumulative
+        skill gap of the employee (skill key -> level rank) and their readiness
+        """
+        results = []
+        for step, (next_id, required) in enumerate(
+            zip(self.closure.get(job_id, [])[:steps], self.requirements.get(job_id, [])), start=1
+        ):
+            gaps = []
+            met = 0.0
+            for key, (name, rank) in required.items():
+                current = employee_skills.get(key, 0)
+                met += min(current, rank) / rank
+                if current < rank:
+                    gaps.append({
+                        "skill_name": name,
+                        "current_level": LEVEL_NAMES.get(current),
+                        "required_level": LEVEL_NAMES[rank]
+                    })
+            results.append({
+                "step": step,
+                "job_title_id": next_id,
+                "job_title": self.jobs[next_id]["title"],
+                "level": self.jobs[next_id]["level"],
+                "required_skills": sorted(name for name, _ in required.values()),
+                "skill_gaps": sorted(gaps, key=lambda gap: gap["skill_name"]),
+                "readiness_percentage": round(met / len(required) * 100, 2) if required else 100.0
+            })
+        return results
+
+
+class CareerGraphService:
+    """
+    Career paths over job titles, from a CareerGraph loaded with two queries
+    and kept until the row counts, max ids or max updated_at of job_titles
+    and job_descriptions change (so edits made through any worker are seen),
+    or until invalidate() is called.
+    """
+
+    def __init__(self):
+        self.graph = None
+        self.fingerprint_value = None
+        self._lock = threading.Lock()
+
+    def fingerprint(self, db: Session) -> Tuple:
+        """Cheap change marker of the job tables, in one statement"""
+        columns = []
+        for model in (JobTitle, JobDescription):
+            columns += [
+                select(func.count(model.id)).scalar_subquery(),
+                select(func.max(model.id)).scalar_subquery(),
+                select(func.max(model.updated_at)).scalar_subquery()
+            ]
+        return tuple(db.execute(select(*columns)).one())
+
+    def get_graph(self, db: Session) -> CareerGraph:
+        with self._lock:
+            fingerprint = self.fingerprint(db)
+            if self.graph is None or self.fingerprint_value != fingerprint:
+                self.graph = CareerGraph(
+                    db.query(JobTitle).all(),
+                    db.query(JobDescription).order_by(JobDescription.id).all()
+                )
+                self.fingerprint_value = fingerprint
+            return self.graph
+
+    def invalidate(self):
+        with self._lock:
+            self.graph = None
+
+    def employee_skills(self, db: Session, user_id: int) -> Dict[str, int]:
+        """Skill key -> highest level rank of an employee"""
+        levels = {}
+        for skill_name, level in db.query(EmployeeSkill.skill_name, EmployeeSkill.proficiency_level).filter(
+            EmployeeSkill.user_id == user_id
+        ):
+            key = skill_key(skill_name)
+            levels[key] = max(levels.get(key, 0), LEVEL_RANK[level.value])
+        return levels
+
+    def career_paths(self, db: Session, job_title_id: int, user_id: int, steps: int) -> Optional[Dict[str, Any]]:
+        """Path of an employee holding job_title_id, or None if the job title does not exist"""
+        graph = self.get_graph(db)
+        job = graph.jobs.get(job_title_id)
+        if job is None:
+            return None
+        return {
+            "current_job_title_id": job_title_id,
+            "current_job_title": job["title"],
+            "reachable_job_titles": len(graph.closure[job_title_id]),
+            "steps": graph.paths(job_title_id, self.employee_skills(db, user_id), steps)
+        }
+
+
+# Singleton instance
+career_graph_service = CareerGraphService()
@@ -0,0 +1,268 @@
+import os
+import hashlib
+import numpy as np
+from typing import List, Dict, Any, Optional
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, CountVectorizer
+from config import settings
+
+
+class EmbeddingBackend:
+    """
+    Turns skill texts into L2-normalized row vectors for the skill index.
+
+    Vectors are returned as a CSR matrix whatever the backend, so the index,
+    snapshots and ANN structures do not care where they came from. The
+    fingerprint identifies the vector space: two texts encoded under the same
+    fingerprint are comparable, and it keys the embedding cache.
+    """
+
+    name = ""
+    # Backends that learn from the corpus (TF-IDF) have to be fitted before
+    # encoding and refitted as the corpus grows
+    needs_fit = False
+
+    def __init__(self, batch_size: int = 1024):
+        self.batch_size = batch_size
+
+    @property
+    def fitted(self) -> bool:
+        return True
+
+    def params(self) -> Dict[str, Any]:
+        """Parameters that define the vector space, stored in the snapshot manifest"""
+        return {}
+
+    def fingerprint(self) -> str:
+        raise NotImplementedError
+
+    def fresh(self) -> "EmbeddingBackend":
+        """A backend ready to be fitted on a new corpus"""
+        return self
+
+    def fit(self, texts: List[str]) -> "EmbeddingBackend":
+        return self
+
+    def encode(self, texts: List[str]) -> sparse.csr_matrix:
+        """Encode texts in batches of batch_size"""
+        if not texts:
+            return sparse.csr_matrix((0, self.dims))
+        blocks = [
+            self._encode_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return blocks[0] if len(blocks) == 1 else sparse.vstack(blocks, format="csr")
+
+    @property
+    def dims(self) -> int:
+        raise NotImplementedError
+
+    def _encode_batch(self, texts: List[str]) -> sparse.csr_matrix:
+        raise NotImplementedError
+
+    def compatible_with(self, entry: Dict[str, Any]) -> bool:
+        """Whether vectors described by a snapshot manifest entry live in this backend's space"""
+        return entry.get("backend") == self.name and entry.get("fingerprint") == self.fingerprint()
+
+    def save(self, directory: str):
+        """Write any learned state next to a snapshot"""
+
+    def restore(self, directory: str, entry: Dict[str, Any]) -> "EmbeddingBackend":
+        """The backend that encoded a compatible snapshot"""
+        return self
+
+
+class TfidfBackend(EmbeddingBackend):
+    """TF-IDF over the indexed corpus; the vocabulary is frozen between refits"""
+
+    name = "tfidf"
+    needs_fit = True
+
+    def __init__(self, max_features: int = 300, ngram_range: tuple = (1, 2), batch_size: int = 1024):
+        super().__init__(batch_size)
+        self.vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=ngram_range)
+        self._fitted = False
+        self._fingerprint = None
+
+    @property
+    def fitted(self) -> bool:
+        return self._fitted
+
+    @property
+    def dims(self) -> int:
+        return len(self.vectorizer.vocabulary_) if self._fitted else 0
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "max_features": self.vectorizer.max_features,
+            "ngram_range": list(self.vectorizer.ngram_range)
+        }
+
+    def fingerprint(self) -> str:
+        # The fitted vocabulary and IDF weights define the space
+        if self._fingerprint is None:
+            digest = hashlib.sha256(f"{self.name}:{self.params()}".encode())
+            if self._fitted:
+                digest.update("\n".join(self._vocabulary_terms()).encode())
+                digest.update(np.ascontiguousarray(self.vectorizer.idf_).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def fresh(self) -> "TfidfBackend":
+        return TfidfBackend(self.vectorizer.max_features, tuple(self.vectorizer.ngram_range), self.batch_size)
+
+    def fit(self, texts: List[str]) -> "TfidfBackend":
+        self.vectorizer.fit(texts)
+        self._fitted = True
+        self._fingerprint = None
+        return self
+
+    def _encode_batch(self, texts: List[str]) -> sparse.csr_matrix:
+        return self.vectorizer.transform(texts)
+
+    def compatible_with(self, entry: Dict[str, Any]) -> bool:
+        # The fitted state comes from the snapshot itself
+        return entry.get("backend") == self.name and entry.get("params") == self.params()
+
+    def _vocabulary_terms(self) -> List[str]:
+        terms = [None] * len(self.vectorizer.vocabulary_)
+        for term, column in self.vectorizer.vocabulary_.items():
+            terms[column] = term
+        return terms
+
+    def save(self, directory: str):
+        with open(os.path.join(directory, "vocabulary.txt"), "w", encoding="utf-8") as f:
+            f.write("".join(f"{term}\n" for term in self._vocabulary_terms()))
+        np.save(os.path.join(directory, "idf.npy"), self.vectorizer.idf_)
+
+    def restore(self, directory: str, entry: Dict[str, Any]) -> "TfidfBackend":
+        with open(os.path.join(directory, "vocabulary.txt"), encoding="utf-8") as f:
+            vocabulary = {line.rstrip("\n"): column for column, line in enumerate(f)}
+        backend = TfidfBackend(entry["params"]["max_features"], tuple(entry["params"]["ngram_range"]), self.batch_size)
+        backend.vectorizer = TfidfVectorizer(
+            max_features=backend.vectorizer.max_features,
+            ngram_range=backend.vectorizer.ngram_range,
+            vocabulary=vocabulary
+        )
+        backend.vectorizer.idf_ = np.load(os.path.join(directory, "idf.npy"))
+        backend._fitted = True
+        return backend
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    Hashed word and bigram counts. Needs no fitting, so new vocabulary is
+    matchable as soon as it is indexed and there is nothing to refit.
+    """
+
+    name = "hashing"
+
+    def __init__(self, n_features: int = 4096, ngram_range: tuple = (1, 2), batch_size: int = 1024):
+        super().__init__(batch_size)
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=ngram_range,
+            alternate_sign=False,
+            norm="l2"
+        )
+
+    @property
+    def dims(self) -> int:
+        return self.vectorizer.n_features
+
+    def params(self) -> Dict[str, Any]:
+        return {
+            "n_features": self.vectorizer.n_features,
+            "ngram_range": list(self.vectorizer.ngram_range)
+        }
+
+    def fingerprint(self) -> str:
+        return hashlib.sha256(f"{self.name}:{self.params()}".encode()).hexdigest()
+
+    def _encode_batch(self, texts: List[str]) -> sparse.csr_matrix:
+        return self.vectorizer.transform(texts)
+
+
+class LocalModelBackend(EmbeddingBackend):
+    """
+    Small static embedding model run on the CPU: mean-pooled token vectors
+    (the model2vec / averaged word-vector family), loaded from an .npz file
+    with a "vocab" array of tokens and an "embeddings" (tokens x dims) matrix.
+    Tokens may be words or two-word phrases. A batch is encoded with one
+    sparse (texts x tokens) count matrix multiplied by the embedding table.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path: str, batch_size: int = 1024):
+        super().__init__(batch_size)
+        if not model_path or not os.path.exists(model_path):
+            raise ValueError(f"Embedding model not found: {model_path!r}")
+        self.model_path = model_path
+
+        with np.load(model_path, allow_pickle=False) as model:
+            vocab = [str(token).lower() for token in model["vocab"]]
+            self.embeddings = np.asarray(model["embeddings"], dtype=np.float32)
+        self.tokenizer = CountVectorizer(
+            vocabulary={token: i for i, token in enumerate(dict.fromkeys(vocab))},
+            ngram_range=(1, 2),
+            token_pattern=r"(?u)\b\w+\b"
+        )
+        if len(self.tokenizer.vocabulary) != len(vocab):
+            # Duplicate tokens: keep the first vector of each
+            first = {}
+            for i, token in enumerate(vocab):
+                first.setdefault(token, i)
+            self.embeddings = self.embeddings[list(first.values())]
+
+        digest = hashlib.sha256()
+        with open(model_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self._fingerprint = f"{self.name}:{digest.hexdigest()}"
+
+    @property
+    def dims(self) -> int:
+        return self.embeddings.shape[1]
+
+    def params(self) -> Dict[str, Any]:
+        return {"model_path": self.model_path, "dims": self.dims}
+
+    def fingerprint(self) -> str:
+        return self._fingerprint
+
+    def _encode_batch(self, texts: List[str]) -> sparse.csr_matrix:
+        counts = self.tokenizer.transform(texts).astype(np.float32)
+        pooled = np.asarray(counts @ self.embeddings)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        # Texts with no known tokens stay zero and match nothing
+        return sparse.csr_matrix(pooled / np.where(norms == 0, 1, norms))
+
+
+def build_embedding_backend(backend: Optional[str] = None) -> EmbeddingBackend:
+    """The configured embedding backend (VECTOR_EMBEDDING_BACKEND)"""
+    backend = backend or settings.VECTOR_EMBEDDING_BACKEND
+    batch_size = settings.VECTOR_EMBEDDING_BATCH_SIZE
+    if backend == "tfidf":
+        return TfidfBackend(max_features=300, ngram_range=(1, 2), batch_size=batch_size)
+    if backend == "hashing":
+        return HashingBackend(settings.VECTOR_EMBEDDING_HASH_FEATURES, (1, 2), batch_size)
+    if backend == "local":
+        return LocalModelBackend(settings.VECTOR_EMBEDDING_MODEL_PATH, batch_size)
+    raise ValueError(f"Unknown vector embedding backend: {backend}")
+
+
+def load_embedding_backend(entry: Dict[str, Any], directory: str) -> EmbeddingBackend:
+    """
+    Rebuild the backend that encoded a snapshot from its manifest entry, so
+    queries can be served until the index is re-encoded with the configured one
+    """
+    params = entry.get("params") or {}
+    batch_size = settings.VECTOR_EMBEDDING_BATCH_SIZE
+    if entry.get("backend") == "tfidf":
+        return TfidfBackend(batch_size=batch_size).restore(directory, entry)
+    if entry.get("backend") == "hashing":
+        return HashingBackend(params["n_features"], tuple(params["ngram_range"]), batch_size)
+    if entry.get("backend") == "local":
+        return LocalModelBackend(params["model_path"], batch_size)
+    raise ValueError(f"Unknown vector embedding backend: {entry.get('backend')}")
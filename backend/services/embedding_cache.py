@@ -0,0 +1,174 @@
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Any
+from scipy import sparse
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of encoded skill texts.
+
+    Entries are keyed by sha256(backend fingerprint, text), so a text is
+    encoded once per vector space no matter how many employees list it, and
+    entries of a replaced space simply stop being hit. Two tiers:
+
+        memory  LRU bounded by memory_size
+        disk    SQLite file shared by workers and kept across restarts,
+                bounded by max_entries (least recently used rows go first)
+
+    Only rows put with persist=True (indexed skill texts) reach the disk tier;
+    search queries stay in memory. Rows are stored sparse (column indices and
+    values). Excess disk rows are evicted every evict_every stored rows, so
+    the file may hold up to that many rows over max_entries in between.
+    """
+
+    def __init__(self, path: str, memory_size: int = 50000, max_entries: int = 500000, evict_every: int = 1000):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                indices BLOB NOT NULL,
+                data BLOB NOT NULL,
+                dtype TEXT NOT NULL,
+                accessed_at REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(embeddings)")]
+        if "accessed_at" not in columns:
+            self.db.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_fingerprint ON embeddings (fingerprint)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_accessed_at ON embeddings (accessed_at)")
+        self.db.commit()
+
+        # Running row count (recounted on eviction to pick up other workers' rows)
+        self.entries = self._count()
+        self.puts_since_evict = 0
+
+    @staticmethod
+    def _key(fingerprint: str, text: str) -> str:
+        return hashlib.sha256(f"{fingerprint}\0{text}".encode()).hexdigest()
+
+    def get_many(self, fingerprint: str, texts: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Cached (indices, data) rows for the texts that have one"""
+        keys = {self._key(fingerprint, text): text for text in texts}
+        found = {}
+        with self._lock:
+            for key, text in keys.items():
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[text] = self.memory[key]
+
+            pending = [key for key in keys if keys[key] not in found]
+            read = []
+            for start in range(0, len(pending), 500):
+                chunk = pending[start:start + 500]
+                rows = self.db.execute(
+                    f"SELECT key, indices, data, dtype FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, indices, data, dtype in rows:
+                    row = (np.frombuffer(indices, dtype=np.int32), np.frombuffer(data, dtype=dtype))
+                    found[keys[key]] = row
+                    self._remember(key, row)
+                    read.append(key)
+
+            if read:
+                now = time.time()
+                self.db.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, key) for key in read])
+                self.db.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, fingerprint: str, texts: List[str], vectors: sparse.csr_matrix, persist: bool = True):
+        """Store the encoded rows of texts (one row per text); only in memory unless persist"""
+        now = time.time()
+        records = []
+        with self._lock:
+            for i, text in enumerate(texts):
+                start, end = vectors.indptr[i], vectors.indptr[i + 1]
+                row = (vectors.indices[start:end].astype(np.int32), vectors.data[start:end].copy())
+                key = self._key(fingerprint, text)
+                self._remember(key, row)
+                records.append((key, fingerprint, row[0].tobytes(), row[1].tobytes(), row[1].dtype.str, now))
+
+            if not persist or not records:
+                return
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, fingerprint, indices, data, dtype, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                records
+            )
+            self.entries += len(records)
+            self.puts_since_evict += len(records)
+            if self.puts_since_evict >= self.evict_every:
+                self._evict()
+            self.db.commit()
+
+    def _remember(self, key: str, row: Tuple[np.ndarray, np.ndarray]):
+        self.memory[key] = row
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _evict(self):
+        # Least recently used rows beyond max_entries
+        self.puts_since_evict = 0
+        self.entries = self._count()
+        excess = self.entries - self.max_entries
+        if excess > 0:
+            evicted = self.db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+            self.evictions += evicted
+            self.entries -= evicted
+
+    def prune(self, keep_fingerprint: str) -> int:
+        """Drop entries of every other vector space, returning how many were removed"""
+        with self._lock:
+            removed = self.db.execute(
+                "DELETE FROM embeddings WHERE fingerprint != ?", (keep_fingerprint,)
+            ).rowcount
+            self.db.commit()
+            self.memory.clear()
+            self.entries = self._count()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "memory_entries": len(self.memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions
+            }
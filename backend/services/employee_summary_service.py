@@ -0,0 +1,173 @@
+import argparse
+from typing import Dict, List
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from database.connection import SessionLocal
+from models.user import User, UserRole
+from models.skill import EmployeeSkill
+from models.quiz import AssessmentResult
+from models.roadmap import LearningRoadmap, RoadmapStatus
+from models.employee_summary import EmployeeSummary
+
+ACTIVE_ROADMAP_STATUSES = (RoadmapStatus.NOT_STARTED, RoadmapStatus.IN_PROGRESS)
+SUMMARY_COLUMNS = ("total_skills", "total_assessments", "total_points", "active_roadmaps")
+
+
+class EmployeeSummaryService:
+    """
+    employee_summary read model: skill, assessment, points and active roadmap
+    totals per employee.
+
+    Writes to the raw tables apply their change to the summary in the same
+    transaction: counters are adjusted with atomic `column = column + delta`
+    updates, so concurrent writes for one employee never lose each other's
+    changes. An employee without a row gets one computed from the raw tables
+    (which already include the caller's flushed changes). Missing rows are
+    backfilled at startup (backfill_missing) and by
+    database/migrations/004_employee_summary.sql, so readers can rely on every
+    employee having one; rebuild() recomputes every row from the raw tables.
+    """
+
+    def is_active(self, status: RoadmapStatus) -> bool:
+        return status in ACTIVE_ROADMAP_STATUSES
+
+    def add_employee(self, db: Session, user_id: int):
+        """Empty row of a new employee (committed with the caller's transaction)"""
+        db.add(EmployeeSummary(user_id=user_id, **self._zero()))
+
+    def record_assessments(self, db: Session, user_id: int, count: int, points: int):
+        """Quiz answers were added"""
+        self._apply(db, user_id, {"total_assessments": count, "total_points": points})
+
+    def record_roadmap_change(self, db: Session, user_id: int, was_active: bool, is_active: bool):
+        """A roadmap was created (was_active=False) or changed status"""
+        if was_active != is_active:
+            self._apply(db, user_id, {"active_roadmaps": 1 if is_active else -1})
+
+    def set_skill_count(self, db: Session, user_id: int, total_skills: int):
+        """The employee's skills were replaced"""
+        db.flush()
+        updated = db.execute(
+            update(EmployeeSummary)
+            .where(EmployeeSummary.user_id == user_id)
+            .values(total_skills=total_skills)
+        ).rowcount
+        if not updated:
+            self._insert(db, user_id)
+
+    def _apply(self, db: Session, user_id: int, deltas: Dict[str, int]):
+        """Add deltas to the employee's row (committed with the caller's transaction)"""
+        db.flush()
+        values = {name: getattr(EmployeeSummary, name) + delta for name, delta in deltas.items()}
+        updated = db.execute(
+            update(EmployeeSummary).where(EmployeeSummary.user_id == user_id).values(**values)
+        ).rowcount
+        if not updated:
+            self._insert(db, user_id, deltas)
+
+    def _insert(self, db: Session, user_id: int, deltas: Dict[str, int] = None):
+        """Create the row from the raw tables, or apply deltas if a concurrent write created it first"""
+        row = EmployeeSummary(user_id=user_id, **self.compute(db, [user_id]).get(user_id, self._zero()))
+        try:
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            if deltas:
+                values = {name: getattr(EmployeeSummary, name) + delta for name, delta in deltas.items()}
+            else:
+                values = {"total_skills": row.total_skills}
+            db.execute(update(EmployeeSummary).where(EmployeeSummary.user_id == user_id).values(**values))
+
+    def _zero(self) -> Dict[str, int]:
+        return {name: 0 for name in SUMMARY_COLUMNS}
+
+    def compute(self, db: Session, user_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """Totals of users from the raw tables, one grouped query per table"""
+        totals = {user_id: self._zero() for user_id in user_ids}
+        for user_id, count in db.query(
+            EmployeeSkill.user_id, func.count(EmployeeSkill.id)
+        ).filter(EmployeeSkill.user_id.in_(user_ids)).group_by(EmployeeSkill.user_id):
+            totals[user_id]["total_skills"] = count
+        for user_id, count, points in db.query(
+            AssessmentResult.user_id,
+            func.count(AssessmentResult.id),
+            func.coalesce(func.sum(AssessmentResult.points_earned), 0)
+        ).filter(AssessmentResult.user_id.in_(user_ids)).group_by(AssessmentResult.user_id):
+            totals[user_id]["total_assessments"] = count
+            totals[user_id]["total_points"] = int(points)
+        for user_id, count in db.query(
+            LearningRoadmap.user_id, func.count(LearningRoadmap.id)
+        ).filter(
+            LearningRoadmap.user_id.in_(user_ids),
+            LearningRoadmap.status.in_(ACTIVE_ROADMAP_STATUSES)
+        ).group_by(LearningRoadmap.user_id):
+            totals[user_id]["active_roadmaps"] = count
+        return totals
+
+    def rebuild(self, db: Session, chunk_size: int = 500) -> int:
+        """Recompute every employee's row from the raw tables, committing chunk by chunk"""
+        return self._backfill(db, chunk_size, missing_only=False)
+
+    def backfill_missing(self, db: Session, chunk_size: int = 500) -> int:
+        """Create the rows of employees that have none, committing chunk by chunk"""
+        return self._backfill(db, chunk_size, missing_only=True)
+
+    def _backfill(self, db: Session, chunk_size: int, missing_only: bool) -> int:
+        written = 0
+        last_id = 0
+        while True:
+            query = db.query(User.id).filter(User.role == UserRole.EMPLOYEE, User.id > last_id)
+            if missing_only:
+                query = query.outerjoin(
+                    EmployeeSummary, EmployeeSummary.user_id == User.id
+                ).filter(EmployeeSummary.user_id.is_(None))
+            user_ids = [user_id for (user_id,) in query.order_by(User.id).limit(chunk_size)]
+            if not user_ids:
+                break
+            totals = self.compute(db, user_ids)
+            if not missing_only:
+                db.query(EmployeeSummary).filter(
+                    EmployeeSummary.user_id.in_(user_ids)
+                ).delete(synchronize_session=False)
+            db.bulk_insert_mappings(
+                EmployeeSummary,
+                [{"user_id": user_id, **values} for user_id, values in totals.items()]
+            )
+            try:
+                db.commit()
+                written += len(user_ids)
+            except IntegrityError:
+                # Rows created meanwhile by writes or another worker's backfill
+                db.rollback()
+                for user_id, values in totals.items():
+                    try:
+                        with db.begin_nested():
+                            db.add(EmployeeSummary(user_id=user_id, **values))
+                        written += 1
+                    except IntegrityError:
+                        pass
+                db.commit()
+            last_id = user_ids[-1]
+        return written
+
+
+# Singleton instance
+employee_summary_service = EmployeeSummaryService()
+
+
+def main():
+    """Backfill employee_summary: python -m services.employee_summary_service"""
+    parser = argparse.ArgumentParser(description="Rebuild the employee_summary table from the raw tables")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt the summary of {employee_summary_service.rebuild(db, args.chunk_size)} employees")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import json
+import hashlib
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
+from anyio import to_thread
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models.user import User
+from models.job import JobDescription
+from models.skill import EmployeeSkill
+from models.gap_analysis import GapAnalysisResult
+from services.openai_service import openai_service
+from services.vector_service import vector_service
+
+
+class GapAnalysisService:
+    """
+    Materialized gap analysis per employee.
+
+    The combined vector and AI result is stored in gap_analysis_results with a
+    fingerprint of the inputs it was computed from (the employee's skills, the
+    job description and the job title). Writes to those inputs mark affected
+    rows stale; a fresh row is served with a single indexed read, a stale one
+    is recomputed only if its fingerprint actually changed. Database reads
+    and writes and the vector comparison run in worker threads, off the
+    event loop.
+    """
+
+    def fingerprint(self, skills: List[EmployeeSkill], jd: JobDescription, job_title: str) -> str:
+        """Hash of everything the gap analysis of an employee depends on"""
+        payload = {
+            "skills": sorted(
+                (s.skill_name, s.proficiency_level.value, float(s.years_of_experience or 0))
+                for s in skills
+            ),
+            "job_description": {
+                "id": jd.id,
+                "required_skills": jd.required_skills,
+                "required_years_of_experience": float(jd.required_years_of_experience)
+            },
+            "job_title": job_title
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    async def get_gap_analysis(
+        self,
+        db: Session,
+        user: User,
+        jd: Optional[JobDescription] = None,
+        skills: Optional[List[EmployeeSkill]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Gap analysis of an employee against their job title's job description,
+        or None if they have no job title, job description or skills.
+        jd and skills are loaded when not given and only needed on a miss.
+        """
+        if not user.job_title_id:
+            return None
+
+        stored, inputs = await to_thread.run_sync(self._lookup, db, user, jd, skills)
+        if inputs is None:
+            return stored
+
+        skills, jd, job_title, fingerprint = inputs
+        result, complete = await self._compute(skills, jd, job_title)
+        if complete:
+            await to_thread.run_sync(self._store, db, user, jd, fingerprint, result)
+        return result
+
+    def _lookup(
+        self,
+        db: Session,
+        user: User,
+        jd: Optional[JobDescription],
+        skills: Optional[List[EmployeeSkill]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple]]:
+        """
+        (stored result, None) when there is an up-to-date result or nothing to
+        analyze, else (None, (skills, jd, job title, fingerprint)) to compute
+        """
+        row = db.query(GapAnalysisResult).filter(GapAnalysisResult.user_id == user.id).first()
+        if row is not None and not row.is_stale and row.job_title_id == user.job_title_id:
+            return row.result, None
+
+        if jd is None:
+            jd = db.query(JobDescription).filter(JobDescription.job_title_id == user.job_title_id).first()
+        if skills is None:
+            skills = db.query(EmployeeSkill).filter(EmployeeSkill.user_id == user.id).all()
+        if jd is None or not skills:
+            return None, None
+
+        job_title = user.job_title.title
+        fingerprint = self.fingerprint(skills, jd, job_title)
+        if row is not None and row.fingerprint == fingerprint:
+            # Invalidated, but nothing it depends on actually changed
+            row.is_stale = False
+            row.job_title_id = user.job_title_id
+            db.commit()
+            return row.result, None
+
+        return None, (skills, jd, job_title, fingerprint)
+
+    async def _compute(self, skills: List[EmployeeSkill], jd: JobDescription, job_title: str):
+        """Combined vector and AI analysis, and whether the AI part succeeded"""
+        employee_skills_data = [
+            {
+                "skill_name": s.skill_name,
+                "proficiency_level": s.proficiency_level.value,
+                "years_of_experience": float(s.years_of_experience)
+            }
+            for s in skills
+        ]
+        required_skills = jd.required_skills
+
+        # Vector-based comparison
+        vector_comparison = await to_thread.run_sync(partial(
+            vector_service.compare_skill_sets,
+            employee_skills_data,
+            required_skills,
+            job_description_id=jd.id
+        ))
+
+        # AI-based gap analysis; without it (throttled, breaker open, bad
+        # response) the vector comparison stands alone, flagged as degraded,
+        # and nothing is persisted, so the next view retries
+        try:
+            ai_analysis = await openai_service.analyze_skill_gap(
+                employee_skills_data,
+                required_skills,
+                job_title,
+                float(jd.required_years_of_experience),
+                fallback=False
+            )
+            complete = True
+        except Exception as e:
+            print(f"Error analyzing skill gap: {str(e)}")
+            ai_analysis = {}
+            complete = False
+
+        # Combine results
+        result = {
+            "missing_skills": ai_analysis.get("missing_skills", vector_comparison["missing_skills"]),
+            "matched_skills": vector_comparison["matched_skills"],
+            "skills_to_improve": ai_analysis.get("skills_to_improve", []),
+            "gap_percentage": ai_analysis.get("gap_percentage", vector_comparison["gap_percentage"]),
+            "priority_areas": ai_analysis.get("priority_areas", []),
+            "estimated_time_to_bridge": ai_analysis.get("estimated_time_to_bridge", 0),
+            "similarity_scores": vector_comparison["similarity_scores"],
+            "degraded": not complete
+        }
+        return result, complete
+
+    def _store(self, db: Session, user: User, jd: JobDescription, fingerprint: str, result: Dict[str, Any]):
+        values = {
+            "job_title_id": user.job_title_id,
+            "job_description_id": jd.id,
+            "fingerprint": fingerprint,
+            "result": result,
+            "is_stale": False
+        }
+        row = db.query(GapAnalysisResult).filter(GapAnalysisResult.user_id == user.id).first()
+        if row is None:
+            db.add(GapAnalysisResult(user_id=user.id, **values))
+        else:
+            for key, value in values.items():
+                setattr(row, key, value)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request stored the same user's row first
+            db.rollback()
+
+    def invalidate_users(self, db: Session, user_ids: List[int]):
+        """Mark the stored analyses of users stale (committed with the caller's transaction)"""
+        db.query(GapAnalysisResult).filter(
+            GapAnalysisResult.user_id.in_(user_ids)
+        ).update({GapAnalysisResult.is_stale: True}, synchronize_session=False)
+
+    def invalidate_job_title(self, db: Session, job_title_id: int):
+        """Mark stale the stored analyses of every employee holding a job title"""
+        db.query(GapAnalysisResult).filter(
+            GapAnalysisResult.job_title_id == job_title_id
+        ).update({GapAnalysisResult.is_stale: True}, synchronize_session=False)
+
+
+# Singleton instance
+gap_analysis_service = GapAnalysisService()
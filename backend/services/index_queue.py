@@ -0,0 +1,138 @@
+import time
+import queue
+import threading
+import numpy as np
+from collections import deque
+from typing import List, Dict, Any
+from config import settings
+from services.vector_service import vector_service
+
+
+class IndexQueue:
+    """
+    In-process background worker for skill index updates.
+
+    submit-skills enqueues a user's skills and returns; the worker drains the
+    bounded queue, keeps only the latest submission per user, and applies a
+    whole burst as one index write.
+    """
+
+    _STOP = object()
+
+    def __init__(self, maxsize: int = 1000, coalesce_seconds: float = 0.2, max_batch: int = 500):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.coalesce_seconds = coalesce_seconds
+        self.max_batch = max_batch
+        self._thread = None
+
+        # Metrics
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.inline_fallbacks = 0
+        self.errors = 0
+        self.last_applied_at = None
+        self.lag_samples = deque(maxlen=1000)
+
+    def submit(self, user_id: int, skills: List[Dict[str, Any]]):
+        """Queue a replacement of a user's indexed skills"""
+        self.submitted += 1
+        item = (user_id, skills, time.time())
+        if self._thread is None or not self._thread.is_alive():
+            # No worker running (e.g. scripts, tests): index synchronously
+            self._apply([item])
+            return
+        try:
+            self.queue.put(item, timeout=1)
+        except queue.Full:
+            # Backpressure: index inline rather than drop the update
+            self.inline_fallbacks += 1
+            self._apply([item])
+
+    def start(self):
+        """Start the background worker"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="vector-index-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        """Flush pending updates and stop the worker"""
+        if not self._thread:
+            return
+        self.queue.put(self._STOP)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is self._STOP:
+                return
+
+            # Give a burst of submissions a moment to arrive, then take them all
+            batch = [item]
+            deadline = time.time() + self.coalesce_seconds
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._apply(batch)
+            if stop:
+                return
+
+    def _apply(self, batch: List[tuple]):
+        # Latest submission per user wins; lag is measured from the oldest one
+        skills_by_user = {}
+        enqueued_at = {}
+        for user_id, skills, submitted_at in batch:
+            skills_by_user[user_id] = skills
+            enqueued_at.setdefault(user_id, submitted_at)
+        self.coalesced += len(batch) - len(skills_by_user)
+
+        try:
+            vector_service.replace_users_skills(skills_by_user)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error applying skill index updates: {str(e)}")
+            return
+
+        now = time.time()
+        self.batches += 1
+        self.last_applied_at = now
+        self.lag_samples.extend(now - submitted_at for submitted_at in enqueued_at.values())
+
+    def status(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and submission-to-visibility lag"""
+        lags = np.array(self.lag_samples) if self.lag_samples else None
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "inline_fallbacks": self.inline_fallbacks,
+            "errors": self.errors,
+            "last_applied_at": self.last_applied_at,
+            "lag_seconds": {
+                "last": float(lags[-1]),
+                "p50": float(np.percentile(lags, 50)),
+                "p95": float(np.percentile(lags, 95)),
+                "max": float(lags.max())
+            } if lags is not None else None
+        }
+
+
+# Singleton instance
+index_queue = IndexQueue(
+    maxsize=settings.VECTOR_INDEX_QUEUE_SIZE,
+    coalesce_seconds=settings.VECTOR_INDEX_COALESCE_MS / 1000
+)
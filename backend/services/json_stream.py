@@ -0,0 +1,84 @@
+import json
+from typing import List, Tuple, Any, Iterable
+
+
+class JSONArrayStreamParser:
+    """
+    Incremental parser for a streamed JSON object that yields the items of
+    selected top-level arrays as soon as each item is complete.
+
+        parser = JSONArrayStreamParser(["milestones", "practice_tasks"])
+        for chunk in chunks:
+            for key, item in parser.feed(chunk):
+                ...
+
+    Items may be objects, arrays, strings or numbers. Only structure is
+    tracked (nesting depth, strings and escapes); each finished item is
+    decoded with json.loads, so the parser never holds more than the text.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self.text = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        self.current_key = None
+        self.array_key = None
+        self.item_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume the next chunk of text and return the array items it completed"""
+        self.text += chunk
+        items = []
+        text = self.text
+
+        for i in range(self.position, len(text)):
+            c = text[i]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_string = text[self.string_start + 1:i]
+                continue
+
+            # First character of an item in a streamed array
+            if self.array_key and self.depth == 2 and self.item_start is None and c not in " \t\r\n,]":
+                self.item_start = i
+
+            if c == '"':
+                self.in_string = True
+                self.string_start = i
+            elif c == ":" and self.depth == 1:
+                self.current_key = self.last_string
+            elif c in "{[":
+                self.depth += 1
+                if c == "[" and self.depth == 2 and self.current_key in self.keys:
+                    self.array_key = self.current_key
+                    self.item_start = None
+            elif c in "}]":
+                if c == "]" and self.depth == 2 and self.array_key:
+                    self._emit(i, items)
+                    self.array_key = None
+                self.depth -= 1
+            elif c == "," and self.depth == 2 and self.array_key:
+                self._emit(i, items)
+
+        self.position = len(text)
+        return items
+
+    def _emit(self, end: int, items: List[Tuple[str, Any]]):
+        if self.item_start is None:
+            return
+        raw = self.text[self.item_start:end].strip()
+        self.item_start = None
+        if raw:
+            items.append((self.array_key, json.loads(raw)))
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+class LLMCache:
+    """
+    Cache of LLM responses keyed by a canonical hash of the request.
+
+    The key covers everything that determines the completion (model,
+    messages, sampling parameters), serialized with sorted keys so equal
+    requests always hash the same. Each entry carries its own expiry, set
+    from the operation's TTL when it is stored. Two tiers:
+
+        memory  LRU of recently used entries, bounded by memory_size
+        disk    SQLite file shared by workers and kept across restarts,
+                bounded by max_entries (least recently used rows go first)
+
+    Expired and excess disk rows are evicted every evict_every puts or
+    evict_interval seconds rather than on every write, so the file may hold
+    up to evict_every rows over max_entries in between. The row count is kept
+    as a running total and recounted on the timed pass to pick up rows
+    written by other workers.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        memory_size: int = 1000,
+        max_entries: int = 100000,
+        evict_every: int = 100,
+        evict_interval: float = 60
+    ):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.evict_interval = evict_interval
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.stores = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                operation TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_responses_expires_at ON responses (expires_at)")
+        self.db.commit()
+
+        # Running row count and eviction schedule
+        self.entries = self._count()
+        self.puts_since_evict = 0
+        self.last_evict = time.time()
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Canonical hash of a completion request"""
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """The cached response for a key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return json.loads(response)
+                del self.memory[key]
+
+            row = self.db.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, expires_at = row
+            if expires_at <= now:
+                self.entries -= self.db.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+                self.db.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self._remember(key, response, expires_at)
+            self.hits += 1
+            return json.loads(response)
+
+    def put(self, key: str, operation: str, response: Any, ttl_seconds: float):
+        """Store a response for ttl_seconds (nothing is stored for a TTL of 0)"""
+        if ttl_seconds <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl_seconds
+        serialized = json.dumps(response)
+        with self._lock:
+            self._remember(key, serialized, expires_at)
+            exists = self.db.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, operation, response, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, operation, serialized, now, expires_at, now)
+            )
+            if exists is None:
+                self.entries += 1
+            self.stores += 1
+            self.puts_since_evict += 1
+            timed = now - self.last_evict >= self.evict_interval
+            if timed or self.puts_since_evict >= self.evict_every:
+                self._evict(now, recount=timed)
+            self.db.commit()
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        self.memory[key] = (response, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def _count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _evict(self, now: float, recount: bool = False):
+        # Expired rows first, then the least recently used beyond max_entries
+        self.puts_since_evict = 0
+        self.last_evict = now
+        expired = self.db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,)).rowcount
+        self.expired += expired
+        self.entries = self._count() if recount else self.entries - expired
+        excess = self.entries - self.max_entries
+        if excess > 0:
+            evicted = self.db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,)
+            ).rowcount
+            self.evictions += evicted
+            self.entries -= evicted
+
+    def clear(self, operation: Optional[str] = None) -> int:
+        """Drop cached responses (of one operation, or all), returning how many rows were removed"""
+        with self._lock:
+            if operation is None:
+                removed = self.db.execute("DELETE FROM responses").rowcount
+            else:
+                removed = self.db.execute("DELETE FROM responses WHERE operation = ?", (operation,)).rowcount
+            self.db.commit()
+            self.memory.clear()
+            self.entries = self._count()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = dict(self.db.execute("SELECT operation, COUNT(*) FROM responses GROUP BY operation").fetchall())
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "memory_entries": len(self.memory),
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "stores": self.stores,
+                "expired": self.expired,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,224 @@
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+import openai
+
+
+class LLMUnavailableError(Exception):
+    """The LLM cannot be called right now: breaker open, quota wait or retries past the deadline"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute up to capacity"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Return (or, if negative, charge) tokens after the real cost is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive upstream failures and rejects
+    calls for reset_seconds; then lets a single probe through (half-open)
+    and closes again on its success.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+
+    def before_call(self):
+        if self.state == "open":
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0:
+                raise LLMUnavailableError("OpenAI circuit breaker is open", retry_after=remaining)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                raise LLMUnavailableError("OpenAI circuit breaker is half-open", retry_after=1)
+            self.probe_in_flight = True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """A probe ended without telling anything about upstream health"""
+        self.probe_in_flight = False
+
+
+class LLMGuard:
+    """
+    Client-side protection shared by every OpenAIService call in a worker:
+
+        rate limiting   token buckets for requests/min and tokens/min; a call
+                        waits for capacity, or fails if that would pass its
+                        deadline
+        retries         throttling, timeouts, connection and 5xx errors are
+                        retried with full-jitter exponential backoff (or the
+                        server's Retry-After) within a per-call deadline
+        circuit breaker consecutive failures stop calls for a while so the
+                        API can recover and callers fail fast
+
+    Limits are per process; with several workers, divide the account quota.
+    """
+
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError
+    )
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int = 2,
+        deadline_seconds: float = 60,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 8,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_seconds: float = 30
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.deadline_seconds = deadline_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = CircuitBreaker(breaker_failure_threshold, breaker_reset_seconds)
+        # Waiters take capacity in arrival order
+        self._acquire_lock = asyncio.Lock()
+
+        # Counters
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited_waits = 0
+        self.rejected = 0
+        self.upstream_failures = 0
+
+    async def call(self, func: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """Run func (one API request) under the limiter, retry policy and breaker"""
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except LLMUnavailableError:
+                self.rejected += 1
+                raise
+            try:
+                await self._acquire(estimated_tokens, deadline)
+            except LLMUnavailableError:
+                self.breaker.release()
+                self.rejected += 1
+                raise
+
+            self.calls += 1
+            try:
+                result = await asyncio.wait_for(func(), timeout=max(deadline - time.monotonic(), 0.001))
+            except (asyncio.TimeoutError, *self.RETRYABLE_ERRORS) as e:
+                self.upstream_failures += 1
+                self.breaker.record_failure()
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                    raise LLMUnavailableError(f"OpenAI request failed: {str(e) or type(e).__name__}") from e
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Bad requests and the like say nothing about upstream health
+                self.breaker.release()
+                raise
+
+            self.breaker.record_success()
+            usage = getattr(result, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.token_bucket.give_back(estimated_tokens - usage.total_tokens)
+            return result
+
+    async def _acquire(self, estimated_tokens: int, deadline: float):
+        async with self._acquire_lock:
+            while True:
+                wait = max(self.request_bucket.wait_time(1), self.token_bucket.wait_time(estimated_tokens))
+                if wait == 0:
+                    self.request_bucket.take(1)
+                    self.token_bucket.take(estimated_tokens)
+                    return
+                if time.monotonic() + wait >= deadline:
+                    raise LLMUnavailableError("OpenAI rate limit wait exceeds the request deadline", retry_after=wait)
+                self.rate_limited_waits += 1
+                await asyncio.sleep(wait)
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Full jitter
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * (2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "times_opened": self.breaker.times_opened
+            },
+            "available": {
+                "requests": round(self.request_bucket.tokens, 2),
+                "tokens": round(self.token_bucket.tokens, 2)
+            },
+            "calls": self.calls,
+            "retries": self.retries,
+            "rate_limited_waits": self.rate_limited_waits,
+            "rejected": self.rejected,
+            "upstream_failures": self.upstream_failures
+        }
@@ -1,16 +1,222 @@
-from typing import List, Dict, Any
-from openai import OpenAI
+import copy
+import json
+import time
+import asyncio
+import httpx
+from anyio import to_thread
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from openai import AsyncOpenAI
 from config import settings
+from services.llm_cache import LLMCache
+from services.llm_guard import LLMGuard, LLMUnavailableError
+from services.usage_tracker import UsageTracker
+from services.json_stream import JSONArrayStreamParser
+
+# Roadmap arrays streamed item by item
+ROADMAP_STREAM_KEYS = ("milestones", "course_recommendations", "practice_tasks")
 
 
 class OpenAIService:
     def __init__(self):
-        self.client = OpenAI(
+        # One shared connection pool for every LLM call in the worker. Calls
+        # are awaited rather than run in threads, so the number of in-flight
+        # requests is bounded by OPENAI_MAX_CONNECTIONS, not the threadpool;
+        # callers beyond that wait up to the pool timeout for a connection.
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(
+                settings.OPENAI_TIMEOUT_SECONDS,
+                connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS
+            )
+        )
+        self.client = AsyncOpenAI(
             api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
+            base_url=settings.OPENAI_BASE_URL,
+            http_client=self.http_client,
+            # Retries are done by the guard, within its deadline and quota
+            max_retries=0
+        )
+
+        # Rate limiter, retry policy and circuit breaker around every API request
+        self.guard = LLMGuard(
+            requests_per_minute=settings.OPENAI_RATE_LIMIT_RPM,
+            tokens_per_minute=settings.OPENAI_RATE_LIMIT_TPM,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            deadline_seconds=settings.OPENAI_DEADLINE_SECONDS,
+            backoff_base_seconds=settings.OPENAI_BACKOFF_BASE_SECONDS,
+            backoff_max_seconds=settings.OPENAI_BACKOFF_MAX_SECONDS,
+            breaker_failure_threshold=settings.OPENAI_BREAKER_FAILURE_THRESHOLD,
+            breaker_reset_seconds=settings.OPENAI_BREAKER_RESET_SECONDS
         )
+
+        # Responses are cached per operation; a TTL of 0 disables caching.
+        # The cache does SQLite I/O, so it is called from a worker thread
+        self.cache = LLMCache(
+            settings.OPENAI_CACHE_PATH,
+            memory_size=settings.OPENAI_CACHE_MEMORY_SIZE,
+            max_entries=settings.OPENAI_CACHE_MAX_ENTRIES,
+            evict_every=settings.OPENAI_CACHE_EVICT_EVERY_PUTS,
+            evict_interval=settings.OPENAI_CACHE_EVICT_INTERVAL_SECONDS
+        )
+        self.cache_ttls = {
+            "quiz_questions": settings.OPENAI_CACHE_TTL_QUIZ_SECONDS,
+            "skill_gap": settings.OPENAI_CACHE_TTL_SKILL_GAP_SECONDS,
+            "learning_roadmap": settings.OPENAI_CACHE_TTL_ROADMAP_SECONDS,
+            "career_progression": settings.OPENAI_CACHE_TTL_CAREER_SECONDS
+        }
+
+        # Per-call token, latency and cache accounting
+        self.usage = UsageTracker(
+            settings.OPENAI_USAGE_PATH,
+            retention_days=settings.OPENAI_USAGE_RETENTION_DAYS
+        )
+
+        # Single flight: cache key -> task of the one upstream call in progress
+        self.in_flight = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    async def close(self):
+        """Close the shared HTTP connection pool and write pending usage records"""
+        await self.client.close()
+        await to_thread.run_sync(self.usage.flush)
+
+    async def _complete_json(
+        self,
+        operation: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        truncated: bool = False
+    ) -> Any:
+        """
+        Run a JSON-mode chat completion and return the parsed content.
+        Served from the cache when an identical request was answered within
+        the operation's TTL; only successfully parsed responses are cached.
+        Identical requests that arrive while one is in flight wait for it and
+        share its result (or its error) instead of calling the API again.
+        Every call is recorded in the usage store.
+        """
+        started = time.perf_counter()
+        request = self._json_request(messages, temperature)
+        ttl = self.cache_ttls.get(operation, 0)
+        key = self.cache.key(request)
+        if ttl > 0:
+            cached = await to_thread.run_sync(self.cache.get, key)
+            if cached is not None:
+                self._record_usage(operation, request, "hit", "ok", started, truncated=truncated)
+                return cached
+
+        task = self.in_flight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(self._fetch_json(key, operation, request, ttl))
+            self.in_flight[key] = task
+            self.upstream_calls += 1
+            task.add_done_callback(lambda done: self._finish_flight(key, done))
+        else:
+            self.coalesced_calls += 1
+        cache_status = "miss" if leader else "coalesced"
+
+        # Shielded: a caller that disconnects does not cancel the call for the others
+        try:
+            result, usage = await asyncio.shield(task)
+        except Exception as e:
+            status = "unavailable" if isinstance(e, LLMUnavailableError) else "error"
+            self._record_usage(operation, request, cache_status, status, started, truncated=truncated)
+            raise
+        # Only the caller that made the upstream call is charged its tokens
+        self._record_usage(operation, request, cache_status, "ok", started, usage if leader else None, truncated)
+        return copy.deepcopy(result)
+
+    def _json_request(self, messages: List[Dict[str, str]], temperature: float) -> Dict[str, Any]:
+        return {
+            "model": "gpt-4",
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": {"type": "json_object"}
+        }
+
+    def _prompt_chars(self, request: Dict[str, Any]) -> int:
+        return sum(len(m["content"]) for m in request["messages"])
+
+    def _estimate_tokens(self, request: Dict[str, Any]) -> int:
+        """Rough token cost of a request for the tokens/min limit (about 4 characters per token)"""
+        return self._prompt_chars(request) // 4 + settings.OPENAI_COMPLETION_TOKENS_ESTIMATE
+
+    def _record_usage(
+        self,
+        operation: str,
+        request: Dict[str, Any],
+        cache: str,
+        status: str,
+        started: float,
+        usage: Optional[Tuple[int, int]] = None,
+        truncated: bool = False
+    ):
+        prompt_tokens, completion_tokens = usage or (0, 0)
+        self.usage.record(
+            operation, request["model"], cache, status,
+            prompt_chars=self._prompt_chars(request),
+            latency_ms=(time.perf_counter() - started) * 1000,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            truncated=truncated
+        )
+
+    def _fit_budget(self, items: List[str], fixed_chars: int, noun: str) -> Tuple[List[str], bool]:
+        """
+        Keep the leading items (callers put the most relevant first) that fit
+        the prompt budget next to fixed_chars of other prompt text; the rest
+        are summarized as a count. Returns the items and whether any were cut.
+        """
+        budget_chars = settings.OPENAI_PROMPT_BUDGET_TOKENS * 4
+        if not budget_chars or fixed_chars + len(", ".join(items)) <= budget_chars:
+            return items, False
+        kept, used = [], fixed_chars
+        for item in items:
+            used += len(item) + 2
+            if used > budget_chars:
+                break
+            kept.append(item)
+        kept.append(f"and {len(items) - len(kept)} other {noun}")
+        return kept, True
+
+    async def _create(self, request: Dict[str, Any], **kwargs) -> Any:
+        """One chat completion request through the guard"""
+        return await self.guard.call(
+            lambda: self.client.chat.completions.create(**request, **kwargs),
+            self._estimate_tokens(request)
+        )
+
+    async def _fetch_json(self, key: str, operation: str, request: Dict[str, Any], ttl: float) -> Any:
+        response = await self._create(request)
+        result = json.loads(response.choices[0].message.content)
+        await to_thread.run_sync(self.cache.put, key, operation, result, ttl)
+        usage = (response.usage.prompt_tokens, response.usage.completion_tokens) if response.usage else None
+        return result, usage
+
+    def _finish_flight(self, key: str, task: asyncio.Future):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Mark a failure as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def flight_stats(self) -> Dict[str, Any]:
+        """Single-flight coalescing counters"""
+        total = self.upstream_calls + self.coalesced_calls
+        return {
+            "in_flight": len(self.in_flight),
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "coalesced_ratio": round(self.coalesced_calls / total, 4) if total else None
+        }
     
-    def generate_quiz_questions(
+    async def generate_quiz_questions(
         self,
         skill_name: str,
         job_title: str,
@@ -46,19 +252,15 @@ Make questions relevant to {experience_level_years} years of experience and {dif
 Focus on practical, real-world scenarios that a {job_title} would encounter."""
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
+            result = await self._complete_json(
+                "quiz_questions",
+                [
                     {"role": "system", "content": "You are an expert technical interviewer and assessment creator. Generate high-quality, practical quiz questions."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
+                temperature=0.7
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
-            
             # Extract questions array from response
             if isinstance(result, dict) and "questions" in result:
                 return result["questions"]
@@ -67,28 +269,72 @@ Focus on practical, real-world scenarios that a {job_title} would encounter."""
             else:
                 return []
                 
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             print(f"Error generating quiz questions: {str(e)}")
             return []
     
-    def analyze_skill_gap(
+    async def analyze_skill_gap(
         self,
         employee_skills: List[Dict[str, Any]],
         required_skills: List[str],
         job_title: str,
-        required_experience_years: float
+        required_experience_years: float,
+        fallback: bool = True
     ) -> Dict[str, Any]:
         """
         Use OpenAI to analyze skill gaps and provide insights
+        With fallback=False errors are raised instead of returning an empty analysis;
+        LLMUnavailableError (throttled, breaker open) is always raised
         """
-        employee_skills_str = ", ".join([
+        # Skills the job asks for first, so a prompt budget drops the least relevant
+        required = {skill.lower() for skill in required_skills}
+        ranked_skills = sorted(employee_skills, key=lambda s: s["skill_name"].lower() not in required)
+        employee_skill_entries = [
             f"{s['skill_name']} ({s['proficiency_level']}, {s['years_of_experience']}y)"
-            for s in employee_skills
-        ])
+            for s in ranked_skills
+        ]
         
         required_skills_str = ", ".join(required_skills)
         
-        prompt = f"""Analyze the skill gap for an employee aspiring to be a {job_title} (requires {required_experience_years} years experience).
+        fixed_chars = len(self._skill_gap_prompt("", required_skills_str, job_title, required_experience_years))
+        employee_skill_entries, truncated = self._fit_budget(employee_skill_entries, fixed_chars, "skills")
+        prompt = self._skill_gap_prompt(
+            ", ".join(employee_skill_entries), required_skills_str, job_title, required_experience_years
+        )
+
+        try:
+            return await self._complete_json(
+                "skill_gap",
+                [
+                    {"role": "system", "content": "You are a career development expert specializing in skill gap analysis."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                truncated=truncated
+            )
+            
+        except Exception as e:
+            if not fallback or isinstance(e, LLMUnavailableError):
+                raise
+            print(f"Error analyzing skill gap: {str(e)}")
+            return {
+                "missing_skills": [],
+                "skills_to_improve": [],
+                "gap_percentage": 0,
+                "priority_areas": [],
+                "estimated_time_to_bridge": 0
+            }
+    
+    def _skill_gap_prompt(
+        self,
+        employee_skills_str: str,
+        required_skills_str: str,
+        job_title: str,
+        required_experience_years: float
+    ) -> str:
+        return f"""Analyze the skill gap for an employee aspiring to be a {job_title} (requires {required_experience_years} years experience).
 
 Employee's Current Skills:
 {employee_skills_str}
@@ -104,42 +350,101 @@ Provide a JSON response with:
 5. "estimated_time_to_bridge": Estimated weeks to bridge the gap with dedicated learning
 
 Be realistic and specific."""
-
+    
+    async def generate_learning_roadmap(
+        self,
+        skill_name: str,
+        current_level: str,
+        target_level: str,
+        gap_percentage: float,
+        job_title: str
+    ) -> Dict[str, Any]:
+        """
+        Generate a personalized learning roadmap using OpenAI
+        """
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a career development expert specializing in skill gap analysis."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                response_format={"type": "json_object"}
+            return await self._complete_json(
+                "learning_roadmap",
+                self._roadmap_messages(skill_name, current_level, target_level, gap_percentage, job_title),
+                temperature=0.7
             )
             
-            import json
-            return json.loads(response.choices[0].message.content)
-            
+        except LLMUnavailableError:
+            raise
         except Exception as e:
-            print(f"Error analyzing skill gap: {str(e)}")
+            print(f"Error generating learning roadmap: {str(e)}")
             return {
-                "missing_skills": [],
-                "skills_to_improve": [],
-                "gap_percentage": 0,
-                "priority_areas": [],
-                "estimated_time_to_bridge": 0
+                "milestones": [],
+                "course_recommendations": [],
+                "practice_tasks": [],
+                "estimated_completion_weeks": 0,
+                "daily_time_commitment": 0
             }
     
-    def generate_learning_roadmap(
+    async def stream_learning_roadmap(
         self,
         skill_name: str,
         current_level: str,
         target_level: str,
         gap_percentage: float,
         job_title: str
-    ) -> Dict[str, Any]:
+    ) -> AsyncIterator[Tuple[str, Any]]:
         """
-        Generate a personalized learning roadmap using OpenAI
+        Generate a learning roadmap with a streamed completion.
+        Yields (array_name, item) for each milestone, course recommendation and
+        practice task as soon as it is complete, then ("roadmap", full_result).
+        Shares the response cache with generate_learning_roadmap; errors are raised.
         """
+        started = time.perf_counter()
+        request = self._json_request(
+            self._roadmap_messages(skill_name, current_level, target_level, gap_percentage, job_title),
+            temperature=0.7
+        )
+        ttl = self.cache_ttls.get("learning_roadmap", 0)
+        key = self.cache.key(request)
+        if ttl > 0:
+            cached = await to_thread.run_sync(self.cache.get, key)
+            if cached is not None:
+                self._record_usage("learning_roadmap", request, "hit", "ok", started)
+                for name in ROADMAP_STREAM_KEYS:
+                    for item in cached.get(name) or []:
+                        yield name, item
+                yield "roadmap", cached
+                return
+
+        parser = JSONArrayStreamParser(ROADMAP_STREAM_KEYS)
+        content = []
+        usage = None
+        try:
+            stream = await self._create(request, stream=True, stream_options={"include_usage": True})
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = (chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                content.append(delta)
+                for name, item in parser.feed(delta):
+                    yield name, item
+
+            result = json.loads("".join(content))
+        except Exception as e:
+            status = "unavailable" if isinstance(e, LLMUnavailableError) else "error"
+            self._record_usage("learning_roadmap", request, "miss", status, started, usage)
+            raise
+
+        self._record_usage("learning_roadmap", request, "miss", "ok", started, usage)
+        await to_thread.run_sync(self.cache.put, key, "learning_roadmap", result, ttl)
+        yield "roadmap", result
+    
+    def _roadmap_messages(
+        self,
+        skill_name: str,
+        current_level: str,
+        target_level: str,
+        gap_percentage: float,
+        job_title: str
+    ) -> List[Dict[str, str]]:
         prompt = f"""Create a detailed learning roadmap for improving {skill_name} skills.
 
 Current Level: {current_level}
@@ -161,31 +466,12 @@ Provide a JSON response with:
 
 Make recommendations specific, actionable, and realistic."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a learning and development expert who creates personalized learning roadmaps."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-            
-            import json
-            return json.loads(response.choices[0].message.content)
-            
-        except Exception as e:
-            print(f"Error generating learning roadmap: {str(e)}")
-            return {
-                "milestones": [],
-                "course_recommendations": [],
-                "practice_tasks": [],
-                "estimated_completion_weeks": 0,
-                "daily_time_commitment": 0
-            }
+        return [
+            {"role": "system", "content": "You are a learning and development expert who creates personalized learning roadmaps."},
+            {"role": "user", "content": prompt}
+        ]
     
-    def suggest_career_progression(
+    async def suggest_career_progression(
         self,
         current_job_title: str,
         current_skills: List[str],
@@ -195,41 +481,25 @@ Make recommendations specific, actionable, and realistic."""
         """
         Suggest next career step based on current skills and experience
         """
-        skills_str = ", ".join(current_skills)
         roles_str = ", ".join(available_next_roles)
         
-        prompt = f"""Analyze career progression options for an employee.
-
-Current Role: {current_job_title}
-Years of Experience: {years_of_experience}
-Current Skills: {skills_str}
-
-Available Next Level Roles:
-{roles_str}
-
-Provide a JSON response with:
-1. "recommended_role": The best next role to target
-2. "readiness_percentage": How ready they are (0-100)
-3. "reasons": Array of reasons for this recommendation
-4. "skills_needed": Array of additional skills needed for the role
-5. "timeline": Estimated months until ready
-
-Be honest and constructive."""
+        fixed_chars = len(self._career_prompt(current_job_title, "", years_of_experience, roles_str))
+        skill_entries, truncated = self._fit_budget(list(current_skills), fixed_chars, "skills")
+        prompt = self._career_prompt(current_job_title, ", ".join(skill_entries), years_of_experience, roles_str)
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
+            return await self._complete_json(
+                "career_progression",
+                [
                     {"role": "system", "content": "You are a career counselor specializing in software development career paths."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.6,
-                response_format={"type": "json_object"}
+                truncated=truncated
             )
             
-            import json
-            return json.loads(response.choices[0].message.content)
-            
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             print(f"Error suggesting career progression: {str(e)}")
             return {
@@ -240,6 +510,31 @@ Be honest and constructive."""
                 "timeline": 0
             }
 
+    def _career_prompt(
+        self,
+        current_job_title: str,
+        skills_str: str,
+        years_of_experience: float,
+        roles_str: str
+    ) -> str:
+        return f"""Analyze career progression options for an employee.
+
+Current Role: {current_job_title}
+Years of Experience: {years_of_experience}
+Current Skills: {skills_str}
+
+Available Next Level Roles:
+{roles_str}
+
+Provide a JSON response with:
+1. "recommended_role": The best next role to target
+2. "readiness_percentage": How ready they are (0-100)
+3. "reasons": Array of reasons for this recommendation
+4. "skills_needed": Array of additional skills needed for the role
+5. "timeline": Estimated months until ready
+
+Be honest and constructive."""
+
 
 # Singleton instance
 openai_service = OpenAIService()
@@ -0,0 +1,218 @@
+import asyncio
+from datetime import datetime
+from anyio import to_thread
+from typing import List, Dict, Any, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from config import settings
+from database.connection import SessionLocal
+from models.job import JobTitle, JobDescription
+from models.quiz import QuizQuestion, QuizGenerationJob, QuizJobStatus
+from models.skill import ProficiencyLevel
+from services.openai_service import openai_service
+
+
+class QuizGenerationService:
+    """
+    Bulk quiz generation for every required skill of a job description.
+
+    A job fans out one LLM call per (skill, difficulty) on the event loop,
+    at most `concurrency` at a time, and inserts the generated questions in
+    batches of `batch_size` rows. Progress is kept in quiz_generation_jobs so
+    any worker can report it. A failed combination is recorded on the job and
+    the rest carry on. Database writes run in worker threads, off the event
+    loop.
+    """
+
+    def __init__(self, concurrency: int = 4, batch_size: int = 50):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        # Running job tasks (the event loop only keeps weak references)
+        self.tasks = set()
+
+    async def start_job(
+        self,
+        db: Session,
+        job_title: JobTitle,
+        jd: JobDescription,
+        difficulty_levels: List[ProficiencyLevel],
+        num_questions: int,
+        experience_level_years: float,
+        created_by: int
+    ) -> QuizGenerationJob:
+        """Create a job and start generating in the background"""
+        skills = list(dict.fromkeys(jd.required_skills))
+        difficulty_levels = list(dict.fromkeys(difficulty_levels))
+        combinations = [(skill, difficulty) for skill in skills for difficulty in difficulty_levels]
+
+        job = QuizGenerationJob(
+            job_title_id=job_title.id,
+            job_description_id=jd.id,
+            status=QuizJobStatus.PENDING,
+            difficulty_levels=[d.value for d in difficulty_levels],
+            num_questions=num_questions,
+            total_tasks=len(combinations),
+            errors=[],
+            created_by=created_by
+        )
+        await to_thread.run_sync(self._add_job, db, job)
+
+        task = asyncio.create_task(self._run(
+            job.id, job_title.id, job_title.title, combinations,
+            num_questions, experience_level_years, created_by
+        ))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return job
+
+    def _add_job(self, db: Session, job: QuizGenerationJob):
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+    async def _run(
+        self,
+        job_id: int,
+        job_title_id: int,
+        job_title: str,
+        combinations: List[Tuple[str, ProficiencyLevel]],
+        num_questions: int,
+        experience_level_years: float,
+        created_by: int
+    ):
+        db = SessionLocal()
+        try:
+            job = await to_thread.run_sync(self._begin, db, job_id)
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def generate(skill: str, difficulty: ProficiencyLevel):
+                async with semaphore:
+                    try:
+                        questions = await openai_service.generate_quiz_questions(
+                            skill_name=skill,
+                            job_title=job_title,
+                            experience_level_years=experience_level_years,
+                            difficulty_level=difficulty.value,
+                            num_questions=num_questions
+                        )
+                        error = None if questions else "No questions generated"
+                    except Exception as e:
+                        questions, error = [], str(e)
+                    return skill, difficulty, questions, error
+
+            pending_rows = []
+            errors = []
+            completed = failed = 0
+            for finished in asyncio.as_completed([generate(*c) for c in combinations]):
+                skill, difficulty, questions, error = await finished
+                if error:
+                    failed += 1
+                    errors.append({"skill_name": skill, "difficulty_level": difficulty.value, "error": error})
+                else:
+                    completed += 1
+                    pending_rows.extend(
+                        self._question_row(q, job_title_id, skill, difficulty, experience_level_years, created_by)
+                        for q in questions
+                    )
+
+                # Progress after every combination, questions once a batch is full
+                rows = []
+                if len(pending_rows) >= self.batch_size:
+                    rows, pending_rows = pending_rows, []
+                await to_thread.run_sync(self._flush, db, job, rows, errors, completed, failed)
+
+            await to_thread.run_sync(self._finish, db, job, pending_rows, errors, completed, failed)
+
+        except BaseException as e:
+            # Includes cancellation at shutdown: never leave a job "running"
+            if isinstance(e, Exception):
+                await to_thread.run_sync(self._fail, db, job_id, e)
+            else:
+                self._fail(db, job_id, e)
+            print(f"Error running quiz generation job {job_id}: {str(e)}")
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            db.close()
+
+    def _begin(self, db: Session, job_id: int) -> QuizGenerationJob:
+        job = db.query(QuizGenerationJob).filter(QuizGenerationJob.id == job_id).first()
+        job.status = QuizJobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        db.commit()
+        return job
+
+    def _finish(
+        self,
+        db: Session,
+        job: QuizGenerationJob,
+        rows: List[Dict[str, Any]],
+        errors: List[Dict[str, Any]],
+        completed: int,
+        failed: int
+    ):
+        if failed == 0:
+            job.status = QuizJobStatus.COMPLETED
+        elif completed > 0:
+            job.status = QuizJobStatus.COMPLETED_WITH_ERRORS
+        else:
+            job.status = QuizJobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+        self._flush(db, job, rows, errors, completed, failed)
+
+    def _fail(self, db: Session, job_id: int, error: BaseException):
+        db.rollback()
+        job = db.query(QuizGenerationJob).filter(QuizGenerationJob.id == job_id).first()
+        if job is not None:
+            job.status = QuizJobStatus.FAILED
+            job.errors = (job.errors or []) + [{"error": str(error) or type(error).__name__}]
+            job.finished_at = datetime.utcnow()
+            db.commit()
+
+    def _question_row(
+        self,
+        question: Dict[str, Any],
+        job_title_id: int,
+        skill: str,
+        difficulty: ProficiencyLevel,
+        experience_level_years: float,
+        created_by: int
+    ) -> Dict[str, Any]:
+        return {
+            "job_title_id": job_title_id,
+            "skill_name": skill,
+            "question_text": question.get("question_text", ""),
+            "options": question.get("options", {}),
+            "correct_answer": question.get("correct_answer", ""),
+            "difficulty_level": difficulty,
+            "experience_level_years": experience_level_years,
+            "explanation": question.get("explanation", ""),
+            "created_by": created_by,
+            "is_active": True
+        }
+
+    def _flush(
+        self,
+        db: Session,
+        job: QuizGenerationJob,
+        rows: List[Dict[str, Any]],
+        errors: List[Dict[str, Any]],
+        completed: int,
+        failed: int
+    ):
+        """Insert a batch of questions and the job's progress in one transaction"""
+        if rows:
+            db.execute(insert(QuizQuestion), rows)
+            job.questions_created += len(rows)
+        job.completed_tasks = completed
+        job.failed_tasks = failed
+        job.errors = list(errors)
+        db.commit()
+
+
+# Singleton instance
+quiz_generation_service = QuizGenerationService(
+    concurrency=settings.QUIZ_BULK_CONCURRENCY,
+    batch_size=settings.QUIZ_BULK_INSERT_BATCH_SIZE
+)
@@ -0,0 +1,253 @@
+import io
+import csv
+import json
+import asyncio
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional
+from anyio import from_thread, to_thread
+from sqlalchemy.orm import Session
+from config import settings
+from database.connection import SessionLocal
+from models.user import User, UserRole
+from models.job import JobTitle
+from models.skill import EmployeeSkill
+from models.roadmap import LearningRoadmap
+from models.gap_analysis import GapAnalysisResult
+from models.employee_summary import EmployeeSummary
+from services.gap_analysis_service import gap_analysis_service
+
+EXPORT_FORMATS = ("csv", "ndjson")
+# none: no gap analysis; stored: up-to-date stored analyses only (no LLM
+# call); compute: stored or computed per employee (may call the LLM)
+GAP_ANALYSIS_MODES = ("none", "stored", "compute")
+CSV_COLUMNS = [
+    "id", "name", "email", "job_title_id", "job_title", "department", "years_of_experience",
+    "total_skills", "skills", "total_assessments", "assessment_score", "active_roadmaps", "roadmaps"
+]
+CSV_GAP_COLUMNS = ["gap_percentage", "missing_skills", "gap_degraded"]
+
+
+class ReportExportService:
+    """
+    Export of every employee's report (profile, skills, roadmaps, assessment
+    totals and optionally gap analysis) as CSV or NDJSON.
+
+    Employees are streamed with yield_per on one session; for each chunk of
+    chunk_size employees their skills, roadmaps and stored gap analyses are
+    read by id on a short-lived second session. Output is yielded in batches
+    of batch_size rows, so memory does not grow with the number of employees
+    and an export holds at most two connections (plus gap_concurrency while
+    computing gap analyses).
+    """
+
+    def __init__(self, chunk_size: int = 1000, batch_size: int = 200, gap_concurrency: int = 4):
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.gap_concurrency = gap_concurrency
+
+    def _employees(self, db: Session, job_title_id: Optional[int], department: Optional[str]):
+        query = db.query(User.id).outerjoin(JobTitle, User.job_title_id == JobTitle.id).filter(
+            User.role == UserRole.EMPLOYEE
+        )
+        if job_title_id is not None:
+            query = query.filter(User.job_title_id == job_title_id)
+        if department is not None:
+            query = query.filter(JobTitle.department == department)
+        return query
+
+    def _by_user(self, query) -> Dict[int, List]:
+        """Rows of a query ordered by user_id, grouped per user"""
+        grouped = {}
+        for row in query:
+            grouped.setdefault(row.user_id, []).append(row)
+        return grouped
+
+    def rows(
+        self,
+        job_title_id: Optional[int] = None,
+        department: Optional[str] = None,
+        gap_analysis: str = "none"
+    ) -> Iterator[Dict[str, Any]]:
+        """One report dict per employee, ordered by id"""
+        db = SessionLocal()
+        try:
+            employees = iter(self._employees(db, job_title_id, department).outerjoin(
+                EmployeeSummary, EmployeeSummary.user_id == User.id
+            ).with_entities(
+                User.id,
+                User.name,
+                User.email,
+                User.job_title_id,
+                JobTitle.title.label("job_title"),
+                JobTitle.department,
+                User.years_of_experience,
+                EmployeeSummary.total_assessments,
+                EmployeeSummary.total_points,
+                EmployeeSummary.active_roadmaps
+            ).order_by(User.id).execution_options(yield_per=self.chunk_size))
+
+            while True:
+                chunk = list(islice(employees, self.chunk_size))
+                if not chunk:
+                    break
+                yield from self._chunk_reports(chunk, gap_analysis)
+        finally:
+            db.close()
+
+    def _chunk_reports(self, employees: List, gap_analysis: str) -> Iterator[Dict[str, Any]]:
+        """Reports of one chunk of employees"""
+        user_ids = [employee.id for employee in employees]
+        db = SessionLocal()
+        try:
+            skills = self._by_user(db.query(
+                EmployeeSkill.user_id,
+                EmployeeSkill.id,
+                EmployeeSkill.skill_name,
+                EmployeeSkill.proficiency_level,
+                EmployeeSkill.years_of_experience,
+                EmployeeSkill.self_assessment_score,
+                EmployeeSkill.is_verified
+            ).filter(EmployeeSkill.user_id.in_(user_ids)).order_by(EmployeeSkill.user_id, EmployeeSkill.id))
+            roadmaps = self._by_user(db.query(
+                LearningRoadmap.user_id,
+                LearningRoadmap.id,
+                LearningRoadmap.skill_name,
+                LearningRoadmap.current_level,
+                LearningRoadmap.target_level,
+                LearningRoadmap.status,
+                LearningRoadmap.progress_percentage
+            ).filter(LearningRoadmap.user_id.in_(user_ids)).order_by(LearningRoadmap.user_id, LearningRoadmap.id))
+            stored = {}
+            if gap_analysis == "stored":
+                stored = self._by_user(db.query(
+                    GapAnalysisResult.user_id,
+                    GapAnalysisResult.job_title_id,
+                    GapAnalysisResult.is_stale,
+                    GapAnalysisResult.result
+                ).filter(GapAnalysisResult.user_id.in_(user_ids)).order_by(GapAnalysisResult.user_id))
+        finally:
+            db.close()
+
+        computed = {}
+        if gap_analysis == "compute":
+            computed = from_thread.run(
+                self._compute_gap_analyses,
+                [employee.id for employee in employees if employee.job_title_id]
+            )
+
+        for employee in employees:
+            total_assessments = employee.total_assessments or 0
+            report = {
+                "id": employee.id,
+                "name": employee.name,
+                "email": employee.email,
+                "job_title_id": employee.job_title_id,
+                "job_title": employee.job_title,
+                "department": employee.department,
+                "years_of_experience": float(employee.years_of_experience) if employee.years_of_experience else 0,
+                "skills": [
+                    {
+                        "id": s.id,
+                        "skill_name": s.skill_name,
+                        "proficiency_level": s.proficiency_level.value,
+                        "years_of_experience": float(s.years_of_experience or 0),
+                        "self_assessment_score": s.self_assessment_score,
+                        "is_verified": bool(s.is_verified)
+                    }
+                    for s in skills.get(employee.id, [])
+                ],
+                "roadmaps": [
+                    {
+                        "id": r.id,
+                        "skill_name": r.skill_name,
+                        "current_level": r.current_level.value if r.current_level else None,
+                        "target_level": r.target_level.value,
+                        "status": r.status.value,
+                        "progress_percentage": float(r.progress_percentage or 0)
+                    }
+                    for r in roadmaps.get(employee.id, [])
+                ],
+                "total_assessments": total_assessments,
+                "assessment_score": (employee.total_points or 0) / total_assessments if total_assessments else 0,
+                "active_roadmaps": employee.active_roadmaps or 0
+            }
+
+            if gap_analysis == "stored":
+                report["gap_analysis"] = next(
+                    (
+                        g.result for g in stored.get(employee.id, [])
+                        if not g.is_stale and g.job_title_id == employee.job_title_id
+                    ),
+                    None
+                )
+            elif gap_analysis == "compute":
+                report["gap_analysis"] = computed.get(employee.id)
+            yield report
+
+    async def _compute_gap_analyses(self, user_ids: List[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """
+        Stored or freshly computed gap analyses of a chunk, run on the event
+        loop from the export thread, gap_concurrency at a time on their own sessions
+        """
+        semaphore = asyncio.Semaphore(self.gap_concurrency)
+
+        async def compute(user_id: int):
+            async with semaphore:
+                db = SessionLocal()
+                try:
+                    user = await to_thread.run_sync(db.get, User, user_id)
+                    return user_id, await gap_analysis_service.get_gap_analysis(db, user)
+                except Exception as e:
+                    print(f"Error exporting gap analysis: {str(e)}")
+                    return user_id, None
+                finally:
+                    db.close()
+
+        return dict(await asyncio.gather(*(compute(user_id) for user_id in user_ids)))
+
+    def csv_lines(self, reports: Iterator[Dict[str, Any]], gap_analysis: str = "none") -> Iterator[str]:
+        """CSV text in batches: one row per employee, skills and roadmaps as `; `-separated lists"""
+        columns = CSV_COLUMNS + (CSV_GAP_COLUMNS if gap_analysis != "none" else [])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for count, report in enumerate(reports, start=1):
+            row = {
+                **report,
+                "total_skills": len(report["skills"]),
+                "skills": "; ".join(
+                    f"{s['skill_name']}:{s['proficiency_level']}" for s in report["skills"]
+                ),
+                "assessment_score": round(report["assessment_score"], 2),
+                "roadmaps": "; ".join(
+                    f"{r['skill_name']}:{r['status']}:{r['progress_percentage']:g}" for r in report["roadmaps"]
+                )
+            }
+            gap = report.get("gap_analysis")
+            if gap:
+                row["gap_percentage"] = gap.get("gap_percentage")
+                row["missing_skills"] = "; ".join(
+                    s if isinstance(s, str) else json.dumps(s) for s in gap.get("missing_skills") or []
+                )
+                row["gap_degraded"] = bool(gap.get("degraded", False))
+            writer.writerow([row.get(column) for column in columns])
+            if count % self.batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def ndjson_lines(self, reports: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        """NDJSON text in batches: one report object per line"""
+        batch: List[str] = []
+        for report in reports:
+            batch.append(json.dumps(report, default=str) + "\n")
+            if len(batch) >= self.batch_size:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+
+
+# Singleton instance
+report_export_service = ReportExportService(gap_concurrency=settings.REPORT_EXPORT_GAP_CONCURRENCY)
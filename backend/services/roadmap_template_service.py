@@ -0,0 +1,252 @@
+import asyncio
+from anyio import to_thread
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from config import settings
+from database.connection import SessionLocal
+from models.job import JobTitle, JobDescription
+from models.roadmap import RoadmapTemplate
+from models.skill import ProficiencyLevel
+from services.openai_service import openai_service
+from services.llm_guard import LLMUnavailableError
+from services.skill_keys import LEVEL_RANK, skill_key
+
+LEVELS = [level.value for level in ProficiencyLevel]
+TEMPLATE_FIELDS = (
+    "milestones",
+    "course_recommendations",
+    "practice_tasks",
+    "estimated_completion_weeks",
+    "daily_time_commitment"
+)
+
+
+def _number(value: Any, upper: float) -> Optional[float]:
+    """A number from LLM JSON (number or numeric string) within [0, upper), else None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if 0 <= number < upper else None
+
+
+def completion_weeks(value: Any) -> Optional[int]:
+    """estimated_completion_weeks as stored (INT); None when the LLM returned no plain number"""
+    number = _number(value, 10000)
+    return int(round(number)) if number is not None else None
+
+
+def daily_hours(value: Any) -> Optional[float]:
+    """daily_time_commitment as stored (DECIMAL(4,1)); None for text such as '1-2 hours'"""
+    number = _number(value, 1000)
+    return round(number, 1) if number is not None else None
+
+
+def transition_gap(current_level: str, target_level: str) -> float:
+    """Gap percentage of a level transition"""
+    current_val = LEVEL_RANK.get(current_level, 1)
+    target_val = LEVEL_RANK.get(target_level, 4)
+    return ((target_val - current_val) / target_val) * 100 if target_val > current_val else 0
+
+
+class RoadmapTemplateService:
+    """
+    Library of generated roadmaps shared across employees.
+
+    A roadmap depends only on the job title, the skill and the level
+    transition (the gap percentage follows from the levels), so it is
+    generated once per (job title, skill, current level, target level) and
+    stored in roadmap_templates. Employee roadmaps copy a template's content
+    and keep a reference to it. warm() generates templates ahead of time for
+    every required skill of every job description. Database work in the
+    async methods runs in worker threads, off the event loop.
+    """
+
+    def __init__(self, warm_concurrency: int = 4):
+        self.warm_concurrency = warm_concurrency
+        self.warm_task = None
+        self.warm_status = {"running": False, "total": 0, "created": 0, "existing": 0, "failed": 0}
+
+    def find(
+        self,
+        db: Session,
+        job_title_id: int,
+        skill_name: str,
+        current_level: str,
+        target_level: str
+    ) -> Optional[RoadmapTemplate]:
+        return db.query(RoadmapTemplate).filter(
+            RoadmapTemplate.job_title_id == job_title_id,
+            RoadmapTemplate.skill_key == skill_key(skill_name),
+            RoadmapTemplate.current_level == current_level,
+            RoadmapTemplate.target_level == target_level
+        ).first()
+
+    def content(self, template: RoadmapTemplate) -> Dict[str, Any]:
+        """A template's roadmap in the shape returned by the LLM"""
+        data = {field: getattr(template, field) for field in TEMPLATE_FIELDS}
+        if data["daily_time_commitment"] is not None:
+            data["daily_time_commitment"] = float(data["daily_time_commitment"])
+        return data
+
+    async def get_roadmap(
+        self,
+        db: Session,
+        job_title: JobTitle,
+        skill_name: str,
+        current_level: str,
+        target_level: str
+    ) -> Tuple[Dict[str, Any], Optional[RoadmapTemplate]]:
+        """
+        Roadmap content for a transition and the template it came from.
+        Generated and stored on the first request for the transition; an
+        empty fallback roadmap is returned but not stored as a template.
+        """
+        template = await to_thread.run_sync(self.find, db, job_title.id, skill_name, current_level, target_level)
+        if template is not None:
+            return self.content(template), template
+
+        roadmap_data = await openai_service.generate_learning_roadmap(
+            skill_name=skill_name,
+            current_level=current_level,
+            target_level=target_level,
+            gap_percentage=transition_gap(current_level, target_level),
+            job_title=job_title.title
+        )
+        template = await to_thread.run_sync(
+            self.store, db, job_title.id, skill_name, current_level, target_level, roadmap_data
+        )
+        return roadmap_data, template
+
+    def store(
+        self,
+        db: Session,
+        job_title_id: int,
+        skill_name: str,
+        current_level: str,
+        target_level: str,
+        roadmap_data: Dict[str, Any]
+    ) -> Optional[RoadmapTemplate]:
+        """Save a generated roadmap as the transition's template (None if it is empty)"""
+        if not roadmap_data.get("milestones"):
+            return None
+        template = RoadmapTemplate(
+            job_title_id=job_title_id,
+            skill_name=skill_name,
+            skill_key=skill_key(skill_name),
+            current_level=current_level,
+            target_level=target_level,
+            milestones=roadmap_data.get("milestones", []),
+            course_recommendations=roadmap_data.get("course_recommendations", []),
+            practice_tasks=roadmap_data.get("practice_tasks", []),
+            estimated_completion_weeks=completion_weeks(roadmap_data.get("estimated_completion_weeks", 0)),
+            daily_time_commitment=daily_hours(roadmap_data.get("daily_time_commitment"))
+        )
+        db.add(template)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Generated concurrently by another request or the warm-up
+            db.rollback()
+            return self.find(db, job_title_id, skill_name, current_level, target_level)
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Error storing roadmap template for {skill_name}: {str(e)}")
+            return None
+        db.refresh(template)
+        return template
+
+    def warm_transitions(self, db: Session) -> List[Tuple[JobTitle, str, str, str]]:
+        """
+        (job title, skill, current level, target level) of every required skill:
+        from each level below the expected proficiency (advanced when not set)
+        """
+        transitions = []
+        rows = db.query(JobDescription, JobTitle).join(JobTitle, JobDescription.job_title_id == JobTitle.id).all()
+        for jd, job_title in rows:
+            expected = {skill_key(name): level for name, level in (jd.expected_proficiency_levels or {}).items()}
+            for skill in dict.fromkeys(jd.required_skills or []):
+                target = str(expected.get(skill_key(skill), "advanced")).lower()
+                if target not in LEVEL_RANK:
+                    target = "advanced"
+                for current in LEVELS:
+                    if LEVEL_RANK[current] < LEVEL_RANK[target]:
+                        transitions.append((job_title, skill, current, target))
+        return transitions
+
+    def _missing_transitions(self, db: Session) -> Tuple[int, List[Tuple[int, str, str, str, str]]]:
+        """Number of warm transitions and (job title id, job title, skill, current, target) of those without a template"""
+        transitions = self.warm_transitions(db)
+        existing = {
+            (t.job_title_id, t.skill_key, t.current_level.value, t.target_level.value)
+            for t in db.query(RoadmapTemplate).all()
+        }
+        missing = [
+            (job_title.id, job_title.title, skill, current, target)
+            for job_title, skill, current, target in transitions
+            if (job_title.id, skill_key(skill), current, target) not in existing
+        ]
+        return len(transitions), missing
+
+    def start_warm(self) -> bool:
+        """Start warming the library in the background, unless already running"""
+        if self.warm_task is not None and not self.warm_task.done():
+            return False
+        self.warm_status = {"running": True, "total": 0, "created": 0, "existing": 0, "failed": 0}
+        self.warm_task = asyncio.create_task(self.warm())
+        return True
+
+    async def warm(self):
+        """Generate the templates missing for the warm transitions, warm_concurrency at a time"""
+        db = SessionLocal()
+        self.warm_status = {"running": True, "total": 0, "created": 0, "existing": 0, "failed": 0}
+        try:
+            total, missing = await to_thread.run_sync(self._missing_transitions, db)
+            self.warm_status["total"] = total
+            self.warm_status["existing"] = total - len(missing)
+
+            semaphore = asyncio.Semaphore(self.warm_concurrency)
+
+            async def generate(job_title_id: int, job_title: str, skill: str, current: str, target: str):
+                async with semaphore:
+                    try:
+                        roadmap_data = await openai_service.generate_learning_roadmap(
+                            skill_name=skill,
+                            current_level=current,
+                            target_level=target,
+                            gap_percentage=transition_gap(current, target),
+                            job_title=job_title
+                        )
+                    except LLMUnavailableError as e:
+                        print(f"Error warming roadmap template for {skill}: {str(e)}")
+                        roadmap_data = {}
+                    return job_title_id, skill, current, target, roadmap_data
+
+            for finished in asyncio.as_completed([generate(*m) for m in missing]):
+                job_title_id, skill, current, target, roadmap_data = await finished
+                try:
+                    stored = await to_thread.run_sync(
+                        self.store, db, job_title_id, skill, current, target, roadmap_data
+                    )
+                except Exception as e:
+                    print(f"Error warming roadmap template for {skill}: {str(e)}")
+                    await to_thread.run_sync(db.rollback)
+                    stored = None
+                if stored is not None:
+                    self.warm_status["created"] += 1
+                else:
+                    self.warm_status["failed"] += 1
+        except Exception as e:
+            print(f"Error warming roadmap templates: {str(e)}")
+        finally:
+            self.warm_status["running"] = False
+            db.close()
+
+
+# Singleton instance
+roadmap_template_service = RoadmapTemplateService(
+    warm_concurrency=settings.ROADMAP_TEMPLATE_WARM_CONCURRENCY
+)
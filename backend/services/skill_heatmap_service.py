@@ -0,0 +1,230 @@
+import threading
+import numpy as np
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models.user import User, UserRole
+from models.job import JobTitle, JobDescription
+from models.skill import EmployeeSkill
+from services.skill_keys import LEVEL_RANK, skill_key
+
+DIMENSIONS = ("department", "job_title")
+
+
+class SkillHeatmapService:
+    """
+    Organisation-wide skill heatmap: for every department × skill and job
+    title × skill cell, the share of employees having the skill, their mean
+    proficiency (1 = beginner … 4 = expert), the share of verified skills and
+    the mean gap against the job description's expected_proficiency_levels.
+
+    Employees, job titles and skills are streamed once (yield_per) into
+    integer-coded NumPy arrays and every metric is a bincount over
+    (group, skill) cell codes. The result is kept until the row counts, max
+    ids or max updated_at of the underlying tables change.
+    """
+
+    def __init__(self, chunk_size: int = 5000):
+        self.chunk_size = chunk_size
+        self.cache = None
+        self._lock = threading.Lock()
+
+    def fingerprint(self, db: Session) -> Tuple:
+        """Cheap change marker of the tables the heatmap is computed from, in one statement"""
+        columns = []
+        for model in (User, JobTitle, JobDescription, EmployeeSkill):
+            columns += [
+                select(func.count(model.id)).scalar_subquery(),
+                select(func.max(model.id)).scalar_subquery(),
+                select(func.max(model.updated_at)).scalar_subquery()
+            ]
+        return tuple(db.execute(select(*columns)).one())
+
+    def get_heatmap(self, db: Session, dimension: str) -> Dict[str, Any]:
+        fingerprint = self.fingerprint(db)
+        with self._lock:
+            cached = self.cache
+        if cached is None or cached[0] != fingerprint:
+            # Computed outside the lock, so requests served from the cache are
+            # not held up by a rebuild (concurrent misses may both compute)
+            cached = (fingerprint, self.compute(db))
+            with self._lock:
+                self.cache = cached
+        return cached[1][dimension]
+
+    def compute(self, db: Session) -> Dict[str, Dict[str, Any]]:
+        """Heatmaps of both dimensions"""
+        # Job titles: code = position, departments coded alongside
+        job_titles = db.query(JobTitle.id, JobTitle.title, JobTitle.department).order_by(JobTitle.id).all()
+        title_code = {row.id: code for code, row in enumerate(job_titles)}
+        departments = sorted({row.department for row in job_titles if row.department is not None})
+        department_code = {name: code for code, name in enumerate(departments)}
+        title_department = np.array(
+            [department_code.get(row.department, len(departments)) for row in job_titles] + [len(departments)],
+            dtype=np.int64
+        )
+
+        # Employees: user id -> dense index, job title code (len(job_titles) = none)
+        user_ids, user_titles = [], []
+        for user_id, job_title_id in db.query(User.id, User.job_title_id).filter(
+            User.role == UserRole.EMPLOYEE
+        ).order_by(User.id).execution_options(yield_per=self.chunk_size):
+            user_ids.append(user_id)
+            user_titles.append(title_code.get(job_title_id, len(job_titles)))
+        user_ids = np.array(user_ids, dtype=np.int64)
+        user_titles = np.array(user_titles, dtype=np.int64)
+        user_departments = title_department[user_titles]
+
+        # Skills: (user id, skill code, level rank, verified), skill names coded case-insensitively
+        skill_code, skill_names = {}, []
+        rows_user, rows_skill, rows_level, rows_verified = [], [], [], []
+        for user_id, skill_name, level, verified in db.query(
+            EmployeeSkill.user_id,
+            EmployeeSkill.skill_name,
+            EmployeeSkill.proficiency_level,
+            EmployeeSkill.is_verified
+        ).execution_options(yield_per=self.chunk_size):
+            key = skill_key(skill_name)
+            if key not in skill_code:
+                skill_code[key] = len(skill_names)
+                skill_names.append(skill_name)
+            rows_user.append(user_id)
+            rows_skill.append(skill_code[key])
+            rows_level.append(LEVEL_RANK[level.value])
+            rows_verified.append(bool(verified))
+
+        # Expected levels of the first job description per job title
+        expected_titles, expected_skills, expected_levels = [], [], []
+        seen_titles = set()
+        for job_title_id, expected in db.query(
+            JobDescription.job_title_id, JobDescription.expected_proficiency_levels
+        ).order_by(JobDescription.id):
+            if job_title_id in seen_titles or job_title_id not in title_code:
+                continue
+            seen_titles.add(job_title_id)
+            for skill_name, level in (expected or {}).items():
+                if str(level).lower() not in LEVEL_RANK:
+                    continue
+                key = skill_key(skill_name)
+                if key not in skill_code:
+                    skill_code[key] = len(skill_names)
+                    skill_names.append(skill_name)
+                expected_titles.append(title_code[job_title_id])
+                expected_skills.append(skill_code[key])
+                expected_levels.append(LEVEL_RANK[str(level).lower()])
+
+        n_skills = max(len(skill_names), 1)
+        rows_user = np.array(rows_user, dtype=np.int64)
+        employee_rows = np.isin(rows_user, user_ids)
+
+        # One row per (employee, skill): the highest level, verified if any row is
+        pair = (np.searchsorted(user_ids, rows_user[employee_rows]) * n_skills
+                + np.array(rows_skill, dtype=np.int64)[employee_rows])
+        level = np.array(rows_level, dtype=np.int64)[employee_rows]
+        verified = np.array(rows_verified, dtype=bool)[employee_rows]
+        pairs, inverse = np.unique(pair, return_inverse=True)
+        pair_level = np.zeros(len(pairs), dtype=np.int64)
+        np.maximum.at(pair_level, inverse, level)
+        pair_verified = np.zeros(len(pairs), dtype=bool)
+        np.logical_or.at(pair_verified, inverse, verified)
+        pair_user, pair_skill = pairs // n_skills, pairs % n_skills
+
+        # One row per (employee, expected skill of their job title)
+        expected_titles = np.array(expected_titles, dtype=np.int64)
+        expected_skills = np.array(expected_skills, dtype=np.int64)
+        expected_levels = np.array(expected_levels, dtype=np.int64)
+        gap_user, gap_skill, gap_expected = [], [], []
+        for code in np.unique(expected_titles):
+            members = np.flatnonzero(user_titles == code)
+            entries = expected_titles == code
+            gap_user.append(np.repeat(members, entries.sum()))
+            gap_skill.append(np.tile(expected_skills[entries], len(members)))
+            gap_expected.append(np.tile(expected_levels[entries], len(members)))
+        gap_user = np.concatenate(gap_user) if gap_user else np.zeros(0, dtype=np.int64)
+        gap_skill = np.concatenate(gap_skill) if gap_skill else np.zeros(0, dtype=np.int64)
+        gap_expected = np.concatenate(gap_expected) if gap_expected else np.zeros(0, dtype=np.int64)
+        # Employee's level of the expected skill, 0 without it
+        gap_pair = gap_user * n_skills + gap_skill
+        has_skill = np.isin(gap_pair, pairs)
+        gap_actual = np.zeros(len(gap_pair), dtype=np.int64)
+        gap_actual[has_skill] = pair_level[np.searchsorted(pairs, gap_pair[has_skill])]
+        gap = np.maximum(gap_expected - gap_actual, 0) / np.maximum(gap_expected, 1) * 100
+
+        groups = {
+            "department": (
+                user_departments,
+                [{"key": name, "label": name} for name in departments] + [{"key": None, "label": None}]
+            ),
+            "job_title": (
+                user_titles,
+                [{"key": row.id, "label": row.title} for row in job_titles] + [{"key": None, "label": None}]
+            )
+        }
+        return {
+            dimension: self._reduce(
+                user_groups, labels, skill_names, n_skills,
+                pair_user, pair_skill, pair_level, pair_verified,
+                gap_user, gap_skill, gap
+            )
+            for dimension, (user_groups, labels) in groups.items()
+        }
+
+    def _reduce(
+        self,
+        user_groups: np.ndarray,
+        labels: List[Dict[str, Any]],
+        skill_names: List[str],
+        n_skills: int,
+        pair_user: np.ndarray,
+        pair_skill: np.ndarray,
+        pair_level: np.ndarray,
+        pair_verified: np.ndarray,
+        gap_user: np.ndarray,
+        gap_skill: np.ndarray,
+        gap: np.ndarray
+    ) -> Dict[str, Any]:
+        """Per (group, skill) cell metrics of one dimension"""
+        size = len(labels) * n_skills
+        headcount = np.bincount(user_groups, minlength=len(labels))
+
+        cells = user_groups[pair_user] * n_skills + pair_skill
+        having = np.bincount(cells, minlength=size)
+        level_sum = np.bincount(cells, weights=pair_level, minlength=size)
+        verified_sum = np.bincount(cells, weights=pair_verified, minlength=size)
+
+        gap_cells = user_groups[gap_user] * n_skills + gap_skill
+        expected = np.bincount(gap_cells, minlength=size)
+        gap_sum = np.bincount(gap_cells, weights=gap, minlength=size)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = having / np.repeat(headcount, n_skills)
+            mean_level = level_sum / having
+            verified_ratio = verified_sum / having
+            mean_gap = gap_sum / expected
+
+        results = []
+        for cell in np.flatnonzero((having > 0) | (expected > 0)):
+            group, skill = divmod(int(cell), n_skills)
+            results.append({
+                "group": labels[group]["key"],
+                "skill": skill_names[skill],
+                "employees": int(having[cell]),
+                "coverage": round(float(coverage[cell]), 4),
+                "mean_proficiency": round(float(mean_level[cell]), 2) if having[cell] else None,
+                "verified_ratio": round(float(verified_ratio[cell]), 4) if having[cell] else None,
+                "expected_employees": int(expected[cell]),
+                "average_gap_percentage": round(float(mean_gap[cell]), 2) if expected[cell] else None
+            })
+
+        return {
+            "groups": [
+                {**label, "employees": int(headcount[code])}
+                for code, label in enumerate(labels) if headcount[code]
+            ],
+            "skills": sorted({cell["skill"] for cell in results}),
+            "cells": results
+        }
+
+
+# Singleton instance
+skill_heatmap_service = SkillHeatmapService()
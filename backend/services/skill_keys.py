@@ -0,0 +1,9 @@
+from models.skill import ProficiencyLevel
+
+# Proficiency levels ranked from 1 (beginner) to 4 (expert)
+LEVEL_RANK = {level.value: rank for rank, level in enumerate(ProficiencyLevel, start=1)}
+
+
+def skill_key(skill_name: str) -> str:
+    """Case- and whitespace-insensitive key of a skill name"""
+    return " ".join(skill_name.lower().split())
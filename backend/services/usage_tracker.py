@@ -0,0 +1,219 @@
+import os
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# Attribution of LLM calls to the request that made them. The HTTP
+# middleware installs a fresh dict per request and authentication fills in
+# the user; being mutable, it is seen by every task the request spawns.
+usage_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("usage_context", default=None)
+
+GROUP_COLUMNS = {
+    "operation": "operation",
+    "user": "user_id",
+    "job_title": "job_title_id",
+    "endpoint": "endpoint",
+    "model": "model",
+    "day": "day"
+}
+
+
+def begin_usage_context(scope: Dict[str, Any]) -> Dict[str, Any]:
+    # The ASGI scope gets its matched route later, during routing
+    context = {"scope": scope, "user_id": None, "job_title_id": None}
+    usage_context.set(context)
+    return context
+
+
+def set_usage_user(user):
+    context = usage_context.get()
+    if context is not None:
+        context["user_id"] = user.id
+        context["job_title_id"] = user.job_title_id
+
+
+class UsageTracker:
+    """
+    Per-call record of every LLM call: operation, model, prompt and
+    completion tokens, latency, cache status (hit, miss, coalesced), outcome
+    and who made it (endpoint, user, job title).
+
+    Records are buffered and written to a SQLite file in batches of
+    batch_size or every flush_seconds; rows older than retention_days are
+    dropped as new ones are written. record() is called from the event loop,
+    so due batches are written by a background writer thread.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_seconds: float = 5, retention_days: int = 90):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.retention_days = retention_days
+        self.pending = []
+        self.last_flush = time.monotonic()
+        # _lock guards the buffer, _db_lock the connection
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="usage-writer")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calls (
+                created_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                model TEXT,
+                endpoint TEXT,
+                user_id INTEGER,
+                job_title_id INTEGER,
+                cache TEXT NOT NULL,
+                status TEXT NOT NULL,
+                prompt_chars INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                latency_ms REAL NOT NULL,
+                truncated INTEGER NOT NULL
+            )
+            """
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_calls_created_at ON calls (created_at)")
+        self.db.commit()
+
+    def record(
+        self,
+        operation: str,
+        model: str,
+        cache: str,
+        status: str,
+        prompt_chars: int,
+        latency_ms: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        truncated: bool = False
+    ):
+        context = usage_context.get() or {}
+        scope = context.get("scope") or {}
+        # Route template ("/api/reports/employee/{employee_id}") rather than the raw path
+        endpoint = getattr(scope.get("route"), "path", scope.get("path"))
+        now = time.time()
+        row = (
+            now,
+            datetime.utcfromtimestamp(now).strftime("%Y-%m-%d"),
+            operation,
+            model,
+            endpoint,
+            context.get("user_id"),
+            context.get("job_title_id"),
+            cache,
+            status,
+            prompt_chars,
+            prompt_tokens,
+            completion_tokens,
+            round(latency_ms, 2),
+            int(truncated)
+        )
+        with self._lock:
+            self.pending.append(row)
+            due = len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_seconds
+            if due:
+                self.last_flush = time.monotonic()
+        if due:
+            self._writer.submit(self.flush)
+
+    def flush(self):
+        """Write the buffered records (blocking; see record for the background path)"""
+        with self._lock:
+            rows, self.pending = self.pending, []
+            self.last_flush = time.monotonic()
+        if not rows:
+            return
+        with self._db_lock:
+            try:
+                self.db.executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self.db.execute(
+                    "DELETE FROM calls WHERE created_at < ?",
+                    (time.time() - self.retention_days * 86400,)
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing LLM usage: {str(e)}")
+
+    def aggregate(
+        self,
+        group_by: List[str],
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        operation: Optional[str] = None,
+        user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Totals per group (keys of GROUP_COLUMNS), most tokens first"""
+        columns = [GROUP_COLUMNS[g] for g in group_by]
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until.timestamp())
+        if operation is not None:
+            conditions.append("operation = ?")
+            params.append(operation)
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+
+        select = ", ".join(columns + [
+            "COUNT(*)",
+            "SUM(cache = 'hit')",
+            "SUM(cache = 'coalesced')",
+            "SUM(status != 'ok')",
+            "SUM(truncated)",
+            "SUM(prompt_tokens)",
+            "SUM(completion_tokens)",
+            "AVG(latency_ms)",
+            "MAX(latency_ms)",
+            "AVG(prompt_chars)"
+        ])
+        sql = f"SELECT {select} FROM calls"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if columns:
+            sql += " GROUP BY " + ", ".join(columns)
+        sql += " ORDER BY SUM(prompt_tokens) + SUM(completion_tokens) DESC"
+
+        self.flush()
+        with self._db_lock:
+            rows = self.db.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            keys, values = row[:len(columns)], row[len(columns):]
+            calls, hits, coalesced, failed, truncated, prompt_tokens, completion_tokens, avg_ms, max_ms, avg_chars = values
+            if not calls:
+                continue
+            result = dict(zip(group_by, keys))
+            result.update({
+                "calls": calls,
+                "cache_hits": hits,
+                "coalesced": coalesced,
+                "failed": failed,
+                "truncated": truncated,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "avg_latency_ms": round(avg_ms, 2),
+                "max_latency_ms": round(max_ms, 2),
+                "avg_prompt_chars": round(avg_chars)
+            })
+            results.append(result)
+        return results
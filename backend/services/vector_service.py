@@ -1,27 +1,123 @@
 import os
 import pickle
+import threading
 import numpy as np
-from typing import List, Dict, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from config import settings
+from services.vector_store import VectorStore, SkillRows, FORMAT_VERSION
+from services.ann_index import build_ann_index, top_k, top_k_batch
+from services.embedding_backends import EmbeddingBackend, build_embedding_backend, load_embedding_backend
+from services.embedding_cache import EmbeddingCache
+
+# Similarity above which an employee skill meets a required skill. Skill names
+# are compared, so an exact name (ignoring case and punctuation) scores 1.0
+# while sharing one word ("Node" / "Node.js", "React Native" / "React") scores
+# about 0.3-0.6
+SKILL_MATCH_THRESHOLD = 0.7
 
 
 class VectorService:
     def __init__(self):
-        # Use TfidfVectorizer - much lighter than sentence-transformers
-        self.vectorizer = TfidfVectorizer(max_features=300, ngram_range=(1, 2))
-        self.skill_vectors = None
-        self.skill_metadata = {}
-        self.skill_texts = []
+        # The configured embedding backend (TF-IDF by default - much lighter
+        # than sentence-transformers) and the one that encoded the loaded
+        # index. A TF-IDF vocabulary is frozen between refits so new skills
+        # can be vectorized without touching the rest of the index.
+        self.embedding = build_embedding_backend()
+        self.backend = self.embedding.fresh()
+        # The index was encoded by another backend and needs re-encoding
+        self.embedding_stale = False
+        self.vector_blocks = []
+        self.skill_rows = SkillRows()
+        self.fitted_rows = 0
+        # Rows are keyed by (user_id, skill_id); replaced rows are tombstoned
+        # (True in the mask) until the next compaction drops them from the
+        # vectors. Keys of snapshot rows are looked up in the snapshot, the
+        # dicts only hold rows appended since
+        self.row_keys = {}
+        self.user_rows = {}
+        self.tombstones = np.zeros(0, dtype=bool)
+        self.dead_count = 0
+        # (job_description_id, required_skills) -> (vectorizer, required vectors),
+        # least recently used first. Keyed by the skills themselves, so another
+        # worker's edit of a job description is never served stale here
+        self.requirement_cache = OrderedDict()
+        self.requirement_cache_size = settings.VECTOR_REQUIREMENT_CACHE_SIZE
+        # ANN structure over the first vector block; appended blocks are scanned exactly
+        self.ann_index = None
+        self.index_generation = 0
+        # Snapshot this process has loaded and how far into its journal it has applied
+        self.generation = None
+        self.snapshot_format = FORMAT_VERSION
+        self.journal_offset = 0
         self.vector_db_path = settings.VECTOR_DB_PATH
-        
+        self.refit_interval = settings.VECTOR_REFIT_INTERVAL_SECONDS
+        self.compact_dead_ratio = settings.VECTOR_COMPACT_DEAD_RATIO
+        self.fold_rows = settings.VECTOR_FOLD_APPENDED_ROWS
+        self.fold_blocks = settings.VECTOR_FOLD_APPENDED_BLOCKS
+        # Stacked appended blocks (see _stacked)
+        self._stack_blocks = None
+        self._stack_count = 0
+        self._stack_cache = {}
+
+        self._lock = threading.RLock()
+        self._refit_stop = threading.Event()
+        self._refit_thread = None
+
         # Create vector store directory if it doesn't exist
         os.makedirs(self.vector_db_path, exist_ok=True)
-        
+        self.store = VectorStore(os.path.join(self.vector_db_path, "skills_index"))
+        self.embedding_cache = EmbeddingCache(
+            os.path.join(self.vector_db_path, "embedding_cache.sqlite3"),
+            settings.VECTOR_EMBEDDING_CACHE_SIZE,
+            settings.VECTOR_EMBEDDING_CACHE_MAX_ENTRIES
+        )
+
         # Load existing index if available
         self.load_index()
-    
+
+    @property
+    def skill_vectors(self) -> Optional[sparse.csr_matrix]:
+        """All indexed vectors as a single matrix (the first block plus appended blocks)"""
+        with self._lock:
+            if not self.vector_blocks:
+                return None
+            if len(self.vector_blocks) > 1:
+                return self._stacked(0)
+            return self.vector_blocks[0]
+
+    def _stacked(self, start: int) -> sparse.csr_matrix:
+        """vector_blocks[start:] as one matrix, cached until blocks are appended or replaced"""
+        if self._stack_blocks is not self.vector_blocks or self._stack_count != len(self.vector_blocks):
+            self._stack_blocks = self.vector_blocks
+            self._stack_count = len(self.vector_blocks)
+            self._stack_cache = {}
+        if start not in self._stack_cache:
+            self._stack_cache[start] = sparse.vstack(self.vector_blocks[start:], format="csr")
+        return self._stack_cache[start]
+
+    @property
+    def appended_rows(self) -> int:
+        """Rows appended since the snapshot, held in blocks after the first"""
+        return sum(block.shape[0] for block in self.vector_blocks[1:])
+
+    def _needs_fold(self) -> bool:
+        """Appended blocks (and the journal behind them) are due to be folded into a snapshot"""
+        return (
+            len(self.vector_blocks) - 1 >= self.fold_blocks
+            or self.appended_rows >= self.fold_rows
+        )
+
+    @property
+    def live_count(self) -> int:
+        return len(self.skill_rows) - self.dead_count
+
+    @property
+    def dead_ratio(self) -> float:
+        return self.dead_count / len(self.skill_rows) if len(self.skill_rows) else 0.0
+
     def create_skill_embedding(self, skill_text: str, proficiency: str = "", experience: float = 0) -> str:
         """
         Create embedding for a skill with context (lightweight version)
@@ -29,67 +125,442 @@ class VectorService:
         # Enrich skill text with context
         enriched_text = f"{skill_text} {proficiency} {experience}years"
         return enriched_text
-    
+
+    def _encode(self, backend: EmbeddingBackend, texts: List[str], persist: bool = True) -> sparse.csr_matrix:
+        """
+        Encode texts with a backend, encoding each distinct text at most once:
+        texts already in the embedding cache for the backend's vector space are
+        reused, the rest are encoded in batches and cached (on disk too if
+        persist; search queries are only cached in memory)
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        fingerprint = backend.fingerprint()
+        rows = self.embedding_cache.get_many(fingerprint, unique_texts)
+
+        missing = [text for text in unique_texts if text not in rows]
+        if missing:
+            encoded = backend.encode(missing)
+            self.embedding_cache.put_many(fingerprint, missing, encoded, persist)
+            for i, text in enumerate(missing):
+                start, end = encoded.indptr[i], encoded.indptr[i + 1]
+                rows[text] = (encoded.indices[start:end], encoded.data[start:end])
+
+        # Assemble the distinct rows into one CSR matrix, then expand duplicates
+        ordered = [rows[text] for text in unique_texts]
+        indptr = np.concatenate([[0], np.cumsum([len(indices) for indices, _ in ordered])])
+        unique_vectors = sparse.csr_matrix(
+            (
+                np.concatenate([data for _, data in ordered]) if ordered else np.array([]),
+                np.concatenate([indices for indices, _ in ordered]) if ordered else np.array([], dtype=np.int32),
+                indptr
+            ),
+            shape=(len(unique_texts), backend.dims)
+        )
+        if len(unique_texts) == len(texts):
+            return unique_vectors
+        position = {text: i for i, text in enumerate(unique_texts)}
+        return unique_vectors[[position[text] for text in texts]]
+
     def add_skills_to_index(self, skills: List[Dict[str, any]]):
         """
-        Add skills to index (lightweight TF-IDF version)
+        Add skills to index (incremental TF-IDF version)
         skills format: [{"skill_name": "Python", "proficiency": "advanced", "experience": 3.5, "metadata": {...}}]
+
+        New skills are vectorized with the current vocabulary and appended as a
+        new block, so the cost depends on the size of the submission rather than
+        the size of the index. The background refit picks up new vocabulary.
+        A skill whose (user_id, skill_id) is already indexed replaces the old row.
         """
-        if not skills:
+        self._index_skills(skills)
+
+    def replace_user_skills(self, user_id: int, skills: List[Dict[str, any]]):
+        """
+        Replace every indexed skill of a user with the given skills
+        """
+        self._index_skills(skills, replace_user_ids=[user_id])
+
+    def replace_users_skills(self, skills_by_user: Dict[int, List[Dict[str, any]]]):
+        """
+        Replace the indexed skills of several users in a single write
+        """
+        if not skills_by_user:
             return
-        
+        skills = [skill for user_skills in skills_by_user.values() for skill in user_skills]
+        self._index_skills(skills, replace_user_ids=list(skills_by_user))
+
+    def _index_skills(self, skills: List[Dict[str, any]], replace_user_ids: Optional[List[int]] = None):
         # Create text representations
-        for skill in skills:
-            skill_text = self.create_skill_embedding(
+        texts = [
+            self.create_skill_embedding(
                 skill.get("skill_name", ""),
                 skill.get("proficiency", ""),
                 skill.get("experience", 0)
             )
-            skill_id = len(self.skill_texts)
-            self.skill_texts.append(skill_text)
-            self.skill_metadata[skill_id] = skill
-        
-        # Refit vectorizer with all skills
-        if len(self.skill_texts) > 0:
-            self.skill_vectors = self.vectorizer.fit_transform(self.skill_texts)
-        
-        # Save index
+            for skill in skills
+        ]
+
+        with self._lock, self.store.lock():
+            # Apply other workers' writes first so rows line up with the journal
+            self._sync()
+
+            # The very first submission publishes the first snapshot (and
+            # gives TF-IDF a corpus to freeze a vocabulary from)
+            if self.generation is None or not self.backend.fitted:
+                if skills:
+                    self._apply_write(texts, skills, None, replace_user_ids)
+                    self.refit_index()
+                return
+
+            # Journal the write; every worker (this one included) applies it
+            # by replaying the journal, so all of them converge on the same rows
+            vectors = self._encode(self.backend, texts) if skills else None
+            self.store.append_journal(self.generation, texts, skills, vectors, replace_user_ids)
+            self._replay_journal()
+
+    def _apply_write(
+        self,
+        texts: List[str],
+        skills: List[Dict[str, any]],
+        vectors: Optional[sparse.csr_matrix],
+        replace_user_ids: Optional[List[int]]
+    ):
+        """Tombstone the rows a write replaces and append its skills"""
+        dead_rows = []
+        for user_id in replace_user_ids or []:
+            dead_rows.extend(self.skill_rows.key_rows(user_id))
+            dead_rows.extend(self.user_rows.get(user_id, []))
+        for skill in skills:
+            key = self._skill_key(skill)
+            if key is not None:
+                dead_rows.extend(self.skill_rows.key_rows(*key))
+            if key in self.row_keys:
+                dead_rows.append(self.row_keys[key])
+        self._tombstone_rows(sorted(row for row in set(dead_rows) if not self.tombstones[row]))
+
+        if skills:
+            self._append_rows(texts, skills)
+            if vectors is not None:
+                self.vector_blocks.append(vectors)
+
+    def sync(self):
+        """Pick up writes and snapshots published by other workers"""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self.store.current_name() != self.generation:
+            self._load_generation()
+        elif self.generation is not None:
+            self._replay_journal()
+
+    def _replay_journal(self):
+        records, self.journal_offset = self.store.read_journal(self.generation, self.journal_offset)
+        for record in records:
+            self._apply_write(record["texts"], record["skills"], record["vectors"], record["replace_user_ids"])
+
+    def _skill_key(self, skill: Dict[str, any]) -> Optional[Tuple[int, int]]:
+        """Index key of a skill, if its metadata identifies one"""
+        metadata = skill.get("metadata") or {}
+        if metadata.get("user_id") is None or metadata.get("skill_id") is None:
+            return None
+        return (metadata["user_id"], metadata["skill_id"])
+
+    def _append_rows(self, texts: List[str], skills: List[Dict[str, any]]) -> int:
+        """Register texts and metadata, returning the first new row id"""
+        start = len(self.skill_rows)
+        self.tombstones = np.concatenate([self.tombstones, np.zeros(len(texts), dtype=bool)])
+        for i, (text, skill) in enumerate(zip(texts, skills)):
+            self.skill_rows.append(text, skill)
+            self._register_key(start + i, skill)
+        return start
+
+    def _register_key(self, row: int, skill: Dict[str, any]):
+        key = self._skill_key(skill)
+        if key is not None:
+            self.row_keys[key] = row
+            self.user_rows.setdefault(key[0], []).append(row)
+
+    def _tombstone_rows(self, rows: List[int]):
+        """Mark rows as dead; they stop matching immediately"""
+        for row in rows:
+            self.tombstones[row] = True
+            self.dead_count += 1
+            if row < self.skill_rows.snapshot_rows:
+                continue
+            key = self._skill_key(self.skill_rows.skill(row))
+            if key is None:
+                continue
+            if self.row_keys.get(key) == row:
+                del self.row_keys[key]
+            user_rows = self.user_rows.get(key[0], [])
+            if row in user_rows:
+                user_rows.remove(row)
+                if not user_rows:
+                    del self.user_rows[key[0]]
+
+    def _live_rows(self, total: int) -> np.ndarray:
+        return np.flatnonzero(~self.tombstones[:total])
+
+    def refit_index(self):
+        """
+        Refit the configured embedding backend over the live corpus,
+        re-encode it and rewrite the index without dead rows. Runs
+        periodically in the background; safe to call directly.
+        """
+        with self._lock:
+            self._sync()
+            generation = self.generation
+            total = len(self.skill_rows)
+            rows = self._live_rows(total)
+            texts = self.skill_rows.texts(rows)
+
+        if not texts:
+            self.compact_index()
+            return
+
+        # Fit outside the lock so submissions are not blocked by the refit
+        backend = self.embedding.fresh().fit(texts)
+        vectors = self._encode(backend, texts)
+
+        with self._lock, self.store.lock():
+            self._sync()
+            # Another process published a snapshot meanwhile; its rows differ
+            if self.generation != generation:
+                return
+
+            # Rows appended while fitting are encoded with the new backend
+            if len(self.skill_rows) > total:
+                appended = np.arange(total, len(self.skill_rows))
+                rows = np.concatenate([rows, appended])
+                vectors = sparse.vstack(
+                    [vectors, self._encode(backend, self.skill_rows.texts(appended))],
+                    format="csr"
+                )
+
+            self.backend = backend
+            self.embedding_stale = False
+            self._rewrite_rows(rows, vectors)
+
+        # Cached vectors of the previous space can no longer be hit
+        self.embedding_cache.prune(backend.fingerprint())
+
+    def compact_index(self):
+        """
+        Drop tombstoned rows from the vectors and metadata and fold appended
+        blocks into one, rewriting the index (and starting an empty journal)
+        without refitting the vocabulary
+        """
+        with self._lock, self.store.lock():
+            self._sync()
+            if not self.dead_count and len(self.vector_blocks) <= 1:
+                return
+            rows = self._live_rows(len(self.skill_rows))
+            vectors = self.skill_vectors
+            self._rewrite_rows(rows, vectors[rows] if vectors is not None else None)
+
+    def _rewrite_rows(self, rows: np.ndarray, vectors: Optional[sparse.csr_matrix]):
+        """Renumber the index to the given rows (skipping any tombstoned since) and save it"""
+        keep = ~self.tombstones[rows]
+        rows = rows[keep]
+
+        self.skill_rows = self.skill_rows.select(rows)
+        self.vector_blocks = [vectors[keep]] if len(rows) > 0 else []
+        self.tombstones = np.zeros(len(rows), dtype=bool)
+        self.dead_count = 0
+        self.fitted_rows = len(rows)
         self.save_index()
-    
+
+    def _rebuild_keys(self):
+        """Key the rows held in memory (snapshot rows are looked up in the snapshot)"""
+        self.row_keys = {}
+        self.user_rows = {}
+        for row in range(self.skill_rows.snapshot_rows, len(self.skill_rows)):
+            if not self.tombstones[row]:
+                self._register_key(row, self.skill_rows.skill(row))
+
+    def start_background_refit(self):
+        """Start the periodic refit thread"""
+        if self._refit_thread and self._refit_thread.is_alive():
+            return
+
+        self._refit_stop.clear()
+        self._refit_thread = threading.Thread(
+            target=self._refit_loop,
+            name="vector-index-refit",
+            daemon=True
+        )
+        self._refit_thread.start()
+
+    def stop_background_refit(self):
+        """Stop the periodic refit thread"""
+        self._refit_stop.set()
+        if self._refit_thread:
+            self._refit_thread.join(timeout=5)
+            self._refit_thread = None
+
+    def _refit_loop(self):
+        while not self._refit_stop.wait(self.refit_interval):
+            try:
+                # Only the elected maintainer process refits and compacts
+                if not self.store.try_become_maintainer():
+                    self.sync()
+                    continue
+
+                self.sync()
+                if self.embedding_stale or (
+                    self.backend.needs_fit and len(self.skill_rows) > self.fitted_rows
+                ):
+                    self.refit_index()
+                elif self.dead_ratio > self.compact_dead_ratio or self._needs_fold():
+                    # Backends without a fit (hashing, local) never refit,
+                    # so appended writes are folded here
+                    self.compact_index()
+            except Exception as e:
+                print(f"Error maintaining skill index: {str(e)}")
+
+    def _rebuild_ann_index(self):
+        """
+        Build the ANN structure for the first vector block in the background.
+        Searches use the exact path until it is ready.
+        """
+        with self._lock:
+            self.index_generation += 1
+            self.ann_index = None
+            generation = self.index_generation
+            base = self.vector_blocks[0] if self.vector_blocks else None
+
+        if base is None:
+            return
+
+        def build():
+            try:
+                ann_index = build_ann_index(base)
+            except Exception as e:
+                print(f"Error building ANN index: {str(e)}")
+                return
+            with self._lock:
+                if self.index_generation == generation:
+                    self.ann_index = ann_index
+
+        threading.Thread(target=build, name="vector-ann-build", daemon=True).start()
+
     def search_similar_skills(self, query_skill: str, k: int = 5) -> List[Tuple[Dict, float]]:
         """
         Search for similar skills in the index
         Returns list of (skill_metadata, similarity_score) tuples
         """
-        if self.skill_vectors is None or len(self.skill_texts) == 0:
+        with self._lock:
+            self._sync()
+            if not self.vector_blocks or self.live_count == 0:
+                return []
+
+            # Create query vector
+            query_vector = self._encode(self.backend, [query_skill], persist=False)
+            matches = self._search_rows(query_vector, k)[0]
+
+            # Format results
+            return [(self.skill_rows.skill(row), score) for row, score in matches]
+
+    def search_similar_skills_batch(self, queries: List[str], k: int = 5) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search for many skills at once
+        Returns one list of (skill_metadata, similarity_score) tuples per query
+        """
+        if not queries:
             return []
-        
-        # Create query vector
-        query_vector = self.vectorizer.transform([query_skill])
-        
-        # Calculate similarities
-        similarities = cosine_similarity(query_vector, self.skill_vectors)[0]
-        
-        # Get top k
-        k = min(k, len(similarities))
-        top_indices = np.argsort(similarities)[-k:][::-1]
-        
-        # Format results
+
+        with self._lock:
+            self._sync()
+            if not self.vector_blocks or self.live_count == 0:
+                return [[] for _ in queries]
+
+            # Featurize every query in one call
+            query_vectors = self._encode(self.backend, queries, persist=False)
+            matches = self._search_rows(query_vectors, k)
+
+            # Resolve metadata for all matched rows at once
+            rows = {row for query_matches in matches for row, _ in query_matches}
+            metadata = {row: self.skill_rows.skill(row) for row in rows}
+
+            return [[(metadata[row], score) for row, score in query_matches] for query_matches in matches]
+
+    def _search_rows(self, query_vectors: sparse.csr_matrix, k: int) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k (row, similarity) pairs per query, skipping tombstoned rows.
+        The first block is searched through the ANN backend when one is built,
+        appended blocks are always scanned exactly. Vectors are L2-normalized,
+        so cosine similarity is a dot product.
+        """
+        base = self.vector_blocks[0]
+        total = len(self.skill_rows)
+        candidates = (
+            self.ann_index.candidates(query_vectors)
+            if self.ann_index is not None
+            else [None] * query_vectors.shape[0]
+        )
+
+        tail_rows = np.arange(base.shape[0], total)
+        if len(self.vector_blocks) > 1:
+            tail_scores = (self._stacked(1) @ query_vectors.T).toarray()
+        else:
+            tail_scores = np.zeros((0, query_vectors.shape[0]))
+
+        full_scores = None
+        if any(rows is None for rows in candidates):
+            full_scores = (base @ query_vectors.T).toarray()
+
+        dead = self.tombstones[:total]
+
+        # Exact path: one (rows x queries) product and a vectorized partial selection
+        if all(rows is None for rows in candidates):
+            scores = np.vstack([full_scores, tail_scores]).T
+            if self.dead_count:
+                scores[:, dead] = -np.inf
+            top = top_k_batch(scores, k)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            return [
+                [(int(row), float(score)) for row, score in zip(rows, row_scores) if np.isfinite(score)]
+                for rows, row_scores in zip(top, top_scores)
+            ]
+
         results = []
-        for idx in top_indices:
-            if idx in self.skill_metadata:
-                results.append((self.skill_metadata[idx], float(similarities[idx])))
-        
+        for i, rows in enumerate(candidates):
+            if rows is None:
+                rows = np.arange(base.shape[0])
+                scores = full_scores[:, i]
+            else:
+                scores = (base[rows] @ query_vectors[i].T).toarray().ravel()
+
+            rows = np.concatenate([rows, tail_rows])
+            scores = np.concatenate([scores, tail_scores[:, i]])
+
+            # Replaced skills never match
+            if self.dead_count:
+                scores = np.where(dead[rows], -np.inf, scores)
+
+            results.append([
+                (int(rows[j]), float(scores[j]))
+                for j in top_k(scores, k)
+                if np.isfinite(scores[j])
+            ])
+
         return results
-    
+
     def compare_skill_sets(
         self,
         employee_skills: List[Dict[str, any]],
-        required_skills: List[str]
+        required_skills: List[str],
+        job_description_id: Optional[int] = None
     ) -> Dict[str, any]:
         """
         Compare employee skills with required skills using TF-IDF
         Returns gap analysis
+
+        Skill names are compared (not the proficiency and experience of the
+        index text) in the vocabulary of the job description's required
+        skills, which is fitted once and cached. Words of an employee skill
+        outside that vocabulary still count against its similarity, so only
+        names that match a required skill pass SKILL_MATCH_THRESHOLD.
         """
         if not employee_skills or not required_skills:
             return {
@@ -98,93 +569,269 @@ class VectorService:
                 "gap_percentage": 100.0,
                 "similarity_scores": {}
             }
-        
-        # Create text representations
-        employee_texts = [
-            self.create_skill_embedding(
-                s.get("skill_name", ""),
-                s.get("proficiency", ""),
-                s.get("experience", 0)
-            )
-            for s in employee_skills
-        ]
-        
-        # Vectorize all skills together
-        all_texts = employee_texts + required_skills
-        vectorizer = TfidfVectorizer(max_features=300, ngram_range=(1, 2))
-        vectors = vectorizer.fit_transform(all_texts)
-        
-        employee_vectors = vectors[:len(employee_skills)]
-        required_vectors = vectors[len(employee_skills):]
-        
-        # Calculate similarities
+
+        vectorizer, required_vectors = self._required_skill_vectors(required_skills, job_description_id)
+
+        employee_vectors = self._employee_skill_vectors(
+            vectorizer, len(required_skills), [s.get("skill_name", "") for s in employee_skills]
+        )
+
+        # Cosine similarity of every required skill against every employee skill
+        # (rows are L2-normalized), then the best employee match per requirement
+        similarities = (required_vectors @ employee_vectors.T).toarray()
+        best_indices = similarities.argmax(axis=1)
+        best_scores = similarities[np.arange(len(required_skills)), best_indices]
+
         matched_skills = []
         missing_skills = []
         similarity_scores = {}
-        
-        for i, req_skill in enumerate(required_skills):
-            req_vec = required_vectors[i:i+1]
-            
-            # Find best match in employee skills
-            similarities = cosine_similarity(req_vec, employee_vectors)[0]
-            best_idx = np.argmax(similarities)
-            best_score = similarities[best_idx]
-            
+
+        for req_skill, best_idx, best_score in zip(required_skills, best_indices, best_scores):
             similarity_scores[req_skill] = {
                 "matched_skill": employee_skills[best_idx]["skill_name"],
                 "similarity": float(best_score)
             }
-            
-            # Threshold for considering a match (0.5 = 50% similarity for TF-IDF)
-            if best_score > 0.5:
+
+            if best_score > SKILL_MATCH_THRESHOLD:
                 matched_skills.append(req_skill)
             else:
                 missing_skills.append(req_skill)
-        
+
         # Calculate gap percentage
         gap_percentage = (len(missing_skills) / len(required_skills)) * 100 if required_skills else 0
-        
+
         return {
             "missing_skills": missing_skills,
             "matched_skills": matched_skills,
             "gap_percentage": round(gap_percentage, 2),
             "similarity_scores": similarity_scores
         }
-    
+
+    def compare_skill_sets_batch(
+        self,
+        employees_skills: Dict[int, List[Dict[str, any]]],
+        required_skills: List[str],
+        job_description_id: Optional[int] = None
+    ) -> Dict[int, Dict[str, any]]:
+        """
+        Compare many employees against the same required skills in one pass
+        employees_skills format: {user_id: [{"skill_name": "Python", ...}, ...]}
+        Returns {user_id: {"missing_skills", "matched_skills", "gap_percentage"}}
+        """
+        results = {}
+        owners = []
+        texts = []
+        for user_id, skills in employees_skills.items():
+            if not skills or not required_skills:
+                results[user_id] = {
+                    "missing_skills": list(required_skills),
+                    "matched_skills": [],
+                    "gap_percentage": 100.0
+                }
+                continue
+            owners.append(user_id)
+            texts.extend(s.get("skill_name", "") for s in skills)
+
+        if not owners:
+            return results
+
+        vectorizer, required_vectors = self._required_skill_vectors(required_skills, job_description_id)
+
+        # One (all employee skills x required skills) similarity matrix, reduced
+        # to each employee's best score per required skill
+        similarities = (self._employee_skill_vectors(vectorizer, len(required_skills), texts) @ required_vectors.T).toarray()
+        counts = np.array([len(employees_skills[user_id]) for user_id in owners])
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        best_scores = np.maximum.reduceat(similarities, offsets, axis=0)
+
+        required = np.array(required_skills, dtype=object)
+        matched_mask = best_scores > SKILL_MATCH_THRESHOLD
+        gap_percentages = np.round((~matched_mask).sum(axis=1) / len(required_skills) * 100, 2)
+
+        for i, user_id in enumerate(owners):
+            results[user_id] = {
+                "missing_skills": required[~matched_mask[i]].tolist(),
+                "matched_skills": required[matched_mask[i]].tolist(),
+                "gap_percentage": float(gap_percentages[i])
+            }
+
+        return {user_id: results[user_id] for user_id in employees_skills}
+
+    def _required_skill_vectors(
+        self,
+        required_skills: List[str],
+        job_description_id: Optional[int] = None
+    ) -> Tuple[TfidfVectorizer, sparse.csr_matrix]:
+        """Vectorizer fitted on a job description's required skills, and their vectors"""
+        key = (job_description_id, tuple(required_skills))
+        with self._lock:
+            cached = self.requirement_cache.get(key)
+            if cached is not None:
+                self.requirement_cache.move_to_end(key)
+        if cached is not None:
+            return cached
+
+        # Single-character skills such as "C" or "R" must still be tokens
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), token_pattern=r"(?u)\b\w+\b")
+        required_vectors = vectorizer.fit_transform(required_skills)
+
+        with self._lock:
+            self.requirement_cache[key] = (vectorizer, required_vectors)
+            while len(self.requirement_cache) > self.requirement_cache_size:
+                self.requirement_cache.popitem(last=False)
+        return vectorizer, required_vectors
+
+    def _employee_skill_vectors(
+        self,
+        vectorizer: TfidfVectorizer,
+        required_count: int,
+        skill_names: List[str]
+    ) -> sparse.csr_matrix:
+        """
+        TF-IDF vectors of employee skill names in the vocabulary fitted on
+        required_count required skills, L2-normalized including the terms
+        outside it (weighted with the smoothed IDF of a term no required skill
+        contains). Each distinct name is vectorized once and sliced back out
+        """
+        if not skill_names:
+            return sparse.csr_matrix((0, len(vectorizer.vocabulary_)), dtype=np.float64)
+        unique_names, inverse = np.unique(np.asarray(skill_names, dtype=object), return_inverse=True)
+
+        analyze = vectorizer.build_analyzer()
+        vocabulary = vectorizer.vocabulary_
+        idf = vectorizer.idf_
+        unseen_idf = np.log(1 + required_count) + 1
+        indptr, indices, data, norms = [0], [], [], []
+        for name in unique_names:
+            counts = {}
+            for term in analyze(name):
+                counts[term] = counts.get(term, 0) + 1
+            squares = 0.0
+            for term, count in counts.items():
+                column = vocabulary.get(term)
+                weight = count * (idf[column] if column is not None else unseen_idf)
+                squares += weight * weight
+                if column is not None:
+                    indices.append(column)
+                    data.append(weight)
+            indptr.append(len(indices))
+            norms.append(np.sqrt(squares) or 1.0)
+        vectors = sparse.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr)),
+            shape=(len(unique_names), len(vocabulary))
+        )
+        return (sparse.diags(1 / np.array(norms)) @ vectors).tocsr()[inverse.ravel()]
+
+    def invalidate_job_description(self, job_description_id: int):
+        """Drop this worker's cached required-skill vectors of a job description (frees them early)"""
+        with self._lock:
+            for key in [k for k in self.requirement_cache if k[0] == job_description_id]:
+                del self.requirement_cache[key]
+
     def save_index(self):
-        """Save TF-IDF vectors and metadata to disk"""
-        data = {
-            'skill_texts': self.skill_texts,
-            'skill_metadata': self.skill_metadata,
-            'vectorizer': self.vectorizer if len(self.skill_texts) > 0 else None
-        }
-        
-        with open(os.path.join(self.vector_db_path, "skills_data.pkl"), "wb") as f:
-            pickle.dump(data, f)
-    
+        """Publish a full snapshot of the index (vectors, vocabulary and metadata) as a new generation"""
+        with self._lock, self.store.lock():
+            self.store.write_snapshot(
+                self.backend if self.backend.fitted else None,
+                self.skill_vectors,
+                self.skill_rows,
+                np.flatnonzero(self.tombstones).tolist(),
+                self.fitted_rows
+            )
+            # Switch to it like any other worker, so its rows are mapped rather than held here
+            self._load_generation()
+
     def load_index(self):
-        """Load TF-IDF vectors and metadata from disk"""
-        data_path = os.path.join(self.vector_db_path, "skills_data.pkl")
-        
-        if os.path.exists(data_path):
-            with open(data_path, "rb") as f:
-                data = pickle.load(f)
-                self.skill_texts = data.get('skill_texts', [])
-                self.skill_metadata = data.get('skill_metadata', {})
-                saved_vectorizer = data.get('vectorizer')
-                
-                if saved_vectorizer and len(self.skill_texts) > 0:
-                    self.vectorizer = saved_vectorizer
-                    self.skill_vectors = self.vectorizer.transform(self.skill_texts)
-    
+        """Open the live on-disk snapshot and replay its journal"""
+        with self._lock, self.store.lock():
+            self._sync()
+            if self.generation is None:
+                self._migrate_legacy_index()
+            elif self.embedding_stale:
+                # VECTOR_EMBEDDING_BACKEND changed since the index was built
+                self.refit_index()
+            elif self.snapshot_format < FORMAT_VERSION:
+                # Rewrite JSON metadata and journal in the mapped layout
+                rows = self._live_rows(len(self.skill_rows))
+                vectors = self.skill_vectors
+                self._rewrite_rows(rows, vectors[rows] if vectors is not None else None)
+
+    def _load_generation(self):
+        """Swap to the live snapshot: map its vectors and replay its journal"""
+        snapshot = self.store.load_snapshot()
+
+        self.backend = self.embedding.fresh()
+        self.embedding_stale = False
+        self.skill_rows = SkillRows()
+        self.vector_blocks = []
+        self.tombstones = np.zeros(0, dtype=bool)
+        self.dead_count = 0
+        self.fitted_rows = 0
+        self.generation = None
+        self.snapshot_format = FORMAT_VERSION
+        self.journal_offset = 0
+
+        if snapshot is not None:
+            self.generation = snapshot["generation"]
+            self.snapshot_format = snapshot["format_version"]
+            self.skill_rows = snapshot["rows"]
+            self.fitted_rows = snapshot["fitted_rows"]
+            self.tombstones = np.zeros(len(self.skill_rows), dtype=bool)
+            self.tombstones[np.asarray(snapshot["tombstones"], dtype=np.int64)] = True
+            self.dead_count = int(self.tombstones.sum())
+            self.vector_blocks = [snapshot["vectors"]] if snapshot["vectors"] is not None else []
+            if snapshot["embedding"] is not None:
+                self.backend = self._snapshot_backend(snapshot["embedding"], snapshot["path"])
+
+        self._rebuild_keys()
+        if self.generation is not None:
+            self._replay_journal()
+        self._rebuild_ann_index()
+
+    def _snapshot_backend(self, entry: Dict[str, any], path: str) -> EmbeddingBackend:
+        """The backend that encoded a snapshot; flags the index stale if it is not the configured one"""
+        if self.embedding.compatible_with(entry):
+            return self.embedding.restore(path, entry)
+
+        self.embedding_stale = True
+        try:
+            # Keep serving queries in the snapshot's space until it is re-encoded
+            return load_embedding_backend(entry, path)
+        except Exception as e:
+            print(f"Error loading {entry.get('backend')} embedding backend of the skill index: {str(e)}")
+            return self.embedding.fresh()
+
+    def _migrate_legacy_index(self):
+        """One-time conversion of a pickled skills_data.pkl index to the snapshot format"""
+        legacy_path = os.path.join(self.vector_db_path, "skills_data.pkl")
+        if not os.path.exists(legacy_path):
+            return
+
+        with open(legacy_path, "rb") as f:
+            data = pickle.load(f)
+
+        texts = data.get('skill_texts', [])
+        metadata = data.get('skill_metadata', {})
+        with self._lock:
+            self._append_rows(texts, [metadata.get(i, {}) for i in range(len(texts))])
+            self.refit_index()
+            if not len(self.skill_rows):
+                self.save_index()
+
+        os.remove(legacy_path)
+
     def clear_index(self):
         """Clear the index and metadata"""
-        self.skill_texts = []
-        self.skill_vectors = None
-        self.skill_metadata = {}
-        self.save_index()
+        with self._lock, self.store.lock():
+            self.skill_rows = SkillRows()
+            self.vector_blocks = []
+            self.fitted_rows = 0
+            self.tombstones = np.zeros(0, dtype=bool)
+            self.dead_count = 0
+            self.backend = self.embedding.fresh()
+            self.embedding_stale = False
+            self.save_index()
 
 
 # Singleton instance
 vector_service = VectorService()
-
@@ -0,0 +1,464 @@
+import io
+import os
+import json
+import fcntl
+import struct
+import shutil
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Tuple
+from scipy import sparse
+from services.embedding_backends import EmbeddingBackend
+
+
+# Bump when the snapshot layout changes; unsupported layouts are rejected on load
+FORMAT_VERSION = 3
+# Version 1 snapshots are TF-IDF only; versions 1 and 2 keep metadata (and the
+# journal) as JSON and are read through a compatibility path
+SUPPORTED_FORMAT_VERSIONS = (1, 2, 3)
+
+# Columns of format 1 and 2 metadata.json (besides "text")
+METADATA_COLUMNS = ("skill_name", "proficiency", "experience", "metadata")
+
+# String columns are stored as a UTF-8 byte blob plus row offsets into it
+STRING_COLUMNS = ("text", "skill_name", "proficiency")
+# Metadata ids of a skill; NULL_ID marks a missing one
+ID_COLUMNS = ("user_id", "skill_id")
+NULL_ID = -1
+ROW_FILES = (
+    "text.offsets", "text.blob",
+    "skill_name.offsets", "skill_name.blob", "skill_name.null",
+    "proficiency.offsets", "proficiency.blob", "proficiency.null",
+    "experience", "user_id", "skill_id",
+    "key.user_id", "key.skill_id", "key.row"
+)
+
+
+class SkillRows:
+    """
+    Texts and skill metadata of the index by row id.
+
+    Snapshot rows are decoded on access from memory-mapped columns, so opening
+    a snapshot does not depend on its size and every worker shares the same
+    pages. Rows appended since (journal replays, legacy snapshots) are kept in
+    lists after them.
+    """
+
+    def __init__(self, columns: Optional[Dict[str, np.ndarray]] = None):
+        self.columns = columns or {}
+        self.snapshot_rows = len(self.columns["experience"]) if columns else 0
+        self.appended_texts = []
+        self.appended_skills = []
+
+    @classmethod
+    def open(cls, directory: str) -> "SkillRows":
+        return cls({
+            name: np.load(os.path.join(directory, f"rows.{name}.npy"), mmap_mode="r")
+            for name in ROW_FILES
+        })
+
+    def __len__(self) -> int:
+        return self.snapshot_rows + len(self.appended_texts)
+
+    def append(self, text: str, skill: Dict[str, Any]):
+        self.appended_texts.append(text)
+        self.appended_skills.append(skill)
+
+    def text(self, row: int) -> str:
+        if row >= self.snapshot_rows:
+            return self.appended_texts[row - self.snapshot_rows]
+        return self._string("text", row)
+
+    def texts(self, rows) -> List[str]:
+        return [self.text(int(row)) for row in rows]
+
+    def skill(self, row: int) -> Dict[str, Any]:
+        """Skill dict of a row, in the format it was indexed with"""
+        if row >= self.snapshot_rows:
+            return self.appended_skills[row - self.snapshot_rows]
+
+        skill = {}
+        for column in STRING_COLUMNS[1:]:
+            if not self.columns[f"{column}.null"][row]:
+                skill[column] = self._string(column, row)
+        experience = float(self.columns["experience"][row])
+        if not np.isnan(experience):
+            skill["experience"] = experience
+        metadata = {
+            column: int(self.columns[column][row])
+            for column in ID_COLUMNS
+            if self.columns[column][row] != NULL_ID
+        }
+        if metadata:
+            skill["metadata"] = metadata
+        return skill
+
+    def key_rows(self, user_id: int, skill_id: Optional[int] = None) -> List[int]:
+        """Snapshot rows of a user, or of one of their skills (tombstoned ones included)"""
+        if not self.snapshot_rows:
+            return []
+        users = self.columns["key.user_id"]
+        start = np.searchsorted(users, user_id, side="left")
+        end = np.searchsorted(users, user_id, side="right")
+        if skill_id is not None:
+            skills = self.columns["key.skill_id"][start:end]
+            start, end = (
+                start + np.searchsorted(skills, skill_id, side="left"),
+                start + np.searchsorted(skills, skill_id, side="right")
+            )
+        return self.columns["key.row"][start:end].tolist()
+
+    def select(self, rows) -> "SkillRows":
+        """The given rows, renumbered from 0 and held in memory"""
+        selected = SkillRows()
+        for row in rows:
+            selected.append(self.text(int(row)), self.skill(int(row)))
+        return selected
+
+    def save(self, directory: str):
+        """Write the rows as columns (and a (user_id, skill_id)-sorted key index) to be opened with open()"""
+        rows = range(len(self))
+        skills = [self.skill(row) for row in rows]
+        values = {"text": self.texts(rows)}
+        for column in STRING_COLUMNS[1:]:
+            values[column] = [skill.get(column) for skill in skills]
+
+        columns = {}
+        for column, strings in values.items():
+            encoded = [value.encode("utf-8") if value is not None else b"" for value in strings]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            columns[f"{column}.offsets"] = offsets
+            columns[f"{column}.blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+            if column != "text":
+                columns[f"{column}.null"] = np.array([value is None for value in strings], dtype=bool)
+
+        columns["experience"] = np.array(
+            [float(skill["experience"]) if skill.get("experience") is not None else np.nan for skill in skills],
+            dtype=np.float64
+        )
+        for column in ID_COLUMNS:
+            ids = [(skill.get("metadata") or {}).get(column) for skill in skills]
+            columns[column] = np.array([NULL_ID if value is None else value for value in ids], dtype=np.int64)
+
+        keyed = np.flatnonzero((columns["user_id"] != NULL_ID) & (columns["skill_id"] != NULL_ID))
+        order = keyed[np.lexsort((columns["skill_id"][keyed], columns["user_id"][keyed]))]
+        columns["key.user_id"] = columns["user_id"][order]
+        columns["key.skill_id"] = columns["skill_id"][order]
+        columns["key.row"] = order.astype(np.int64)
+
+        for name in ROW_FILES:
+            np.save(os.path.join(directory, f"rows.{name}.npy"), columns[name])
+
+    def _string(self, column: str, row: int) -> str:
+        offsets = self.columns[f"{column}.offsets"]
+        return self.columns[f"{column}.blob"][offsets[row]:offsets[row + 1]].tobytes().decode("utf-8")
+
+
+class VectorStore:
+    """
+    Versioned, pickle-free on-disk format for the skill vector index.
+
+    Layout under the store root:
+        CURRENT                     name of the live snapshot directory (its generation)
+        index.lock                  flock serializing journal appends and snapshot publishing
+        maintainer.lock             held by the one process that refits and compacts
+        snapshot-000001/
+            manifest.json           format version, generation, shape, embedding backend, tombstones
+            vectors.data.npy        CSR arrays, opened with mmap_mode="r"
+            vectors.indices.npy
+            vectors.indptr.npy
+            idf.npy                 TF-IDF backend only: IDF weights in vocabulary column order
+            vocabulary.txt          TF-IDF backend only: one term per line, line number = column
+            rows.*.npy              texts and skill metadata as columns (see SkillRows), mmapped
+            journal.bin             append-only journal of writes since the snapshot
+
+    Snapshots are written to a fresh directory and published by atomically
+    replacing CURRENT, so a mapped snapshot is never modified in place. Every
+    process applies the journal in file order, so all workers converge on the
+    same rows; a process notices a new generation by re-reading CURRENT.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._lock_file = open(os.path.join(self.root, "index.lock"), "a")
+        self._lock_depth = 0
+        self._thread_lock = threading.RLock()
+        self._maintainer_file = None
+
+    @contextmanager
+    def lock(self):
+        """Exclusive, re-entrant cross-process lock for journal appends and snapshot publishing"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def try_become_maintainer(self) -> bool:
+        """
+        Elect this process as the single maintainer (refit and compaction).
+        The lock is held until the process exits, when another worker takes over.
+        """
+        if self._maintainer_file is not None:
+            return True
+        handle = open(os.path.join(self.root, "maintainer.lock"), "a")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._maintainer_file = handle
+        return True
+
+    @property
+    def current_path(self) -> str:
+        return os.path.join(self.root, "CURRENT")
+
+    def current_name(self) -> Optional[str]:
+        """Name (generation) of the live snapshot, if one has been published"""
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_snapshot(self) -> Optional[str]:
+        """Directory of the live snapshot, if one has been published"""
+        name = self.current_name()
+        return os.path.join(self.root, name) if name else None
+
+    def write_snapshot(
+        self,
+        backend: Optional[EmbeddingBackend],
+        vectors: Optional[sparse.csr_matrix],
+        rows: SkillRows,
+        tombstones: List[int],
+        fitted_rows: int
+    ) -> str:
+        """
+        Write a complete snapshot and make it the live one, returning its name.
+        Callers must hold lock().
+        """
+        sequence = self._latest_sequence() + 1
+        name = f"snapshot-{sequence:06d}"
+        tmp_dir = os.path.join(self.root, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        if vectors is None:
+            vectors = sparse.csr_matrix((len(rows), 0), dtype=np.float64)
+        vectors = sparse.csr_matrix(vectors)
+        np.save(os.path.join(tmp_dir, "vectors.data.npy"), vectors.data)
+        np.save(os.path.join(tmp_dir, "vectors.indices.npy"), vectors.indices)
+        np.save(os.path.join(tmp_dir, "vectors.indptr.npy"), vectors.indptr)
+
+        if backend is not None:
+            backend.save(tmp_dir)
+
+        rows.save(tmp_dir)
+
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "generation": sequence,
+            "rows": len(rows),
+            "shape": list(vectors.shape),
+            "fitted_rows": fitted_rows,
+            "tombstones": sorted(int(row) for row in tombstones),
+            "embedding": {
+                "backend": backend.name,
+                "params": backend.params(),
+                "fingerprint": backend.fingerprint()
+            } if backend is not None else None
+        }
+        with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+        snapshot_dir = os.path.join(self.root, name)
+        os.rename(tmp_dir, snapshot_dir)
+        previous = self.current_name()
+        self._publish(name)
+        self._remove_stale_snapshots(keep={name, previous})
+        return name
+
+    def load_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Open the live snapshot. Vector arrays and row columns are
+        memory-mapped, so they are not read or copied at load and their pages
+        are shared between processes through the OS cache. Format 1 and 2
+        metadata is parsed from JSON, which is linear in the number of rows.
+        """
+        name = self.current_name()
+        if name is None:
+            return None
+        snapshot_dir = os.path.join(self.root, name)
+
+        with open(os.path.join(snapshot_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(
+                f"Unsupported vector index format {manifest.get('format_version')} in {snapshot_dir}"
+            )
+
+        vectors = None
+        if manifest["rows"] > 0:
+            vectors = sparse.csr_matrix(
+                (
+                    np.load(os.path.join(snapshot_dir, "vectors.data.npy"), mmap_mode="r"),
+                    np.load(os.path.join(snapshot_dir, "vectors.indices.npy"), mmap_mode="r"),
+                    np.load(os.path.join(snapshot_dir, "vectors.indptr.npy"), mmap_mode="r")
+                ),
+                shape=tuple(manifest["shape"]),
+                copy=False
+            )
+
+        embedding = manifest.get("embedding")
+        if manifest["format_version"] == 1 and manifest.get("vectorizer"):
+            embedding = {"backend": "tfidf", "params": manifest["vectorizer"], "fingerprint": None}
+
+        if manifest["format_version"] >= 3:
+            rows = SkillRows.open(snapshot_dir)
+        else:
+            rows = self._load_json_rows(snapshot_dir)
+
+        return {
+            "generation": name,
+            "format_version": manifest["format_version"],
+            "path": snapshot_dir,
+            "embedding": embedding,
+            "vectors": vectors,
+            "rows": rows,
+            "tombstones": manifest["tombstones"],
+            "fitted_rows": manifest["fitted_rows"]
+        }
+
+    def append_journal(
+        self,
+        generation: str,
+        texts: List[str],
+        skills: List[Dict[str, Any]],
+        vectors: Optional[sparse.csr_matrix],
+        replace_user_ids: Optional[List[int]]
+    ):
+        """
+        Append one write to the journal of the given snapshot. Callers must
+        hold lock() and have applied every earlier journal entry.
+        """
+        # One length-prefixed .npz frame per write: the vectors as npy arrays
+        # and the (small) texts and skills as a JSON byte array
+        record = {"replace_user_ids": replace_user_ids, "texts": texts, "skills": skills}
+        arrays = {"record": np.frombuffer(json.dumps(record).encode("utf-8"), dtype=np.uint8)}
+        if vectors is not None:
+            arrays.update(
+                data=vectors.data,
+                indices=vectors.indices,
+                indptr=vectors.indptr,
+                shape=np.array(vectors.shape, dtype=np.int64)
+            )
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        payload = buffer.getvalue()
+
+        with open(os.path.join(self.root, generation, "journal.bin"), "ab") as f:
+            f.write(struct.pack("<Q", len(payload)) + payload)
+            f.flush()
+
+    def read_journal(self, generation: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Journal entries of a snapshot starting at a byte offset, and the offset
+        just past the last complete entry
+        """
+        path = os.path.join(self.root, generation, "journal.bin")
+        if not os.path.exists(path):
+            return self._read_json_journal(generation, offset)
+        try:
+            if os.path.getsize(path) <= offset:
+                return [], offset
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+
+        # Only consume complete frames; a torn final write is left for later
+        records = []
+        position = 0
+        while position + 8 <= len(data):
+            (size,) = struct.unpack_from("<Q", data, position)
+            if position + 8 + size > len(data):
+                break
+            with np.load(io.BytesIO(data[position + 8:position + 8 + size]), allow_pickle=False) as arrays:
+                record = json.loads(arrays["record"].tobytes().decode("utf-8"))
+                record["vectors"] = sparse.csr_matrix(
+                    (arrays["data"], arrays["indices"], arrays["indptr"]),
+                    shape=tuple(arrays["shape"])
+                ) if "data" in arrays.files else None
+            records.append(record)
+            position += 8 + size
+        return records, offset + position
+
+    def _load_json_rows(self, snapshot_dir: str) -> SkillRows:
+        """Rows of a format 1 or 2 snapshot, parsed from metadata.json"""
+        with open(os.path.join(snapshot_dir, "metadata.json"), encoding="utf-8") as f:
+            columns = json.load(f)
+
+        rows = SkillRows()
+        for text, values in zip(columns["text"], zip(*(columns[column] for column in METADATA_COLUMNS))):
+            rows.append(text, {column: value for column, value in zip(METADATA_COLUMNS, values) if value is not None})
+        return rows
+
+    def _read_json_journal(self, generation: str, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Journal of a format 1 or 2 snapshot (one JSON line per write)"""
+        path = os.path.join(self.root, generation, "journal.ndjson")
+        try:
+            if os.path.getsize(path) <= offset:
+                return [], offset
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+
+        # Only consume complete lines; a torn final write is left for later
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            if record["vectors"] is not None:
+                v = record["vectors"]
+                record["vectors"] = sparse.csr_matrix(
+                    (v["data"], v["indices"], v["indptr"]),
+                    shape=tuple(v["shape"])
+                )
+            records.append(record)
+        return records, offset + end
+
+    def _latest_sequence(self) -> int:
+        sequences = [
+            int(name.split("-")[1])
+            for name in os.listdir(self.root)
+            if name.startswith("snapshot-") and name.split("-")[1].isdigit()
+        ]
+        return max(sequences, default=0)
+
+    def _publish(self, name: str):
+        tmp_path = self.current_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.current_path)
+
+    def _remove_stale_snapshots(self, keep: set):
+        # The previous generation is kept for workers that have not switched yet;
+        # mapped files stay readable after unlinking, so older ones can go
+        for name in os.listdir(self.root):
+            if name.startswith("snapshot-") and name not in keep:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
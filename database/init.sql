@@ -1,8 +1,12 @@
 -- SkillPilot AI Database Schema
 
 -- Drop tables if they exist
+DROP TABLE IF EXISTS employee_summary;
+DROP TABLE IF EXISTS gap_analysis_results;
 DROP TABLE IF EXISTS learning_roadmaps;
+DROP TABLE IF EXISTS roadmap_templates;
 DROP TABLE IF EXISTS assessment_results;
+DROP TABLE IF EXISTS quiz_generation_jobs;
 DROP TABLE IF EXISTS quiz_questions;
 DROP TABLE IF EXISTS employee_skills;
 DROP TABLE IF EXISTS job_descriptions;
@@ -110,6 +114,49 @@ CREATE TABLE assessment_results (
     INDEX idx_user (user_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Quiz Generation Jobs table (bulk question generation progress)
+CREATE TABLE quiz_generation_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_title_id INT NOT NULL,
+    job_description_id INT,
+    status ENUM('pending', 'running', 'completed', 'completed_with_errors', 'failed') NOT NULL DEFAULT 'pending',
+    difficulty_levels JSON NOT NULL,
+    num_questions INT NOT NULL COMMENT 'Questions requested per skill and difficulty',
+    total_tasks INT NOT NULL DEFAULT 0 COMMENT 'Skill and difficulty combinations to generate',
+    completed_tasks INT NOT NULL DEFAULT 0,
+    failed_tasks INT NOT NULL DEFAULT 0,
+    questions_created INT NOT NULL DEFAULT 0,
+    errors JSON COMMENT 'Failed skill and difficulty combinations',
+    created_by INT,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_description_id) REFERENCES job_descriptions(id) ON DELETE SET NULL,
+    FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_job_title (job_title_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Roadmap Templates table (one generated roadmap per job title, skill and level transition)
+CREATE TABLE roadmap_templates (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_title_id INT NOT NULL,
+    skill_name VARCHAR(255) NOT NULL,
+    skill_key VARCHAR(255) NOT NULL COMMENT 'Normalized skill name',
+    current_level ENUM('beginner', 'intermediate', 'advanced', 'expert') NOT NULL,
+    target_level ENUM('beginner', 'intermediate', 'advanced', 'expert') NOT NULL,
+    milestones JSON NOT NULL,
+    course_recommendations JSON,
+    practice_tasks JSON,
+    estimated_completion_weeks INT,
+    daily_time_commitment DECIMAL(4,1),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_transition (job_title_id, skill_key, current_level, target_level)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- Learning Roadmaps table
 CREATE TABLE learning_roadmaps (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -123,6 +170,7 @@ CREATE TABLE learning_roadmaps (
     course_recommendations JSON COMMENT 'Recommended courses with links',
     practice_tasks JSON COMMENT 'Tasks and projects to complete',
     estimated_completion_weeks INT,
+    template_id INT NULL COMMENT 'Roadmap template the content was copied from',
     status ENUM('not_started', 'in_progress', 'completed', 'paused') DEFAULT 'not_started',
     progress_percentage DECIMAL(5,2) DEFAULT 0,
     started_at TIMESTAMP NULL,
@@ -131,10 +179,41 @@ CREATE TABLE learning_roadmaps (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    FOREIGN KEY (template_id) REFERENCES roadmap_templates(id) ON DELETE SET NULL,
     INDEX idx_user_status (user_id, status),
     INDEX idx_skill (skill_name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Gap Analysis Results table (materialized per employee)
+CREATE TABLE gap_analysis_results (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    job_title_id INT NOT NULL,
+    job_description_id INT NOT NULL,
+    fingerprint CHAR(64) NOT NULL COMMENT 'Hash of the employee skills and job description the result was computed from',
+    result JSON NOT NULL COMMENT 'Combined vector and AI gap analysis',
+    is_stale BOOLEAN NOT NULL DEFAULT FALSE,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_description_id) REFERENCES job_descriptions(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_user (user_id),
+    INDEX idx_job_title (job_title_id),
+    INDEX idx_job_description (job_description_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Employee Summary table (dashboard totals, maintained by the writes that change them)
+CREATE TABLE employee_summary (
+    user_id INT PRIMARY KEY,
+    total_skills INT NOT NULL DEFAULT 0,
+    total_assessments INT NOT NULL DEFAULT 0,
+    total_points INT NOT NULL DEFAULT 0 COMMENT 'Sum of points earned; average = total_points / total_assessments',
+    active_roadmaps INT NOT NULL DEFAULT 0 COMMENT 'Roadmaps not started or in progress',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- Add foreign key to users table for job_title_id
 ALTER TABLE users ADD FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE SET NULL;
 
@@ -200,3 +279,6 @@ INSERT INTO users (name, email, password_hash, role, job_title_id, years_of_expe
 ('John Doe', 'john.doe@skillpilot.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewY5GyYNq8QQ8pKS', 'EMPLOYEE', 1, 1.5);
 -- Default password: admin123
 
+-- Summary rows of the seeded employees
+INSERT INTO employee_summary (user_id)
+SELECT id FROM users WHERE role = 'EMPLOYEE';
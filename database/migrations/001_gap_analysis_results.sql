@@ -0,0 +1,20 @@
+-- Upgrade an existing database: materialized gap analysis
+-- mysql -u skillpilot -p skillpilot_db < database/migrations/001_gap_analysis_results.sql
+
+CREATE TABLE IF NOT EXISTS gap_analysis_results (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    job_title_id INT NOT NULL,
+    job_description_id INT NOT NULL,
+    fingerprint CHAR(64) NOT NULL COMMENT 'Hash of the employee skills and job description the result was computed from',
+    result JSON NOT NULL COMMENT 'Combined vector and AI gap analysis',
+    is_stale BOOLEAN NOT NULL DEFAULT FALSE,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_description_id) REFERENCES job_descriptions(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_user (user_id),
+    INDEX idx_job_title (job_title_id),
+    INDEX idx_job_description (job_description_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
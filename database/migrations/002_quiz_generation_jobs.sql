@@ -0,0 +1,25 @@
+-- Upgrade an existing database: bulk quiz generation jobs
+-- mysql -u skillpilot -p skillpilot_db < database/migrations/002_quiz_generation_jobs.sql
+
+CREATE TABLE IF NOT EXISTS quiz_generation_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_title_id INT NOT NULL,
+    job_description_id INT,
+    status ENUM('pending', 'running', 'completed', 'completed_with_errors', 'failed') NOT NULL DEFAULT 'pending',
+    difficulty_levels JSON NOT NULL,
+    num_questions INT NOT NULL COMMENT 'Questions requested per skill and difficulty',
+    total_tasks INT NOT NULL DEFAULT 0 COMMENT 'Skill and difficulty combinations to generate',
+    completed_tasks INT NOT NULL DEFAULT 0,
+    failed_tasks INT NOT NULL DEFAULT 0,
+    questions_created INT NOT NULL DEFAULT 0,
+    errors JSON COMMENT 'Failed skill and difficulty combinations',
+    created_by INT,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    FOREIGN KEY (job_description_id) REFERENCES job_descriptions(id) ON DELETE SET NULL,
+    FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_job_title (job_title_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,24 @@
+-- Upgrade an existing database: roadmap template library
+-- mysql -u skillpilot -p skillpilot_db < database/migrations/003_roadmap_templates.sql
+
+CREATE TABLE IF NOT EXISTS roadmap_templates (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_title_id INT NOT NULL,
+    skill_name VARCHAR(255) NOT NULL,
+    skill_key VARCHAR(255) NOT NULL COMMENT 'Normalized skill name',
+    current_level ENUM('beginner', 'intermediate', 'advanced', 'expert') NOT NULL,
+    target_level ENUM('beginner', 'intermediate', 'advanced', 'expert') NOT NULL,
+    milestones JSON NOT NULL,
+    course_recommendations JSON,
+    practice_tasks JSON,
+    estimated_completion_weeks INT,
+    daily_time_commitment DECIMAL(4,1),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (job_title_id) REFERENCES job_titles(id) ON DELETE CASCADE,
+    UNIQUE KEY unique_transition (job_title_id, skill_key, current_level, target_level)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+ALTER TABLE learning_roadmaps
+    ADD COLUMN template_id INT NULL COMMENT 'Roadmap template the content was copied from' AFTER estimated_completion_weeks,
+    ADD FOREIGN KEY (template_id) REFERENCES roadmap_templates(id) ON DELETE SET NULL;
@@ -0,0 +1,34 @@
+-- Upgrade an existing database: employee_summary read model
+-- mysql -u skillpilot -p skillpilot_db < database/migrations/004_employee_summary.sql
+
+CREATE TABLE IF NOT EXISTS employee_summary (
+    user_id INT PRIMARY KEY,
+    total_skills INT NOT NULL DEFAULT 0,
+    total_assessments INT NOT NULL DEFAULT 0,
+    total_points INT NOT NULL DEFAULT 0 COMMENT 'Sum of points earned; average = total_points / total_assessments',
+    active_roadmaps INT NOT NULL DEFAULT 0 COMMENT 'Roadmaps not started or in progress',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill every employee without a row from the raw tables
+INSERT IGNORE INTO employee_summary (user_id, total_skills, total_assessments, total_points, active_roadmaps)
+SELECT
+    u.id,
+    COALESCE(s.total_skills, 0),
+    COALESCE(a.total_assessments, 0),
+    COALESCE(a.total_points, 0),
+    COALESCE(r.active_roadmaps, 0)
+FROM users u
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS total_skills FROM employee_skills GROUP BY user_id
+) s ON s.user_id = u.id
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS total_assessments, SUM(points_earned) AS total_points
+    FROM assessment_results GROUP BY user_id
+) a ON a.user_id = u.id
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS active_roadmaps FROM learning_roadmaps
+    WHERE status IN ('not_started', 'in_progress') GROUP BY user_id
+) r ON r.user_id = u.id
+WHERE u.role = 'EMPLOYEE';